@@ -0,0 +1,175 @@
+"""
+Per-tool admission control and coalescing of identical in-flight calls.
+
+Expensive tools get a ToolLimit. At most ``concurrency`` calls run at once,
+and up to ``queue`` more wait in arrival order. A call that finds the queue
+full, or that waits longer than ``timeout`` seconds, is shed at once with a
+retry-after hint instead of piling up behind the rest. Waiting happens on
+the event loop before the call is handed to the threadpool, so queued calls
+do not hold the worker threads that cheap tools need.
+
+SingleFlight lets identical calls that overlap share one computation: the
+first one runs it and the others await its result.
+
+Limits are configured as comma-separated ``tool=concurrency:queue`` entries,
+for example ``top_states=4:16,query_scores=1:4``; ``tool=0`` removes a
+tool's limit.
+
+Both classes are used from one event loop and take no locks.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+# Bounds on the retry-after hint, in seconds
+MIN_RETRY_AFTER = 0.05
+MAX_RETRY_AFTER = 30.0
+
+
+class Shed(Exception):
+    """Raised when a call is not admitted ("rejected" or "timed_out")."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_limits(spec: str) -> dict[str, tuple[int, int]]:
+    """Parse ``tool=concurrency:queue`` entries; a concurrency of 0 maps to (0, 0)."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        tool, sep, value = entry.partition("=")
+        concurrency, _, queue = value.partition(":")
+        try:
+            limit = (int(concurrency), int(queue or 0))
+        except ValueError:
+            limit = None
+        if not sep or not tool.strip() or limit is None or min(limit) < 0:
+            raise ValueError(f"Invalid tool limit '{entry}'. Use tool=concurrency:queue.")
+        limits[tool.strip()] = limit if limit[0] > 0 else (0, 0)
+    return limits
+
+
+class ToolLimit:
+    """Bounded concurrency with a bounded FIFO queue for one tool."""
+
+    def __init__(self, concurrency: int, queue: int, timeout: float | None = None):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # Smoothed duration of admitted calls in seconds, for retry-after hints
+        self.latency = 0.0
+        # When the first admitted call started, until a call has finished
+        self._first_start: float | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        """Estimate the seconds until a new call would be admitted.
+
+        Before any call has finished, the time the first one has been
+        running stands in for the latency: calls take at least that long.
+        """
+        latency = self.latency
+        if latency == 0 and self._first_start is not None:
+            latency = time.perf_counter() - self._first_start
+        backlog = (len(self._waiters) + 1) / self.concurrency
+        return round(min(max(backlog * latency, MIN_RETRY_AFTER), MAX_RETRY_AFTER), 2)
+
+    async def acquire(self) -> bool:
+        """Take a slot, queueing for one if needed; return whether the call had to wait.
+
+        Raises Shed when the queue is full or the wait times out.
+        """
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            if self._first_start is None:
+                self._first_start = time.perf_counter()
+            return False
+        if len(self._waiters) >= self.queue:
+            raise Shed("rejected", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise Shed("timed_out", self.retry_after()) from None
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        return True
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        """Leave the queue, giving back a slot that was handed over as the wait ended."""
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, passing it straight to the next waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def observe(self, seconds: float) -> None:
+        """Fold an admitted call's duration into the latency estimate."""
+        self.latency = seconds if self.latency == 0 else 0.8 * self.latency + 0.2 * seconds
+        self._first_start = None
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue": self.queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "latency_ms": round(self.latency * 1000, 3),
+        }
+
+
+class SingleFlight:
+    """Share one computation between identical overlapping calls."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> tuple[object, bool]:
+        """Run ``fn``, or await the call with the same key already in flight.
+
+        Returns (result, whether it was shared). The computation runs in its
+        own task, so a caller that disconnects does not cancel it for the
+        others.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), False
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved so an error nobody awaited is not logged twice
@@ -0,0 +1,183 @@
+"""
+Cheap-tool latency under a flood of expensive calls, with and without admission control.
+
+Runs a copy of the server (serve.py, one worker) against a synthetic table
+in a temporary directory. Two kinds of client drive it over streamable HTTP:
+
+cheap   get_opportunity_score for random keys, the lookups an agent makes
+        most often
+flood   uncached query_scores, compare_states and top_states calls with
+        random arguments, the runaway-agent-loop pattern
+
+The cheap clients run alone first (baseline), then alongside the flood
+(overload); the flood runs in its own process. This is done once with the
+default per-tool limits and once with the flood tools unlimited. The
+script reports cheap p50/p99 for both phases and how many flood calls
+completed or were shed.
+
+Limits bound the tool work the flood can run at once, not the transport
+work of receiving its requests and sending back shed responses. On a host
+where the clients share the server's cores, that transport work still
+slows the cheap calls; give the server its own cores (or run the flood
+from another machine) to see how well the cheap tools are isolated.
+
+    python benchmarks/bench_admission.py
+    python benchmarks/bench_admission.py --rows 1000000 --flood-concurrency 64 --seconds 20
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_suite import SERVER_DIR, _free_port, start_server, summarize
+from synthetic import CORP_TYPES, write_synthetic_csv
+
+EMP_SIZES = ["1-4", "5-9", "10-19", "20-49", "50-99", "100-249", "250-499", "500-999", "1000+"]
+
+FLOOD_TOOLS = ["query_scores", "compare_states", "top_states"]
+
+MODES = {
+    "limits": {},
+    "unlimited": {"SCORE_TOOL_LIMITS": ",".join(f"{tool}=0" for tool in FLOOD_TOOLS)},
+}
+
+
+def flood_call(rng: random.Random, states: list[str]) -> tuple[str, dict]:
+    """A random expensive call; the random arguments defeat the response cache."""
+    corp_type, emp_size = rng.choice(CORP_TYPES), rng.choice(EMP_SIZES)
+    roll = rng.random()
+    if roll < 0.4:
+        return "query_scores", {
+            "group_by": [rng.choice(["state", "corp_type", "emp_size"])],
+            "aggregates": ["mean(score)", "weighted_mean(score, employees)"],
+            "filters": {"min_score": round(rng.uniform(0, 50), 3)},
+        }
+    if roll < 0.7:
+        return "compare_states", {"states": rng.sample(states, 50), "corp_type": corp_type, "emp_size": emp_size}
+    return "top_states", {"corp_type": corp_type, "emp_size": emp_size, "n": rng.randint(100, 1000)}
+
+
+async def run_cheap(url: str, states: list[str], clients: int, seconds: float) -> dict:
+    """Call get_opportunity_score from `clients` sessions for `seconds`; return latencies."""
+    from fastmcp import Client
+
+    deadline = time.perf_counter() + seconds
+    samples: list[int] = []
+
+    async def client_loop(seed: int):
+        rng = random.Random(seed)
+        async with Client(url) as client:
+            while time.perf_counter() < deadline:
+                args = {"state": rng.choice(states), "corp_type": rng.choice(CORP_TYPES), "emp_size": rng.choice(EMP_SIZES)}
+                t0 = time.perf_counter_ns()
+                await client.call_tool("get_opportunity_score", args)
+                samples.append(time.perf_counter_ns() - t0)
+
+    await asyncio.gather(*(client_loop(i) for i in range(clients)))
+    return summarize(samples, seconds)
+
+
+async def run_flood(url: str, states: list[str], clients: int, seconds: float, honor_retry_after: bool) -> dict:
+    """Send random expensive calls from `clients` sessions for `seconds`; count outcomes."""
+    from fastmcp import Client
+
+    deadline = time.perf_counter() + seconds
+    outcomes = {"ok": 0, "shed": 0, "error": 0}
+
+    async def client_loop(seed: int):
+        rng = random.Random(seed)
+        async with Client(url) as client:
+            while time.perf_counter() < deadline:
+                tool, args = flood_call(rng, states)
+                try:
+                    result = await client.call_tool(tool, args, raise_on_error=False)
+                except Exception:
+                    outcomes["error"] += 1
+                    continue
+                retry_after = (result.structured_content or {}).get("retry_after")
+                if retry_after is None:
+                    outcomes["ok"] += 1
+                    continue
+                outcomes["shed"] += 1
+                if honor_retry_after:
+                    await asyncio.sleep(retry_after)
+
+    await asyncio.gather(*(client_loop(1000 + i) for i in range(clients)))
+    return outcomes
+
+
+def _flood_process(url, states, clients, seconds, honor_retry_after, results) -> None:
+    results.put(asyncio.run(run_flood(url, states, clients, seconds, honor_retry_after)))
+
+
+def run_mode(mode: str, rows: int, cheap: int, flood: int, seconds: float, honor_retry_after: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        server_dir = Path(tmp)
+        for path in SERVER_DIR.glob("*.py"):
+            shutil.copy(path, server_dir)
+        write_synthetic_csv(server_dir / "score_lookup.csv", rows)
+        states = sorted({f"State {s:06d}" for s in range(max(1, rows // (len(CORP_TYPES) * len(EMP_SIZES))))})
+
+        port = _free_port()
+        proc = start_server(port, 1, cwd=server_dir, env=MODES[mode])
+        url = f"http://127.0.0.1:{port}/mcp"
+        try:
+            asyncio.run(run_cheap(url, states, cheap, 1.0))  # warm up
+            baseline = asyncio.run(run_cheap(url, states, cheap, seconds / 2))
+
+            # The flood runs in its own process so its response handling does
+            # not hold up the cheap clients' event loop
+            results = multiprocessing.Queue()
+            flooder = multiprocessing.Process(
+                target=_flood_process, args=(url, states, flood, seconds, honor_retry_after, results)
+            )
+            flooder.start()
+            time.sleep(1.0)  # let the flood sessions connect
+            overload = asyncio.run(run_cheap(url, states, cheap, seconds - 2.0))
+            outcomes = results.get()
+            flooder.join()
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {"baseline": {"cheap": baseline, "flood": None}, "overload": {"cheap": overload, "flood": outcomes}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cheap-concurrency", type=int, default=4)
+    parser.add_argument("--flood-concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the overload phase")
+    parser.add_argument("--mode", choices=[*MODES, "all"], default="all")
+    parser.add_argument(
+        "--honor-retry-after", action="store_true", help="flood clients wait out retry_after instead of retrying at once"
+    )
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    modes = list(MODES) if args.mode == "all" else [args.mode]
+    results = {}
+    print(f"{'mode':10}{'phase':10}{'cheap p50 ms':>14}{'cheap p99 ms':>14}{'cheap/s':>9}{'flood ok':>10}{'shed':>7}")
+    for mode in modes:
+        print(f"[admission] {mode}: {args.rows:,} rows, {args.flood_concurrency} flood clients", file=sys.stderr)
+        results[mode] = run_mode(
+            mode, args.rows, args.cheap_concurrency, args.flood_concurrency, args.seconds, args.honor_retry_after
+        )
+        for phase, result in results[mode].items():
+            cheap, flood = result["cheap"], result["flood"] or {}
+            print(f"{mode:10}{phase:10}{cheap['p50_us'] / 1000:>14.2f}{cheap['p99_us'] / 1000:>14.2f}"
+                  f"{cheap['throughput_per_s']:>9.0f}{flood.get('ok', ''):>10}{flood.get('shed', ''):>7}")
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
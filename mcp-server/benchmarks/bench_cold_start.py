@@ -0,0 +1,161 @@
+"""
+Cold-start budget check: import time and time to the first tool call.
+
+Each run starts a fresh interpreter, imports server.py, then calls
+get_opportunity_score through an in-memory fastmcp client until it succeeds.
+It records how long the import took and how long it took from the start of
+the import to the first successful result. It runs in the default (eager)
+mode and in cold-start mode (SCORE_COLD_START=1). The script exits non-zero
+when the median of either measurement exceeds its budget, so it can gate
+changes that make startup slower.
+
+Most of the import is fastmcp and its dependencies, which take anywhere from
+under a second to several seconds depending on the machine. Budgets are
+therefore multiples of a baseline measured the same way: the median time to
+import fastmcp alone in a fresh interpreter. Absolute budgets in seconds can
+be given instead:
+
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --runs 9 --import-factor 3 --first-call-factor 4
+    python benchmarks/bench_cold_start.py --import-budget 1.5 --first-call-budget 2
+    python benchmarks/bench_cold_start.py --mode cold --out cold_start.json
+
+Timings include the interpreter's bytecode cache and the OS page cache as
+left by earlier runs; the first run after a deploy will be slower.
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {"eager": {}, "cold": {"SCORE_COLD_START": "1"}}
+
+# Default budgets, as multiples of the fastmcp import baseline
+IMPORT_FACTOR = 5.0
+FIRST_CALL_FACTOR = 7.0
+
+BASELINE_PROBE = """
+import json, time
+start = time.perf_counter()
+import fastmcp
+print(json.dumps({"import_s": time.perf_counter() - start}))
+"""
+
+# Runs in the child interpreter; argv carries the tool arguments
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+from fastmcp import Client
+
+async def first_call():
+    arguments = dict(zip(("state", "corp_type", "emp_size"), sys.argv[1:4]))
+    async with Client(server.mcp) as client:
+        while True:
+            result = await client.call_tool("get_opportunity_score", arguments, raise_on_error=False)
+            if not result.is_error and "error" not in (result.structured_content or {}):
+                return
+            await asyncio.sleep(0.005)
+
+asyncio.run(first_call())
+done = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_call_s": done - start}))
+"""
+
+
+def probe_arguments() -> list[str]:
+    """Return a (state, corp_type, emp_size) key present in the lookup table."""
+    with open(SERVER_DIR / "score_lookup.csv", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return next(reader)[:3]
+
+
+def run_once(mode: str, arguments: list[str], probe: str = PROBE) -> dict:
+    """Time one fresh interpreter; process_s includes interpreter startup."""
+    env = {**os.environ, **MODES[mode]}
+    env.pop("SCORE_RELOAD_INTERVAL", None)
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", probe, *arguments],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True, timeout=120,
+    )
+    process_s = time.perf_counter() - start
+    return {**json.loads(out.stdout.strip().splitlines()[-1]), "process_s": process_s}
+
+
+def median(values: list[float]) -> float:
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def baseline(runs: int) -> float:
+    """Median seconds to import fastmcp alone in a fresh interpreter."""
+    run_once("eager", [], BASELINE_PROBE)  # populate the bytecode and page caches
+    return median([run_once("eager", [], BASELINE_PROBE)["import_s"] for _ in range(runs)])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=[*MODES, "both"], default="both")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-factor", type=float, default=IMPORT_FACTOR,
+                        help="import budget as a multiple of the fastmcp import baseline")
+    parser.add_argument("--first-call-factor", type=float, default=FIRST_CALL_FACTOR,
+                        help="first-result budget as a multiple of the fastmcp import baseline")
+    parser.add_argument("--import-budget", type=float, help="median seconds to import server.py (overrides the factor)")
+    parser.add_argument("--first-call-budget", type=float,
+                        help="median seconds to the first result (overrides the factor)")
+    parser.add_argument("--out", type=Path, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    arguments = probe_arguments()
+    modes = list(MODES) if args.mode == "both" else [args.mode]
+    results, failures = {}, []
+
+    baseline_s = None
+    if args.import_budget is None or args.first_call_budget is None:
+        baseline_s = round(baseline(args.runs), 4)
+        print(f"fastmcp import baseline {baseline_s:.3f}s")
+    import_budget = args.import_budget
+    if import_budget is None:
+        import_budget = round(args.import_factor * baseline_s, 3)
+    first_call_budget = args.first_call_budget
+    if first_call_budget is None:
+        first_call_budget = round(args.first_call_factor * baseline_s, 3)
+    print(f"budgets: import {import_budget}s, first call {first_call_budget}s\n")
+
+    print(f"{'mode':8}{'import s':>10}{'first call s':>14}{'process s':>11}")
+    for mode in modes:
+        run_once(mode, arguments)  # populate the bytecode and page caches
+        runs = [run_once(mode, arguments) for _ in range(args.runs)]
+        summary = {key: round(median([r[key] for r in runs]), 4) for key in ("import_s", "first_call_s", "process_s")}
+        results[mode] = {**summary, "runs": runs}
+        print(f"{mode:8}{summary['import_s']:>10.3f}{summary['first_call_s']:>14.3f}{summary['process_s']:>11.3f}")
+
+        if summary["import_s"] > import_budget:
+            failures.append(f"{mode}: import took {summary['import_s']:.3f}s (budget {import_budget}s)")
+        if summary["first_call_s"] > first_call_budget:
+            failures.append(
+                f"{mode}: first tool call after {summary['first_call_s']:.3f}s (budget {first_call_budget}s)"
+            )
+
+    if args.out:
+        budgets = {"import_s": import_budget, "first_call_s": first_call_budget, "fastmcp_import_s": baseline_s}
+        args.out.write_text(json.dumps({"budgets": budgets, "results": results}, indent=2), encoding="utf-8")
+    for failure in failures:
+        print(f"OVER BUDGET {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
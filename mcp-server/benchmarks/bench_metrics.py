@@ -0,0 +1,61 @@
+"""
+Overhead of the tool instrumentation on the hot path.
+
+Calls get_opportunity_score, state_rank and list_states with and without
+the metrics wrapper (the unwrapped function is reached through
+``__wrapped__``) and reports the added cost per call, plus the raw cost of
+one histogram observation and one counter increment.
+
+    python benchmarks/bench_metrics.py
+"""
+
+import csv
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from metrics import Counter, Histogram  # noqa: E402
+
+CALLS = 200_000
+
+
+def per_call_ns(fn, args_list) -> float:
+    """Return the best of five mean nanoseconds per call over args_list."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        for args in args_list:
+            fn(*args)
+        best = min(best, (time.perf_counter_ns() - start) / len(args_list))
+    return best
+
+
+def main() -> None:
+    with open(server.DEFAULT_CSV_PATH, encoding="utf-8") as f:
+        keys = [tuple(r[:3]) for r in csv.reader(f)][1:]
+    keys = (keys * (CALLS // len(keys) + 1))[:CALLS]
+
+    cases = [
+        ("get_opportunity_score", server.get_opportunity_score, keys),
+        ("state_rank", server.state_rank, keys),
+        ("list_states", server.list_states, [()] * CALLS),
+    ]
+    print(f"{'tool':24}{'bare ns':>10}{'instrumented ns':>18}{'overhead ns':>14}")
+    for name, tool, args_list in cases:
+        tool.__wrapped__(*args_list[0])  # warm the response cache
+        bare = per_call_ns(tool.__wrapped__, args_list)
+        instrumented = per_call_ns(tool, args_list)
+        print(f"{name:24}{bare:>10.0f}{instrumented:>18.0f}{instrumented - bare:>14.0f}")
+
+    histogram = Histogram("bench_seconds", "benchmark", ("tool",))
+    counter = Counter("bench_total", "benchmark", ("tool",))
+    observe = per_call_ns(lambda: histogram.observe(0.0003, "tool"), [()] * CALLS)
+    inc = per_call_ns(lambda: counter.inc("tool"), [()] * CALLS)
+    print(f"\nHistogram.observe: {observe:.0f} ns   Counter.inc: {inc:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
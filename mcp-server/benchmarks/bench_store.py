@@ -0,0 +1,107 @@
+"""
+Memory and lookup benchmark for the columnar score store.
+
+Compares the retained memory and point-lookup cost of ScoreTable against the
+original dict-of-dicts LOOKUP_DATA layout, on the shipped score_lookup.csv
+and on synthetic tables 50x and 100x its size. The label indexes are built
+once per label set and shared by every table, so they are reported
+separately from the per-table cost.
+
+The columnar layout trades lookup speed for memory: a point lookup resolves
+three labels and reads eight column cells instead of copying one prebuilt
+dict, and takes about twice as long.
+
+    python benchmarks/bench_store.py
+"""
+
+import csv
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from score_store import ScoreTable  # noqa: E402
+from synthetic import CORP_TYPES, sample_keys, write_synthetic_csv  # noqa: E402
+
+SHIPPED_CSV = Path(__file__).resolve().parent.parent / "score_lookup.csv"
+
+
+def legacy_load(csv_path: Path) -> dict:
+    """The original dict-of-dicts loader, kept here as the comparison baseline."""
+    lookup = {}
+    with open(csv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            key = (row["state"].lower(), row["corp_type"].lower(), row["emp_size"].lower())
+            lookup[key] = {
+                "state": row["state"],
+                "corp_type": row["corp_type"],
+                "emp_size": row["emp_size"],
+                "score": float(row["score"]),
+                "confidence": row["confidence"],
+                "establishments": int(row["establishments"]),
+                "employees": int(row["employees"]),
+                "avg_salary_thousands": float(row["avg_salary_thousands"]),
+            }
+    return lookup
+
+
+def measure_load(loader, csv_path: Path):
+    """Return (object, retained bytes, peak bytes, seconds) for one load."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = loader(csv_path)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, retained, peak, elapsed
+
+
+def measure_lookups(fn, keys) -> float:
+    """Return mean nanoseconds per lookup."""
+    start = time.perf_counter_ns()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+def run(label: str, csv_path: Path, keys) -> None:
+    legacy, legacy_mem, legacy_peak, legacy_s = measure_load(legacy_load, csv_path)
+    # The first load also builds the label indexes, which later tables with
+    # the same labels (reloads, other vintages) share
+    _, first_mem, _, _ = measure_load(ScoreTable.from_csv, csv_path)
+    table, table_mem, table_peak, table_s = measure_load(ScoreTable.from_csv, csv_path)
+
+    # Each lookup resolves the key and reads all eight fields of the row
+    legacy_ns = measure_lookups(lambda k: dict(legacy[(k[0].lower().strip(), k[1].lower().strip(), k[2].lower().strip())]), keys)
+    table_ns = measure_lookups(lambda k: table.record(table.find(*k)), keys)
+
+    print(f"\n{label}: {len(table):,} rows")
+    print(f"  {'':12}{'retained':>12}{'peak':>12}{'bytes/row':>12}{'load s':>10}{'lookup ns':>12}")
+    for name, mem, peak, secs, ns in (
+        ("dict", legacy_mem, legacy_peak, legacy_s, legacy_ns),
+        ("ScoreTable", table_mem, table_peak, table_s, table_ns),
+    ):
+        print(f"  {name:12}{mem / 1e6:>10.2f}MB{peak / 1e6:>10.2f}MB{mem / len(table):>12.0f}{secs:>10.3f}{ns:>12.0f}")
+    print(f"  memory ratio: {legacy_mem / table_mem:.1f}x smaller per table, "
+          f"plus {(first_mem - table_mem) / 1e6:.2f}MB of label indexes shared across tables")
+    print(f"  lookup ratio: {table_ns / legacy_ns:.1f}x the dict's time per lookup")
+
+
+def main() -> None:
+    with open(SHIPPED_CSV, encoding="utf-8") as f:
+        shipped = [tuple(r[:3]) for r in csv.reader(f)][1:]
+    run("score_lookup.csv", SHIPPED_CSV, (shipped * 20)[:50000])
+
+    per_state = len(CORP_TYPES) * 9
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in (50, 100):
+            rows = len(shipped) * factor
+            path = write_synthetic_csv(Path(tmp) / f"synthetic_{factor}x.csv", rows)
+            run(f"synthetic {factor}x", path, sample_keys(50000, rows // per_state))
+
+
+if __name__ == "__main__":
+    main()
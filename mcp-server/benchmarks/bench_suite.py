@@ -0,0 +1,339 @@
+"""
+Benchmark suite for the server's tool implementations and HTTP transport.
+
+Two layers, both offline:
+
+impl   Microbenchmarks of load_lookup_table and the uncached tool
+       implementations (get_opportunity_score hit and miss, top_states,
+       compare_states, similar_markets and the list tools) against
+       synthetic tables of 2.7k, 100k and 1M rows.
+http   Starts the server with serve.py on a local port (or targets --url)
+       and drives it end to end over the streamable-HTTP MCP transport with
+       fastmcp clients at a configurable concurrency, reporting p50/p95/p99
+       latency and throughput per tool.
+
+Results are written as JSON so two runs can be compared:
+
+    python benchmarks/bench_suite.py impl --out before.json
+    python benchmarks/bench_suite.py http --concurrency 16 --requests 5000 --out before.json
+    python benchmarks/bench_suite.py all --out after.json
+    python benchmarks/bench_suite.py compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+import numpy as np  # noqa: E402
+
+from synthetic import CORP_TYPES, sample_keys, write_synthetic_csv  # noqa: E402
+
+TABLE_SIZES = {"2.7k": 2_700, "100k": 100_000, "1m": 1_000_000}
+
+EMP_SIZES = ["1-4", "5-9", "10-19", "20-49", "50-99", "100-249", "250-499", "500-999", "1000+"]
+
+
+def summarize(samples_ns: list[int], elapsed_s: float | None = None) -> dict:
+    """Latency percentiles in microseconds, plus throughput when elapsed time is given."""
+    a = np.asarray(samples_ns, dtype=np.float64) / 1000
+    summary = {
+        "n": len(a),
+        "mean_us": round(float(a.mean()), 3),
+        "p50_us": round(float(np.percentile(a, 50)), 3),
+        "p95_us": round(float(np.percentile(a, 95)), 3),
+        "p99_us": round(float(np.percentile(a, 99)), 3),
+        "max_us": round(float(a.max()), 3),
+    }
+    if elapsed_s:
+        summary["throughput_per_s"] = round(len(a) / elapsed_s, 1)
+    return summary
+
+
+def time_calls(fn, args_list: list[tuple], warmup: int = 100) -> dict:
+    """Time each call individually and summarize."""
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for args in args_list:
+        t0 = clock()
+        fn(*args)
+        samples.append(clock() - t0)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def run_impl(sizes: list[str], calls: int) -> dict:
+    """Microbenchmark the tool implementations on synthetic tables."""
+    import server
+    from snapshot import build_snapshot, snapshot_path_for
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            rows = TABLE_SIZES[size]
+            csv_path = write_synthetic_csv(Path(tmp) / f"synthetic_{size}.csv", rows)
+            per_state = len(CORP_TYPES) * len(EMP_SIZES)
+            n_states = max(1, rows // per_state)
+            print(f"[impl] {size}: {n_states * per_state:,} rows", file=sys.stderr)
+
+            entry = {"rows": n_states * per_state}
+            start = time.perf_counter()
+            server.load_lookup_table(csv_path)
+            entry["load_csv_s"] = round(time.perf_counter() - start, 4)
+
+            build_snapshot(csv_path)
+            start = time.perf_counter()
+            server.load_lookup_table(csv_path)
+            entry["load_snapshot_s"] = round(time.perf_counter() - start, 4)
+            snapshot_path_for(csv_path).unlink()
+
+            keys = sample_keys(calls, n_states)
+            misses = [(f"Nowhere {i}", c, e) for i, (_, c, e) in enumerate(keys)]
+            groups = [(c, e) for _, c, e in keys]
+            rng = random.Random(3)
+            comparisons = [
+                ([f"State {rng.randrange(n_states):06d}" for _ in range(10)], c, e) for c, e in groups
+            ]
+            n = max(1, calls // 10)
+
+            entry["get_opportunity_score_hit"] = time_calls(server._get_opportunity_score_impl, keys)
+            entry["get_opportunity_score_miss"] = time_calls(server._get_opportunity_score_impl, misses[:n])
+            entry["top_states_10"] = time_calls(server._top_states_impl, [(c, e, 10) for c, e in groups])
+            entry["top_states_100"] = time_calls(server._top_states_impl, [(c, e, 100) for c, e in groups[:n]])
+            entry["compare_states_10"] = time_calls(server._compare_states_impl, comparisons)
+            # Trees are built on a group's first query; build them all before timing
+            for key in {(c, e): (s, c, e) for s, c, e in keys}.values():
+                server._similar_markets_impl(*key)
+            entry["similar_markets_group"] = time_calls(server._similar_markets_impl, keys[:n])
+            entry["similar_markets_all"] = time_calls(
+                server._similar_markets_impl, [(s, c, e, 5, "all") for s, c, e in keys[:n]]
+            )
+            entry["list_states"] = time_calls(server._list_states_impl, [()] * min(n, 1000), warmup=5)
+            entry["list_corp_types"] = time_calls(server._list_corp_types_impl, [()] * n)
+            entry["list_emp_sizes"] = time_calls(server._list_emp_sizes_impl, [()] * n)
+            results[size] = entry
+
+    server.load_lookup_table()
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(
+    port: int, workers: int = 1, cwd: Path = SERVER_DIR, env: dict | None = None
+) -> subprocess.Popen:
+    """Start the server through serve.py and wait until it answers."""
+    cmd = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=cwd, env={**os.environ, **(env or {})})
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("Server did not start within 60 seconds")
+
+
+def http_workload(n: int, seed: int = 11) -> list[tuple[str, dict]]:
+    """A mixed list of tool calls against the shipped table."""
+    import csv
+
+    with open(SERVER_DIR / "score_lookup.csv", encoding="utf-8") as f:
+        keys = [tuple(r[:3]) for r in csv.reader(f)][1:]
+    states = sorted({k[0] for k in keys})
+    rng = random.Random(seed)
+    calls = []
+    for _ in range(n):
+        state, corp_type, emp_size = rng.choice(keys)
+        roll = rng.random()
+        if roll < 0.6:
+            calls.append(("get_opportunity_score", {"state": state, "corp_type": corp_type, "emp_size": emp_size}))
+        elif roll < 0.7:
+            calls.append(("get_opportunity_score", {"state": state + "x", "corp_type": corp_type, "emp_size": emp_size}))
+        elif roll < 0.85:
+            calls.append(("top_states", {"corp_type": corp_type, "emp_size": emp_size, "n": 10}))
+        elif roll < 0.95:
+            calls.append(("compare_states", {"states": rng.sample(states, 5), "corp_type": corp_type, "emp_size": emp_size}))
+        else:
+            calls.append((rng.choice(["list_states", "list_corp_types", "list_emp_sizes"]), {}))
+    return calls
+
+
+async def drive_http(url: str, calls: list[tuple[str, dict]], concurrency: int) -> dict:
+    """Replay calls over streamable HTTP with `concurrency` client sessions."""
+    from fastmcp import Client
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for call in calls:
+        queue.put_nowait(call)
+    samples: dict[str, list[int]] = {}
+    errors = 0
+    connected = 0
+    go = asyncio.Event()
+
+    async def worker():
+        nonlocal errors, connected
+        async with Client(url) as client:
+            # Open every session before timing so connection setup is not measured
+            connected += 1
+            if connected == concurrency:
+                go.set()
+            await go.wait()
+            while True:
+                try:
+                    tool, args = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                t0 = time.perf_counter_ns()
+                try:
+                    await client.call_tool(tool, args)
+                except Exception:
+                    errors += 1
+                    continue
+                samples.setdefault(tool, []).append(time.perf_counter_ns() - t0)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    await go.wait()
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    everything = [s for values in samples.values() for s in values]
+    return {
+        "concurrency": concurrency,
+        "requests": len(calls),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(everything, elapsed),
+        "tools": {tool: summarize(values) for tool, values in sorted(samples.items())},
+    }
+
+
+def run_http(url: str | None, concurrency: int, requests: int, warmup: int, workers: int) -> dict:
+    """End-to-end benchmark over the streamable-HTTP transport."""
+    proc = None
+    if url is None:
+        port = _free_port()
+        proc = start_server(port, workers)
+        url = f"http://127.0.0.1:{port}/mcp"
+    try:
+        calls = http_workload(requests + warmup)
+        if warmup:
+            asyncio.run(drive_http(url, calls[:warmup], concurrency))
+        print(f"[http] {requests} calls at concurrency {concurrency} against {url}", file=sys.stderr)
+        result = asyncio.run(drive_http(url, calls[warmup:], concurrency))
+        result["workers"] = workers
+        return result
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """Flatten nested results to "path.metric" -> value for the latency and throughput fields."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and key.endswith(("_us", "_s", "_per_s")):
+            flat[path] = value
+    return flat
+
+
+def compare(before_path: Path, after_path: Path) -> None:
+    """Print metrics present in both result files with their relative change."""
+    before = _flatten({k: v for k, v in json.loads(before_path.read_text()).items() if k != "meta"})
+    after = _flatten({k: v for k, v in json.loads(after_path.read_text()).items() if k != "meta"})
+    print(f"{'metric':64}{'before':>14}{'after':>14}{'change':>10}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:64}{old:>14.3f}{new:>14.3f}{change:>10}")
+    print("\nLower is better except for throughput_per_s.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("impl", "http", "all"):
+        p = sub.add_parser(name)
+        p.add_argument("--out", type=Path, default=None, help="Write results as JSON")
+        if name in ("impl", "all"):
+            p.add_argument("--sizes", nargs="+", default=list(TABLE_SIZES), choices=list(TABLE_SIZES))
+            p.add_argument("--calls", type=int, default=20_000, help="Calls per implementation benchmark")
+        if name in ("http", "all"):
+            p.add_argument("--url", default=None, help="Benchmark a running server instead of starting one")
+            p.add_argument("--concurrency", type=int, default=8)
+            p.add_argument("--requests", type=int, default=2_000)
+            p.add_argument("--warmup", type=int, default=200)
+            p.add_argument("--workers", type=int, default=1, help="worker processes for the started server")
+    p = sub.add_parser("compare")
+    p.add_argument("before", type=Path)
+    p.add_argument("after", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(args.before, args.after)
+        return
+
+    results = {"meta": metadata()}
+    if args.command in ("impl", "all"):
+        results["impl"] = run_impl(args.sizes, args.calls)
+    if args.command in ("http", "all"):
+        results["http"] = run_http(args.url, args.concurrency, args.requests, args.warmup, args.workers)
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
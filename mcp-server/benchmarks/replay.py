@@ -0,0 +1,276 @@
+"""
+Replay a recorded traffic log against local builds of the server.
+
+Record traffic with serve.py --record traffic.log (or SCORE_TRAFFIC_LOG; see
+recorder.py), then re-drive it here. Each build directory is started with
+its own serve.py and data files on a free local port, and the log is
+replayed in one of two ways:
+
+--speed S        open loop: each call is sent at its recorded offset from
+                 the first call divided by S (1 = the original rate, 10 =
+                 ten times faster), whether or not earlier calls have
+                 finished
+--concurrency N  closed loop: N clients send the calls in recorded order,
+                 each waiting for its previous response
+
+Tool calls go over the MCP streamable HTTP transport and route calls
+(/test, /test/batch, /export) as plain HTTP requests from a thread. The report gives the
+client-side latency percentiles per tool and route next to the server-side
+times in the log, and counts responses whose digest differs from the
+recorded one. With --compare-dir, the same log is replayed against a
+second build and every response is diffed against the first build's,
+listing the fields that changed. The servers and clients all run on this
+machine; nothing needs network access.
+
+In open-loop mode, "lag" is how late the client sent calls against the
+schedule. If it grows to a sizeable share of the latencies, this machine
+cannot drive the requested rate and the results understate the load.
+
+    python benchmarks/replay.py traffic.log
+    python benchmarks/replay.py traffic.log --speed 10 --workers 2
+    git worktree add /tmp/candidate HEAD
+    python benchmarks/replay.py traffic.log --concurrency 16 --compare-dir /tmp/candidate/mcp-server
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import NamedTuple
+
+from bench_suite import SERVER_DIR, _free_port, start_server, summarize
+from recorder import digest, read_log
+
+# Replayed calls are not themselves recorded
+REPLAY_ENV = {"SCORE_TRAFFIC_LOG": ""}
+
+# Differences listed in full per build comparison
+MAX_DIFF_EXAMPLES = 10
+
+
+class Outcome(NamedTuple):
+    latency_ns: int
+    body: bytes | None
+    error: bool
+    lag_ns: int = 0
+
+
+def call_name(entry: dict) -> str:
+    return entry.get("tool") or entry["route"]
+
+
+def fetch(method: str, url: str, body: str | None) -> tuple[bytes, int]:
+    """Make a plain HTTP request; return the body and status."""
+    request = urllib.request.Request(url, data=body.encode("utf-8") if body is not None else None, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.read(), response.status
+    except urllib.error.HTTPError as e:
+        return e.read(), e.code
+
+
+async def send(entry: dict, client, base_url: str) -> Outcome:
+    """Re-issue one recorded call and time it."""
+    start = time.perf_counter_ns()
+    try:
+        if "tool" in entry:
+            result = await client.call_tool(entry["tool"], entry["args"], raise_on_error=False)
+            body = result.content[0].text.encode("utf-8") if result.content else b""
+            payload = result.structured_content
+            error = result.is_error or (isinstance(payload, dict) and "error" in payload)
+        else:
+            query = f"?{entry['query']}" if entry.get("query") else ""
+            body, status = await asyncio.to_thread(
+                fetch, entry["method"], f"{base_url}{entry['route']}{query}", entry.get("body")
+            )
+            error = status >= 400
+    except Exception:
+        return Outcome(time.perf_counter_ns() - start, None, True)
+    return Outcome(time.perf_counter_ns() - start, body, error)
+
+
+async def replay(
+    base_url: str, entries: list[dict], speed: float | None, concurrency: int | None, sessions: int
+) -> tuple[list[Outcome], float]:
+    """Replay the entries at ``speed`` (open loop) or ``concurrency`` (closed loop); return outcomes and seconds."""
+    from fastmcp import Client
+
+    outcomes: list[Outcome | None] = [None] * len(entries)
+    async with AsyncExitStack() as stack:
+        clients = [
+            await stack.enter_async_context(Client(f"{base_url}/mcp", timeout=120))
+            for _ in range(concurrency or sessions)
+        ]
+        start = time.perf_counter()
+
+        if concurrency:
+            pending = iter(enumerate(entries))
+
+            async def worker(client):
+                for i, entry in pending:
+                    outcomes[i] = await send(entry, client, base_url)
+
+            await asyncio.gather(*(worker(client) for client in clients))
+        else:
+            first = entries[0]["ts"]
+            tasks = set()
+
+            async def fire(i: int, entry: dict, due: float):
+                lag_ns = int((time.perf_counter() - due) * 1e9)
+                outcome = await send(entry, clients[i % len(clients)], base_url)
+                outcomes[i] = outcome._replace(lag_ns=lag_ns)
+
+            for i, entry in enumerate(entries):
+                due = start + (entry["ts"] - first) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task = asyncio.create_task(fire(i, entry, due))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+
+        elapsed = time.perf_counter() - start
+    return outcomes, elapsed
+
+
+def run_build(server_dir: Path, entries: list[dict], args) -> tuple[list[Outcome], float]:
+    port = _free_port()
+    proc = start_server(port, args.workers, cwd=server_dir, env=REPLAY_ENV)
+    try:
+        return asyncio.run(replay(f"http://127.0.0.1:{port}", entries, args.speed, args.concurrency, args.sessions))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def build_report(entries: list[dict], outcomes: list[Outcome], elapsed: float) -> dict:
+    """Latency percentiles, errors and changed responses, overall and per tool or route."""
+    groups: dict[str, list[int]] = {}
+    for i, entry in enumerate(entries):
+        groups.setdefault(call_name(entry), []).append(i)
+
+    def section(indexes: list[int], elapsed_s: float | None = None) -> dict:
+        recorded = [i for i in indexes if "hash" in entries[i]]
+        return {
+            "replayed": summarize([outcomes[i].latency_ns for i in indexes], elapsed_s),
+            "recorded": summarize([int(entries[i]["ms"] * 1e6) for i in indexes]),
+            "errors": sum(outcomes[i].error for i in indexes),
+            "changed": sum(
+                outcomes[i].body is None or digest(outcomes[i].body) != entries[i]["hash"] for i in recorded
+            ),
+        }
+
+    overall = section(list(range(len(entries))), elapsed)
+    overall["max_lag_us"] = round(max(o.lag_ns for o in outcomes) / 1000, 3)
+    return {"overall": overall, "by_call": {name: section(indexes) for name, indexes in sorted(groups.items())}}
+
+
+def diff_paths(a, b, ignore: set[str], path: str = "$") -> list[str]:
+    """Return the paths at which two JSON values differ."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return [
+            p
+            for key in dict.fromkeys([*a, *b])
+            if key not in ignore
+            for p in (diff_paths(a[key], b[key], ignore, f"{path}.{key}") if key in a and key in b else [f"{path}.{key}"])
+        ]
+    if isinstance(a, list) and isinstance(b, list):
+        paths = [p for i, (x, y) in enumerate(zip(a, b)) for p in diff_paths(x, y, ignore, f"{path}[{i}]")]
+        if len(a) != len(b):
+            paths.append(f"{path}.length")
+        return paths
+    return [] if a == b else [path]
+
+
+def compare_builds(entries: list[dict], base: list[Outcome], other: list[Outcome], ignore: set[str]) -> dict:
+    """Diff each response from the second build against the first build's."""
+    by_call: dict[str, int] = {}
+    examples = []
+    for i, (a, b) in enumerate(zip(base, other)):
+        if a.body == b.body:
+            continue
+        try:
+            paths = diff_paths(json.loads(a.body), json.loads(b.body), ignore)
+        except (TypeError, ValueError):  # missing or non-JSON bodies (CSV and Arrow exports)
+            paths = ["$"]
+        if not paths:
+            continue
+        name = call_name(entries[i])
+        by_call[name] = by_call.get(name, 0) + 1
+        if len(examples) < MAX_DIFF_EXAMPLES:
+            examples.append({"index": i, "call": name, "args": entries[i].get("args", entries[i].get("query")),
+                             "paths": paths[:10]})
+    return {"differing": sum(by_call.values()), "by_call": by_call, "examples": examples}
+
+
+def print_report(server_dir: Path, report: dict) -> None:
+    overall = report["overall"]
+    replayed = overall["replayed"]
+    print(f"\n{server_dir}: {replayed['n']} calls, {replayed['throughput_per_s']} calls/s, "
+          f"max lag {overall['max_lag_us'] / 1000:.2f} ms")
+    print(f"{'call':24}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+          f"{'rec p50':>9}{'rec p99':>9}{'errors':>8}{'changed':>9}")
+    for name, section in [*report["by_call"].items(), ("all", overall)]:
+        r, rec = section["replayed"], section["recorded"]
+        print(f"{name:24}{r['n']:>7}{r['p50_us'] / 1000:>9.2f}{r['p95_us'] / 1000:>9.2f}{r['p99_us'] / 1000:>9.2f}"
+              f"{r['max_us'] / 1000:>9.2f}{rec['p50_us'] / 1000:>9.2f}{rec['p99_us'] / 1000:>9.2f}"
+              f"{section['errors']:>8}{section['changed']:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", type=Path, help="traffic log written by the recorder")
+    parser.add_argument("--server-dir", type=Path, default=SERVER_DIR, help="build to replay against")
+    parser.add_argument("--compare-dir", type=Path, help="second build to replay against and diff with the first")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=float, default=1.0, help="open loop, at this multiple of the recorded rate")
+    pacing.add_argument("--concurrency", type=int, help="closed loop, with this many clients")
+    parser.add_argument("--sessions", type=int, default=8, help="MCP sessions shared by open-loop calls")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--limit", type=int, help="replay only the first N calls")
+    parser.add_argument("--ignore-field", action="append", default=[], help="field name to leave out of build diffs")
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    entries = read_log(args.log)[:args.limit]
+    if not entries:
+        sys.exit(f"No calls in {args.log}")
+    span = entries[-1]["ts"] - entries[0]["ts"]
+    pacing_text = f"{args.concurrency} clients" if args.concurrency else f"{args.speed:g}x ({span / args.speed:.1f} s)"
+    print(f"[replay] {len(entries)} calls over {span:.1f} s, replayed at {pacing_text}", file=sys.stderr)
+
+    builds = [args.server_dir] + ([args.compare_dir] if args.compare_dir else [])
+    results = {"log": str(args.log), "calls": len(entries), "pacing": pacing_text, "builds": {}}
+    outcomes = []
+    for server_dir in builds:
+        print(f"[replay] {server_dir}", file=sys.stderr)
+        build_outcomes, elapsed = run_build(server_dir, entries, args)
+        outcomes.append(build_outcomes)
+        results["builds"][str(server_dir)] = report = build_report(entries, build_outcomes, elapsed)
+        print_report(server_dir, report)
+
+    if args.compare_dir:
+        results["diff"] = diff = compare_builds(entries, outcomes[0], outcomes[1], set(args.ignore_field))
+        print(f"\nresponses differing between builds: {diff['differing']} of {len(entries)}")
+        for name, count in sorted(diff["by_call"].items()):
+            print(f"  {name:22}{count:>7}")
+        for example in diff["examples"]:
+            print(f"  #{example['index']} {example['call']} {json.dumps(example['args'], sort_keys=True)}: "
+                  f"{', '.join(example['paths'])}")
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
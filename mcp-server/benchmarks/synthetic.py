@@ -0,0 +1,52 @@
+"""
+Synthetic score tables for benchmarking.
+
+Tables are generated with numbered synthetic states ("State 000001", ...)
+crossed with the real corporation types and size bands, so that every
+(state, corp_type, emp_size) combination is unique, with random column
+values in realistic ranges.
+"""
+
+import csv
+import random
+from pathlib import Path
+
+from score_store import EMP_SIZE_ORDER
+
+CORP_TYPES = ["c-corp", "government", "nonprofit", "other", "partnership", "s-corp", "sole-proprietor"]
+
+HEADER = ["state", "corp_type", "emp_size", "score", "confidence",
+          "establishments", "employees", "avg_salary_thousands"]
+
+
+def write_synthetic_csv(path: Path, rows: int, seed: int = 42) -> Path:
+    """Write a score_lookup.csv-shaped file with roughly `rows` rows."""
+    rng = random.Random(seed)
+    per_state = len(CORP_TYPES) * len(EMP_SIZE_ORDER)
+    n_states = max(1, rows // per_state)
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for s in range(n_states):
+            state = f"State {s:06d}"
+            for corp_type in CORP_TYPES:
+                for emp_size in EMP_SIZE_ORDER:
+                    establishments = rng.randint(1, 150000)
+                    confidence = "high" if establishments >= 1000 else "medium" if establishments >= 100 else "low"
+                    writer.writerow([
+                        state, corp_type, emp_size,
+                        round(rng.uniform(0, 100), 1), confidence,
+                        establishments, establishments * rng.randint(1, 40),
+                        rng.uniform(15, 250),
+                    ])
+    return path
+
+
+def sample_keys(n: int, n_states: int, seed: int = 7) -> list[tuple[str, str, str]]:
+    """Return `n` random (state, corp_type, emp_size) keys present in a synthetic table."""
+    rng = random.Random(seed)
+    return [
+        (f"State {rng.randrange(n_states):06d}", rng.choice(CORP_TYPES), rng.choice(EMP_SIZE_ORDER))
+        for _ in range(n)
+    ]
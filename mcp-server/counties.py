@@ -0,0 +1,219 @@
+"""
+County-level scores, sharded by state and loaded on demand.
+
+County data is about 3,100 counties x 7 corporation types x 9 size bands,
+roughly 200k rows per vintage. Keeping it resident would slow startup and
+grow every worker, and only a few states are usually asked about. So it is
+compiled into one binary snapshot per state plus a small index:
+
+    counties/
+        index.json          states -> shard file, county count, rows, and the
+                            county-to-state rollups for every group
+        texas.snapshot      one ScoreTable per state whose "state" axis holds
+        ...                 that state's counties
+
+The index is read once and stays resident. A shard is memory-mapped the
+first time a request asks about one of its counties and evicted under a
+memory budget (see partitions.py). State-level tools never touch it.
+
+Build the shards from a county-level score CSV, which has the columns of
+score_lookup.csv plus a county column:
+
+    python counties.py county_scores.csv [--out counties] [--year 2022]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from label_index import county_index, state_index
+from partitions import PartitionStore
+from score_store import ScoreTable
+from snapshot import load_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+DEFAULT_COUNTY_DIR = Path(__file__).parent / "counties"
+
+# Columns of a county shard, in score_lookup.csv order; "state" holds the county
+SHARD_COLUMNS = [
+    "state", "corp_type", "emp_size", "score", "confidence",
+    "establishments", "employees", "avg_salary_thousands", "payroll_momentum", "score_method",
+]
+
+# Shard columns a county score file may leave out
+OPTIONAL_SHARD_COLUMNS = {"payroll_momentum", "score_method"}
+
+
+class CountyError(Exception):
+    """Raised for a malformed county score file."""
+
+
+def shard_name(state: str) -> str:
+    """File name of a state's shard ("New York" -> "new-york.snapshot")."""
+    return re.sub(r"[^a-z0-9]+", "-", state.lower()).strip("-") + ".snapshot"
+
+
+def load_shard(path: Path) -> ScoreTable:
+    """Memory-map a state's shard, with county-name resolution on its state axis."""
+    table = load_snapshot(path, lazy_labels=True)
+    table.state_labels = county_index(table.states)
+    return table
+
+
+def rollup(table: ScoreTable) -> dict[str, dict]:
+    """Roll one state's counties up to per-group state totals.
+
+    Keys are "corp_type|emp_size". Salaries are weighted by employees and
+    scores by establishments.
+    """
+    n_sizes = len(table.emp_sizes)
+    n_groups = len(table.corp_types) * n_sizes
+    group = table.corp_code.astype(np.int64) * n_sizes + table.size_code
+    establishments = table.establishments.astype(np.float64)
+    employees = table.employees.astype(np.float64)
+
+    counties = np.bincount(group, minlength=n_groups)
+    total_establishments = np.bincount(group, establishments, n_groups)
+    total_employees = np.bincount(group, employees, n_groups)
+    salary = np.bincount(group, table.avg_salary_thousands * employees, n_groups)
+    score = np.bincount(group, table.score * establishments, n_groups)
+
+    result = {}
+    for g in np.flatnonzero(counties).tolist():
+        key = f"{table.corp_types[g // n_sizes]}|{table.emp_sizes[g % n_sizes]}"
+        result[key] = {
+            "counties": int(counties[g]),
+            "establishments": int(total_establishments[g]),
+            "employees": int(total_employees[g]),
+            "avg_salary_thousands": round(salary[g] / total_employees[g], 2) if total_employees[g] else 0.0,
+            "establishment_weighted_score": round(score[g] / total_establishments[g], 1) if total_establishments[g] else None,
+        }
+    return result
+
+
+def build_county_shards(csv_path: Path, out_dir: Path, year: int | None = None) -> dict:
+    """Split a county score CSV into per-state snapshots and write the index."""
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise CountyError(f"{csv_path} is empty")
+        missing = [c for c in ("county", *SHARD_COLUMNS) if c not in header and c not in OPTIONAL_SHARD_COLUMNS]
+        if missing:
+            raise CountyError(f"{csv_path} is missing columns: {', '.join(missing)}")
+        col = {name: i for i, name in enumerate(header)}
+        # The county takes the place of the state in each shard
+        take = [col["county"]] + [col[c] for c in SHARD_COLUMNS[1:] if c in col]
+        shard_header = [c for c in SHARD_COLUMNS if c == "state" or c in col]
+
+        by_state: dict[str, list[list[str]]] = {}
+        for row in reader:
+            by_state.setdefault(row[col["state"]], []).append([row[i] for i in take])
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    states = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for state, rows in sorted(by_state.items()):
+            shard_csv = Path(tmp) / "shard.csv"
+            with open(shard_csv, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(shard_header)
+                writer.writerows(rows)
+            table = ScoreTable.from_csv(shard_csv)
+            problems = table.validate()
+            if problems:
+                raise CountyError(f"County rows for {state} are invalid: {'; '.join(problems)}")
+            write_snapshot(table, out_dir / shard_name(state))
+            states[state] = {
+                "file": shard_name(state),
+                "counties": len(table.states),
+                "rows": len(table),
+                "rollup": rollup(table),
+            }
+
+    index = {"format_version": INDEX_FORMAT_VERSION, "year": year, "states": states}
+    tmp_path = out_dir / f"index.json.{os.getpid()}.tmp"
+    tmp_path.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, out_dir / "index.json")
+    return index
+
+
+class CountyStore(PartitionStore):
+    """Per-state county shards behind a small resident index."""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        super().__init__(load_shard, max_bytes)
+        self.directory = directory
+        self.index: dict | None = None
+        self.state_labels = state_index(())
+        self.reload_index()
+
+    def reload_index(self) -> None:
+        """Read index.json, or record that no county data is installed."""
+        self.clear()
+        try:
+            index = json.loads((self.directory / "index.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self.index = None
+            return
+        except ValueError as e:
+            logger.warning("Ignoring unreadable county index: %s", e)
+            self.index = None
+            return
+        if index.get("format_version") != INDEX_FORMAT_VERSION:
+            logger.warning("Ignoring county index with unsupported format %s", index.get("format_version"))
+            self.index = None
+            return
+        self.index = index
+        self.state_labels = state_index(tuple(index["states"]))
+
+    @property
+    def available(self) -> bool:
+        return self.index is not None
+
+    @property
+    def year(self) -> int | None:
+        return self.index.get("year") if self.index is not None else None
+
+    def resolve_state(self, state: str) -> str | None:
+        """Return the canonical name of a state that has county data, or None."""
+        code = self.state_labels.resolve(state)
+        return self.state_labels.labels[code] if code is not None else None
+
+    def state_info(self, state: str) -> dict | None:
+        """Return a state's index entry (file, counts and rollups), or None."""
+        return self.index["states"].get(state) if self.index is not None else None
+
+    def path_for(self, state: str) -> Path | None:
+        info = self.state_info(state)
+        return self.directory / info["file"] if info is not None else None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Shard a county-level score CSV by state.")
+    parser.add_argument("csv", type=Path, help="County scores: score_lookup.csv columns plus county")
+    parser.add_argument("--out", type=Path, default=DEFAULT_COUNTY_DIR, help="Output directory (default: counties/)")
+    parser.add_argument("--year", type=int, default=None, help="CBP year of the data")
+    args = parser.parse_args(argv)
+
+    try:
+        index = build_county_shards(args.csv, args.out, args.year)
+    except CountyError as e:
+        sys.exit(str(e))
+    rows = sum(s["rows"] for s in index["states"].values())
+    print(f"Wrote {len(index['states'])} state shards ({rows:,} county rows) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
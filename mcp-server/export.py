@@ -0,0 +1,309 @@
+"""
+Streaming bulk export of the score table.
+
+Rows are selected with vectorized filters over fixed-size row chunks and
+encoded one chunk at a time as NDJSON, CSV or Arrow IPC, so an export never
+holds more than one chunk of encoded output regardless of table size. Rows
+are emitted in table order, which is stable for a data version; an opaque
+cursor records where a partial export stopped so it can be resumed.
+
+Arrow output needs ``pyarrow``. It is listed in requirements.txt, but a
+server without it still serves NDJSON and CSV and refuses Arrow exports.
+"""
+
+import base64
+import csv
+import functools
+import hashlib
+import io
+import json
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from score_store import ScoreTable
+
+EXPORT_FIELDS = [
+    "state", "corp_type", "emp_size", "score", "confidence",
+    "establishments", "employees", "avg_salary_thousands",
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Rows filtered and encoded per step
+CHUNK_ROWS = 8192
+
+# End-of-stream marker for the Arrow IPC streaming format
+_ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+class ExportError(Exception):
+    """Raised for an unsupported format or an invalid or stale cursor."""
+
+
+class RowFilter:
+    """Vectorized row predicate over one table.
+
+    Each code argument is a collection of category codes to keep, or None
+    to keep every value.
+    """
+
+    def __init__(
+        self,
+        table: ScoreTable,
+        state_codes=None,
+        corp_codes=None,
+        size_codes=None,
+        confidence_codes=None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+    ):
+        self.table = table
+        self.min_score = min_score
+        self.max_score = max_score
+        self._allowed = []
+        spec = []
+        for column, labels, codes in (
+            (table.state_code, table.states, state_codes),
+            (table.corp_code, table.corp_types, corp_codes),
+            (table.size_code, table.emp_sizes, size_codes),
+            (table.confidence_code, table.confidence_levels, confidence_codes),
+        ):
+            if codes is None:
+                spec.append(None)
+                continue
+            allowed = np.zeros(len(labels), dtype=bool)
+            allowed[list(codes)] = True
+            self._allowed.append((column, allowed))
+            spec.append(sorted(set(codes)))
+        spec += [min_score, max_score]
+        self.digest = hashlib.blake2b(json.dumps(spec).encode(), digest_size=6).hexdigest()
+
+    def mask(self, start: int, stop: int) -> np.ndarray:
+        """Return the match mask for rows [start, stop)."""
+        keep = np.ones(stop - start, dtype=bool)
+        for column, allowed in self._allowed:
+            keep &= allowed[column[start:stop]]
+        if self.min_score is not None:
+            keep &= self.table.score[start:stop] >= self.min_score
+        if self.max_score is not None:
+            keep &= self.table.score[start:stop] <= self.max_score
+        return keep
+
+    def count(self, start: int = 0) -> int:
+        """Count matching rows at or after ``start``."""
+        n = len(self.table)
+        return sum(int(np.count_nonzero(self.mask(a, min(a + CHUNK_ROWS, n)))) for a in range(start, n, CHUNK_ROWS))
+
+    def nth_match(self, start: int, k: int) -> int:
+        """Return the row of the k-th (0-based) match at or after ``start``, or len(table)."""
+        n = len(self.table)
+        for a in range(start, n, CHUNK_ROWS):
+            hits = np.flatnonzero(self.mask(a, min(a + CHUNK_ROWS, n)))
+            if k < len(hits):
+                return a + int(hits[k])
+            k -= len(hits)
+        return n
+
+    def chunks(self, start: int, stop: int, chunk_rows: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+        """Yield the matching row offsets in [start, stop), one chunk at a time."""
+        for a in range(start, stop, chunk_rows):
+            rows = a + np.flatnonzero(self.mask(a, min(a + chunk_rows, stop)))
+            if len(rows):
+                yield rows
+
+
+def encode_cursor(table: ScoreTable, row_filter: RowFilter, row: int, offset: int, total: int) -> str:
+    """Return an opaque token for resuming an export at ``row``.
+
+    ``offset`` is the number of matching rows delivered before it and
+    ``total`` the number of matching rows overall, so later pages need not
+    count them again.
+    """
+    state = {"v": table.version, "f": row_filter.digest, "r": row, "o": offset, "t": total}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, table: ScoreTable, row_filter: RowFilter) -> tuple[int, int, int]:
+    """Return (row, offset, total) from a cursor, checking it belongs to this table and filter."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        row, offset, total = int(state["r"]), int(state["o"]), int(state["t"])
+    except (ValueError, KeyError, TypeError):
+        raise ExportError("Invalid cursor") from None
+    if state.get("v") != table.version:
+        raise ExportError(
+            f"Cursor was issued for data version {state.get('v')}, but {table.version} is now loaded. "
+            "Restart the export."
+        )
+    if state.get("f") != row_filter.digest:
+        raise ExportError("Cursor was issued for different filters")
+    if not 0 <= row <= len(table) or not 0 <= offset <= total <= len(table):
+        raise ExportError("Invalid cursor")
+    return row, offset, total
+
+
+def _columns(table: ScoreTable, rows: np.ndarray) -> list[list]:
+    """Gather the export fields for a chunk of rows as Python lists."""
+    return [
+        [table.states[i] for i in table.state_code[rows].tolist()],
+        [table.corp_types[i] for i in table.corp_code[rows].tolist()],
+        [table.emp_sizes[i] for i in table.size_code[rows].tolist()],
+        table.score[rows].tolist(),
+        [table.confidence_levels[i] for i in table.confidence_code[rows].tolist()],
+        table.establishments[rows].tolist(),
+        table.employees[rows].tolist(),
+        table.avg_salary_thousands[rows].tolist(),
+    ]
+
+
+def records(table: ScoreTable, rows: np.ndarray) -> list[list]:
+    """Return a chunk of rows as value lists in EXPORT_FIELDS order."""
+    return [list(r) for r in zip(*_columns(table, rows))]
+
+
+def ndjson_chunks(table: ScoreTable, chunks: Iterator[np.ndarray]) -> Iterator[bytes]:
+    """Encode row chunks as newline-delimited JSON objects."""
+    # Labels are JSON-encoded once; numbers use repr, which matches json.dumps
+    labels = [
+        [json.dumps(v, ensure_ascii=False) for v in values]
+        for values in (table.states, table.corp_types, table.emp_sizes, table.confidence_levels)
+    ]
+    states, corp_types, emp_sizes, confidence = labels
+    for rows in chunks:
+        lines = [
+            f'{{"state":{states[s]},"corp_type":{corp_types[c]},"emp_size":{emp_sizes[e]},"score":{score!r},'
+            f'"confidence":{confidence[k]},"establishments":{est},"employees":{emp},"avg_salary_thousands":{sal!r}}}\n'
+            for s, c, e, score, k, est, emp, sal in zip(
+                table.state_code[rows].tolist(),
+                table.corp_code[rows].tolist(),
+                table.size_code[rows].tolist(),
+                table.score[rows].tolist(),
+                table.confidence_code[rows].tolist(),
+                table.establishments[rows].tolist(),
+                table.employees[rows].tolist(),
+                table.avg_salary_thousands[rows].tolist(),
+            )
+        ]
+        yield "".join(lines).encode("utf-8")
+
+
+def csv_chunks(table: ScoreTable, chunks: Iterator[np.ndarray], header: bool = True) -> Iterator[bytes]:
+    """Encode row chunks as CSV, optionally preceded by a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue().encode("utf-8")
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(*_columns(table, rows)))
+        yield buffer.getvalue().encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def _pyarrow():
+    """Import pyarrow on first Arrow export (it is slow to import), or None if missing."""
+    try:
+        import pyarrow
+    except ImportError:  # Optional: Arrow exports are unavailable
+        return None
+    return pyarrow
+
+
+def arrow_schema():
+    """Return the Arrow schema for exported rows."""
+    pa = _pyarrow()
+    return pa.schema([
+        ("state", pa.string()),
+        ("corp_type", pa.string()),
+        ("emp_size", pa.string()),
+        ("score", pa.float64()),
+        ("confidence", pa.string()),
+        ("establishments", pa.int64()),
+        ("employees", pa.int64()),
+        ("avg_salary_thousands", pa.float64()),
+    ])
+
+
+def arrow_chunks(table: ScoreTable, chunks: Iterator[np.ndarray]) -> Iterator[bytes]:
+    """Encode row chunks as an Arrow IPC stream, one record batch per chunk."""
+    pa = _pyarrow()
+    if pa is None:
+        raise ExportError("Arrow export requires the pyarrow package")
+    schema = arrow_schema()
+    label_arrays = [
+        np.asarray(values, dtype=object)
+        for values in (table.states, table.corp_types, table.emp_sizes, table.confidence_levels)
+    ]
+    states, corp_types, emp_sizes, confidence = label_arrays
+
+    yield schema.serialize().to_pybytes()
+    for rows in chunks:
+        batch = pa.record_batch([
+            pa.array(states[table.state_code[rows]], type=pa.string()),
+            pa.array(corp_types[table.corp_code[rows]], type=pa.string()),
+            pa.array(emp_sizes[table.size_code[rows]], type=pa.string()),
+            pa.array(table.score[rows]),
+            pa.array(confidence[table.confidence_code[rows]], type=pa.string()),
+            pa.array(table.establishments[rows]),
+            pa.array(table.employees[rows]),
+            pa.array(table.avg_salary_thousands[rows]),
+        ], schema=schema)
+        yield batch.serialize().to_pybytes()
+    yield _ARROW_EOS
+
+
+def encode_chunks(fmt: str, table: ScoreTable, chunks: Iterator[np.ndarray], header: bool = True) -> Iterator[bytes]:
+    """Encode row chunks in the named format ("ndjson", "csv" or "arrow")."""
+    if fmt == "ndjson":
+        return ndjson_chunks(table, chunks)
+    if fmt == "csv":
+        return csv_chunks(table, chunks, header)
+    if fmt == "arrow":
+        if _pyarrow() is None:
+            raise ExportError("Arrow export requires the pyarrow package")
+        return arrow_chunks(table, chunks)
+    raise ExportError(f"Unsupported format '{fmt}'. Use one of: {', '.join(MEDIA_TYPES)}")
+
+
+class ExportPlan(NamedTuple):
+    """The row range an export covers and how to resume after it."""
+
+    start: int
+    stop: int
+    offset: int
+    total: int
+    next_cursor: str | None
+
+
+def plan_export(
+    table: ScoreTable,
+    row_filter: RowFilter,
+    cursor: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> ExportPlan:
+    """Work out which rows an export covers.
+
+    An export resumes from ``cursor`` when given, otherwise it skips the first
+    ``offset`` matching rows. With a ``limit``, ``next_cursor`` marks where
+    the following page starts (None once the export is complete). Matching
+    rows are counted on the first page only; the total travels in the cursor.
+    """
+    if cursor:
+        start, offset, total = decode_cursor(cursor, table, row_filter)
+    else:
+        start = row_filter.nth_match(0, offset) if offset else 0
+        total = row_filter.count()
+
+    stop = len(table) if limit is None else row_filter.nth_match(start, limit)
+    next_cursor = None
+    if stop < len(table):
+        next_cursor = encode_cursor(table, row_filter, stop, offset + limit, total)
+    return ExportPlan(start, stop, offset, total, next_cursor)
@@ -0,0 +1,362 @@
+"""
+Incremental ingestion of Census County Business Patterns extracts into
+score_lookup.csv, without R.
+
+This reproduces the cleaning and feature steps of model.R in Python:
+
+1. Stream each extract chunk by chunk, keeping only "Total for all sectors"
+   (NAICS 00) state rows, dropping the "All establishments" aggregates,
+   territories and suppressed values, and stripping thousands separators.
+2. Map the CBP corporation type and employee size labels to the server's
+   codes with the same pattern chain as model.R.
+3. Score each (corp_type, emp_size) group with model.R's weighted formula
+   (group min-max normalized salary and log-establishments, capped payroll
+   momentum) and write the lookup format, including payroll_momentum and
+   score_method ("formula").
+
+Work is incremental. Each input file's cleaned rows are cached under a state
+directory with the file's fingerprint, so unchanged files are not re-read,
+and only groups whose inputs changed are re-scored; the others are copied
+from the previous output, as long as that file is the one the last run
+wrote. Refresh time therefore tracks how much data changed, not how large
+the extracts are.
+
+The published model.R score is a random forest fitted to the formula score.
+That fit cannot be reproduced without R, so this pipeline writes the formula
+score itself, and marks it as such in the score_method column.
+
+    python ingest.py census.csv [more.csv ...] [--out score_lookup.csv] [--year 2022] [--snapshot]
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+import numpy as np
+
+from score_store import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Positional columns of the CBP extract, as renamed by model.R
+CENSUS_COLUMNS = [
+    "state", "naics_code", "naics_label", "corp_type",
+    "emp_size", "year", "establishments", "annual_payroll",
+    "q1_payroll", "employees",
+]
+
+EXCLUDED_AREAS = {
+    "American Samoa", "Guam", "Puerto Rico", "United States Virgin Islands",
+    "Commonwealth of the Northern Mariana Islands",
+}
+
+# Substring -> code, checked in order like model.R's case_when(str_detect(...)) chains
+EMP_SIZE_PATTERNS = [
+    ("less than 5", "1-4"), ("5 to 9", "5-9"), ("10 to 19", "10-19"), ("20 to 49", "20-49"),
+    ("50 to 99", "50-99"), ("100 to 249", "100-249"), ("250 to 499", "250-499"),
+    ("500 to 999", "500-999"), ("1,000", "1000+"),
+]
+
+CORP_TYPE_PATTERNS = [
+    ("C-corp", "c-corp"), ("S-corp", "s-corp"), ("Individual", "sole-proprietor"),
+    ("Partner", "partnership"), ("Non-profit", "nonprofit"), ("Government", "government"),
+    ("Other noncorp", "other"),
+]
+
+OUTPUT_COLUMNS = [
+    "state", "corp_type", "emp_size", "score", "confidence",
+    "establishments", "employees", "avg_salary_thousands", "payroll_momentum", "score_method",
+]
+
+# Recorded in each output row so the server can describe how scores were made
+SCORE_METHOD = "formula"
+
+# Same weights and momentum cap as model.R
+SCORE_WEIGHTS = (0.4, 0.35, 0.25)
+MOMENTUM_CAP = 1.5
+
+CHUNK_ROWS = 100_000
+
+# Bump when cleaning rules change so cached cleaned rows are rebuilt
+CLEANING_VERSION = 1
+
+
+class CleanRow(NamedTuple):
+    """One state-level CBP row after cleaning and label mapping."""
+
+    state: str
+    corp_type: str
+    emp_size: str
+    year: str
+    establishments: float
+    annual_payroll: float
+    q1_payroll: float
+    employees: float
+
+
+@lru_cache(maxsize=None)
+def map_emp_size(label: str) -> str:
+    """Map a CBP employee size label to its band code."""
+    for pattern, code in EMP_SIZE_PATTERNS:
+        if pattern in label:
+            return code
+    return label
+
+
+@lru_cache(maxsize=None)
+def map_corp_type(label: str) -> str:
+    """Map a CBP legal form of organization label to its corp_type code."""
+    for pattern, code in CORP_TYPE_PATTERNS:
+        if pattern in label:
+            return code
+    return label.replace(" ", "-").lower()
+
+
+def _number(value: str) -> float | None:
+    """Parse a CBP count, or None for blanks and suppression flags."""
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def clean_rows(rows: Iterable[list[str]]) -> Iterator[CleanRow]:
+    """Apply model.R's filters and label mapping to raw extract rows."""
+    for row in rows:
+        if len(row) < len(CENSUS_COLUMNS):
+            continue
+        state, naics, _, corp_type, emp_size, year, establishments, payroll, q1_payroll, employees = row[:10]
+        # NAICS first: it drops the bulk of an all-industry extract
+        if naics != "00" or corp_type == "All establishments" or emp_size == "All establishments":
+            continue
+        if state in EXCLUDED_AREAS:
+            continue
+        payroll, q1_payroll = _number(payroll), _number(q1_payroll)
+        establishments, employees = _number(establishments), _number(employees)
+        if payroll is None or employees is None or employees <= 0:
+            continue
+        # model.R drops rows whose features are NA or NaN (0/0 momentum)
+        if establishments is None or q1_payroll is None or (payroll == 0 and q1_payroll == 0):
+            continue
+        yield CleanRow(
+            state, map_corp_type(corp_type), map_emp_size(emp_size), year,
+            establishments, payroll, q1_payroll, employees,
+        )
+
+
+def read_census_file(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[list[CleanRow]]:
+    """Stream an extract, yielding the cleaned rows of each chunk."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        while True:
+            chunk = list(itertools.islice(reader, chunk_rows))
+            if not chunk:
+                break
+            yield list(clean_rows(chunk))
+
+
+def _fingerprint(path: Path, previous: dict | None) -> dict:
+    """Describe a file, reusing the previous digest when size and mtime are unchanged."""
+    stat = path.stat()
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+
+
+def _cache_path(state_dir: Path, path: Path) -> Path:
+    name = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:16]
+    return state_dir / f"{name}.clean.csv"
+
+
+def _load_cleaned(cache: Path) -> list[CleanRow]:
+    with open(cache, "r", encoding="utf-8", newline="") as f:
+        return [
+            CleanRow(r[0], r[1], r[2], r[3], *map(float, r[4:]))
+            for r in csv.reader(f)
+        ]
+
+
+def _save_cleaned(cache: Path, rows: list[CleanRow]) -> None:
+    tmp = cache.with_name(cache.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    os.replace(tmp, cache)
+
+
+def score_group(rows: list[CleanRow]) -> list[list]:
+    """Score one (corp_type, emp_size) group with model.R's formula, as output rows."""
+    establishments = np.array([r.establishments for r in rows])
+    employees = np.array([r.employees for r in rows])
+    payroll = np.array([r.annual_payroll for r in rows])
+    q1_payroll = np.array([r.q1_payroll for r in rows])
+
+    avg_salary = payroll / employees
+    with np.errstate(divide="ignore"):
+        momentum = q1_payroll * 4 / payroll
+    log_estab = np.log(establishments + 1)
+
+    salary_score = (avg_salary - avg_salary.min()) / (avg_salary.max() - avg_salary.min() + 0.01)
+    momentum_score = np.minimum(momentum, MOMENTUM_CAP) / MOMENTUM_CAP
+    density_score = (log_estab - log_estab.min()) / (log_estab.max() - log_estab.min() + 0.01)
+    w_salary, w_momentum, w_density = SCORE_WEIGHTS
+    score = np.clip(np.round((salary_score * w_salary + momentum_score * w_momentum + density_score * w_density) * 100, 1), 0, 100)
+
+    output = []
+    for r, s, salary, m in zip(rows, score.tolist(), avg_salary.tolist(), momentum.tolist()):
+        confidence = "high" if r.establishments >= 1000 else "medium" if r.establishments >= 100 else "low"
+        output.append([
+            r.state, r.corp_type, r.emp_size, s, confidence,
+            int(r.establishments), int(r.employees), salary, m, SCORE_METHOD,
+        ])
+    return output
+
+
+def _group_digest(rows: list[CleanRow]) -> str:
+    digest = hashlib.sha256()
+    for r in sorted(rows):
+        digest.update(repr(tuple(r)).encode())
+    return digest.hexdigest()
+
+
+def _read_previous_output(output: Path) -> dict[tuple[str, str], list[list[str]]]:
+    """Group the formula-scored rows of an existing lookup file by (corp_type, emp_size).
+
+    model.R writes the same columns, so groups holding any row scored
+    another way (random_forest) are left out and get re-scored; copying them
+    forward would mix score methods in one file.
+    """
+    groups: dict[tuple[str, str], list[list[str]]] = {}
+    if not output.exists():
+        return groups
+    method = OUTPUT_COLUMNS.index("score_method")
+    other_method = set()
+    with open(output, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != OUTPUT_COLUMNS:
+            return {}
+        for row in reader:
+            key = (row[1], row[2])
+            groups.setdefault(key, []).append(row)
+            if row[method] != SCORE_METHOD:
+                other_method.add(key)
+    return {key: rows for key, rows in groups.items() if key not in other_method}
+
+
+def ingest(
+    inputs: list[Path],
+    output: Path,
+    state_dir: Path | None = None,
+    year: str | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> dict:
+    """Refresh a lookup file from CBP extracts, redoing only what changed.
+
+    Returns a summary of the files re-read and the groups re-scored.
+    """
+    state_dir = state_dir or output.parent / ".ingest"
+    state_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = state_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    if manifest.get("cleaning_version") != CLEANING_VERSION:
+        manifest = {}
+    previous_files = manifest.get("files", {})
+
+    files, reread, records = {}, [], {}
+    for path in inputs:
+        key = str(path.resolve())
+        fingerprint = _fingerprint(path, previous_files.get(key))
+        cache = _cache_path(state_dir, path)
+        previous = previous_files.get(key)
+        if previous and previous.get("sha256") == fingerprint["sha256"] and cache.exists():
+            rows = _load_cleaned(cache)
+        else:
+            logger.info("Reading %s", path)
+            rows = [r for chunk in read_census_file(path, chunk_rows) for r in chunk]
+            _save_cleaned(cache, rows)
+            reread.append(str(path))
+        files[key] = fingerprint
+        for r in rows:
+            # Later files override earlier ones for the same key
+            records[(r.state, r.corp_type, r.emp_size, r.year)] = r
+
+    years = sorted({k[3] for k in records})
+    if not years:
+        raise ValueError("No usable state-level NAICS 00 rows found in the input files")
+    year = year or years[-1]
+    if year not in years:
+        raise ValueError(f"Year {year} not found in the input files (available: {', '.join(years)})")
+
+    groups: dict[tuple[str, str], list[CleanRow]] = {}
+    for r in records.values():
+        if r.year == year:
+            groups.setdefault((r.corp_type, r.emp_size), []).append(r)
+
+    previous_digests = manifest.get("groups", {}) if manifest.get("year") == year else {}
+    if previous_digests and (not output.exists() or file_sha256(output) != manifest.get("output_sha256")):
+        # The output was rewritten since the last run (e.g. by model.R)
+        previous_digests = {}
+    previous_rows = _read_previous_output(output) if previous_digests else {}
+    digests, rescored, output_rows = {}, [], []
+    for (corp_type, emp_size), rows in sorted(groups.items()):
+        name = f"{corp_type}|{emp_size}"
+        digests[name] = _group_digest(rows)
+        kept = previous_rows.get((corp_type, emp_size))
+        if kept and previous_digests.get(name) == digests[name]:
+            output_rows += kept
+        else:
+            output_rows += score_group(rows)
+            rescored.append(name)
+
+    changed = bool(rescored) or set(digests) != set(previous_digests) or not output.exists()
+    if changed:
+        output_rows.sort(key=lambda row: (row[0], row[1], row[2]))
+        tmp = output.with_name(output.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(OUTPUT_COLUMNS)
+            writer.writerows(output_rows)
+        os.replace(tmp, output)
+
+    manifest = {
+        "cleaning_version": CLEANING_VERSION, "year": year, "files": files, "groups": digests,
+        "output_sha256": file_sha256(output),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=1))
+    return {
+        "output": str(output),
+        "year": year,
+        "rows": len(output_rows),
+        "files_reread": reread,
+        "groups_rescored": len(rescored),
+        "groups_total": len(digests),
+        "written": changed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build score_lookup.csv from Census CBP extracts.")
+    parser.add_argument("inputs", nargs="*", type=Path, default=[Path("census.csv")], help="CBP extract CSV files")
+    parser.add_argument("--out", type=Path, default=Path(__file__).parent / "score_lookup.csv")
+    parser.add_argument("--state-dir", type=Path, default=None, help="Cache directory (default: .ingest next to --out)")
+    parser.add_argument("--year", default=None, help="Vintage to score (default: latest in the inputs)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--snapshot", action="store_true", help="Also rebuild the binary snapshot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = ingest(args.inputs, args.out, args.state_dir, args.year, args.chunk_rows)
+    if args.snapshot and summary["written"]:
+        from snapshot import build_snapshot
+        summary["snapshot"] = str(build_snapshot(args.out))
+    json.dump(summary, sys.stdout, indent=2)
+    print()
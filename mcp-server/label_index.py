@@ -0,0 +1,296 @@
+"""
+Input normalization and suggestion index for state, corporation type and
+employee size labels.
+
+Callers rarely send the exact labels in score_lookup.csv: "CA", "new york ",
+"C Corp" and "10 to 19" are all common. A LabelIndex is built once per table
+and maps every accepted spelling (canonical labels, abbreviations, FIPS codes
+and aliases) to a category code with a single dict lookup. Misspellings fall
+through to a precomputed deletion index (symmetric-delete spelling
+correction) that returns ranked suggestions without scanning every label.
+
+The deletion index is several times larger than a score table's columns, so
+the state, corporation type and size indexes are shared by every table with
+the same labels: reloads and other vintages reuse the one already built.
+"""
+
+import functools
+import re
+import threading
+from collections import OrderedDict
+
+# Postal abbreviation and FIPS code for each state-level area in the CBP data
+STATE_CODES = {
+    "Alabama": ("AL", "01"), "Alaska": ("AK", "02"), "Arizona": ("AZ", "04"),
+    "Arkansas": ("AR", "05"), "California": ("CA", "06"), "Colorado": ("CO", "08"),
+    "Connecticut": ("CT", "09"), "Delaware": ("DE", "10"), "District of Columbia": ("DC", "11"),
+    "Florida": ("FL", "12"), "Georgia": ("GA", "13"), "Hawaii": ("HI", "15"),
+    "Idaho": ("ID", "16"), "Illinois": ("IL", "17"), "Indiana": ("IN", "18"),
+    "Iowa": ("IA", "19"), "Kansas": ("KS", "20"), "Kentucky": ("KY", "21"),
+    "Louisiana": ("LA", "22"), "Maine": ("ME", "23"), "Maryland": ("MD", "24"),
+    "Massachusetts": ("MA", "25"), "Michigan": ("MI", "26"), "Minnesota": ("MN", "27"),
+    "Mississippi": ("MS", "28"), "Missouri": ("MO", "29"), "Montana": ("MT", "30"),
+    "Nebraska": ("NE", "31"), "Nevada": ("NV", "32"), "New Hampshire": ("NH", "33"),
+    "New Jersey": ("NJ", "34"), "New Mexico": ("NM", "35"), "New York": ("NY", "36"),
+    "North Carolina": ("NC", "37"), "North Dakota": ("ND", "38"), "Ohio": ("OH", "39"),
+    "Oklahoma": ("OK", "40"), "Oregon": ("OR", "41"), "Pennsylvania": ("PA", "42"),
+    "Rhode Island": ("RI", "44"), "South Carolina": ("SC", "45"), "South Dakota": ("SD", "46"),
+    "Tennessee": ("TN", "47"), "Texas": ("TX", "48"), "Utah": ("UT", "49"),
+    "Vermont": ("VT", "50"), "Virginia": ("VA", "51"), "Washington": ("WA", "53"),
+    "West Virginia": ("WV", "54"), "Wisconsin": ("WI", "55"), "Wyoming": ("WY", "56"),
+    "Puerto Rico": ("PR", "72"),
+}
+
+STATE_ALIASES = {
+    "District of Columbia": ["Washington DC", "Washington D.C.", "D.C."],
+}
+
+# Common spellings, including the original CBP "legal form of organization" labels
+CORP_TYPE_ALIASES = {
+    "c-corp": ["C corporation", "C-corporations", "corporation", "corp",
+               "C-corporations and other corporate legal forms of organization"],
+    "s-corp": ["S corporation", "S-corporations"],
+    "sole-proprietor": ["sole proprietorship", "sole prop", "proprietorship", "proprietor",
+                        "individual", "individual proprietorship", "individual proprietorships"],
+    "partnership": ["partnerships", "general partnership", "limited partnership", "LP", "LLP"],
+    "nonprofit": ["non profit", "not for profit", "nonprofit organization",
+                  "non-profit organizations", "501c3", "501(c)(3)"],
+    "government": ["govt", "gov", "public sector", "government entity"],
+    "other": ["other noncorporate", "other noncorporate legal forms of organization"],
+}
+
+EMP_SIZE_ALIASES = {
+    "1-4": ["less than 5", "fewer than 5", "under 5", "establishments with less than 5 employees"],
+    "1000+": ["1000 or more", "1000 plus", "over 1000", "more than 999",
+              "establishments with 1,000 employees or more"],
+}
+
+# Inclusive employee ranges for numeric size inputs ("15" -> "10-19")
+_SIZE_RANGE = re.compile(r"^(\d+)-(\d+)$")
+
+# County-equivalent suffixes that may be left off ("Harris County" -> "Harris")
+_COUNTY_SUFFIX = re.compile(r"\s+(County|Parish|Borough|City and Borough|Census Area|Municipality|city)$")
+
+# Longest key matched at the full edit distance (every canonical label fits)
+_MAX_FUZZY_KEY = 20
+
+_DASHES = re.compile(r"\s*[-‐-―]+\s*")
+_SEPARATORS = re.compile(r"[\s_.,()']+")
+_NON_DIGIT_DASH = re.compile(r"(?<!\d)-|-(?!\d)")
+
+
+def label_key(value: str) -> str:
+    """Reduce a label to its matching key.
+
+    Case, whitespace, punctuation and hyphens are ignored, except hyphens
+    between digits, which separate the bounds of a size band.
+    """
+    key = _DASHES.sub("-", value.lower().strip())
+    key = _SEPARATORS.sub("", key)
+    return _NON_DIGIT_DASH.sub("", key)
+
+
+def _deletes(key: str, distance: int) -> set[str]:
+    """Return every string reachable from key by deleting up to `distance` characters."""
+    results = {key}
+    frontier = {key}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions)."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class LabelIndex:
+    """Resolve user input to a category code, or suggest the closest labels.
+
+    The suggestion index is built up front, so the first misspelling costs
+    no more than later ones. With ``lazy`` it is built on the first miss
+    instead, for indexes that are built often and rarely asked for
+    suggestions (county shards).
+    """
+
+    def __init__(self, labels: tuple[str, ...], aliases: dict[str, list[str]] | None = None,
+                 max_distance: int = 2, cache_size: int = 4096, lazy: bool = False):
+        self.labels = labels
+        self.max_distance = max_distance
+        self._cache_size = cache_size
+        self._suggestions: OrderedDict[str, list[str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.codes: dict[str, int] = {}
+        for code, label in enumerate(labels):
+            self.codes[label_key(label)] = code
+        for label, spellings in (aliases or {}).items():
+            code = self.codes.get(label_key(label))
+            if code is None:
+                continue
+            for spelling in spellings:
+                self.codes.setdefault(label_key(spelling), code)
+
+        # Raw input -> code memo, seeded with the canonical spellings so exact
+        # hits skip key normalization entirely (ScoreTable.find reads it directly)
+        self.resolved: dict[str, int | None] = {}
+        for code, label in enumerate(labels):
+            self.resolved[label] = self.resolved[label.lower()] = code
+
+        # Symmetric-delete index for suggestions
+        self._variants: dict[str, str | list[str]] | None = None if lazy else self._build_variants()
+
+    def _build_variants(self) -> dict[str, str | list[str]]:
+        """Map each deletion variant to the key it came from.
+
+        Most variants come from a single key, which is stored as is; a list
+        is only allocated for variants shared by several keys. Purely numeric
+        keys (FIPS codes, employee counts) are not fuzzy-matched.
+        """
+        variants: dict[str, str | list[str]] = {}
+        for key in self.codes:
+            if key.isdigit():
+                continue
+            for variant in _deletes(key, self._distance_for(key)):
+                found = variants.get(variant)
+                if found is None:
+                    variants[variant] = key
+                elif isinstance(found, str):
+                    variants[variant] = [found, key]
+                else:
+                    found.append(key)
+        return variants
+
+    def _distance_for(self, key: str) -> int:
+        # Short keys (postal codes, FIPS codes) only tolerate one edit, and so
+        # do long spelled-out aliases: two deletions of a 50-character key
+        # add over a thousand variants to the index
+        if 4 < len(key) <= _MAX_FUZZY_KEY:
+            return self.max_distance
+        return min(1, self.max_distance)
+
+    def resolve(self, value: str) -> int | None:
+        """Return the category code for a spelling, or None if it is not recognized."""
+        try:
+            return self.resolved[value]
+        except KeyError:
+            pass
+        code = self.codes.get(label_key(value))
+        if len(self.resolved) >= self._cache_size:
+            self.resolved.clear()
+        self.resolved[value] = code
+        return code
+
+    def suggest(self, value: str, limit: int = 3) -> list[str]:
+        """Return up to `limit` canonical labels closest to a misspelled value."""
+        key = label_key(value)
+        with self._lock:
+            cached = self._suggestions.get(key)
+            if cached is not None:
+                self._suggestions.move_to_end(key)
+                return cached[:limit]
+
+        variants = self._variants
+        if variants is None:
+            variants = self._variants = self._build_variants()
+
+        distance = self._distance_for(key)
+        best: dict[int, int] = {}
+        for variant in _deletes(key, distance):
+            candidates = variants.get(variant, ())
+            if isinstance(candidates, str):
+                candidates = (candidates,)
+            for candidate in candidates:
+                d = edit_distance(key, candidate)
+                if d <= max(distance, self._distance_for(candidate)):
+                    code = self.codes[candidate]
+                    if d < best.get(code, d + 1):
+                        best[code] = d
+        ranked = [self.labels[code] for code, _ in sorted(best.items(), key=lambda kv: (kv[1], kv[0]))]
+
+        with self._lock:
+            self._suggestions[key] = ranked
+            if len(self._suggestions) > self._cache_size:
+                self._suggestions.popitem(last=False)
+        return ranked[:limit]
+
+
+def _shared(build):
+    """Reuse an eagerly built index for every table with the same labels.
+
+    Lazy indexes are cheap to build, and county shards would otherwise push
+    the shared ones out of the cache, so they are built fresh each time.
+    """
+    cached = functools.lru_cache(maxsize=32)(build)
+
+    @functools.wraps(build)
+    def get(labels: tuple[str, ...], lazy: bool = False) -> LabelIndex:
+        return build(labels, lazy=True) if lazy else cached(labels)
+
+    return get
+
+
+@_shared
+def state_index(states: tuple[str, ...], lazy: bool = False) -> LabelIndex:
+    """Return the shared index for state names, postal abbreviations and FIPS codes."""
+    aliases = {}
+    for state in states:
+        spellings = list(STATE_ALIASES.get(state, []))
+        if state in STATE_CODES:
+            abbreviation, fips = STATE_CODES[state]
+            spellings += [abbreviation, fips, str(int(fips))]
+        aliases[state] = spellings
+    return LabelIndex(states, aliases, lazy=lazy)
+
+
+@_shared
+def corp_type_index(corp_types: tuple[str, ...], lazy: bool = False) -> LabelIndex:
+    """Return the shared index for corporation type codes and their common names."""
+    return LabelIndex(corp_types, CORP_TYPE_ALIASES, lazy=lazy)
+
+
+@_shared
+def emp_size_index(emp_sizes: tuple[str, ...], lazy: bool = False) -> LabelIndex:
+    """Return the shared index for employee size bands.
+
+    Besides the band codes, "10 to 19", "10-19 employees" and plain employee
+    counts such as "15" resolve to the band that contains them.
+    """
+    aliases = {size: list(EMP_SIZE_ALIASES.get(size, [])) for size in emp_sizes}
+    for size in emp_sizes:
+        match = _SIZE_RANGE.match(size)
+        if match:
+            low, high = match.groups()
+            aliases[size] += [f"{low} to {high}", f"{low}-{high} employees", f"{low} to {high} employees",
+                              f"establishments with {low} to {high} employees"]
+            if int(high) - int(low) < 1000:
+                aliases[size] += [str(n) for n in range(int(low), int(high) + 1)]
+        elif size.endswith("+"):
+            aliases[size] += [size[:-1], f"{size[:-1]} plus", f"{size[:-1]} employees or more"]
+    return LabelIndex(emp_sizes, aliases, lazy=lazy)
+
+
+def county_index(counties: tuple[str, ...]) -> LabelIndex:
+    """Build the index for one state's county names.
+
+    Names also resolve without their "County", "Parish", "Borough" or similar
+    suffix, unless that short form is shared by two counties in the state
+    (e.g. Baltimore County and Baltimore city).
+    """
+    short = {county: _COUNTY_SUFFIX.sub("", county) for county in counties}
+    counts: dict[str, int] = {}
+    for name in short.values():
+        counts[label_key(name)] = counts.get(label_key(name), 0) + 1
+    aliases = {county: [name] for county, name in short.items() if name != county and counts[label_key(name)] == 1}
+    # Shards are loaded per request; most never see a misspelled county
+    return LabelIndex(counties, aliases, lazy=True)
@@ -0,0 +1,340 @@
+"""
+Nearest-neighbour search over per-row market features.
+
+Each row of the lookup table is described by five features:
+
+    score                        published opportunity score
+    avg_salary_thousands         average annual salary
+    establishments               establishment count
+    employees                    employee count
+    employees_per_establishment  employees / establishments (0 when there are none)
+
+Before indexing, features are standardized over the rows being searched:
+the row's own (corp_type, emp_size) group, or the whole table. The options
+are z-scores, min-max scaling, or z-scores of log1p-transformed counts
+(the default). With the last one, a few very large states do not dominate
+the count features.
+
+The standardized points are indexed by a KD-tree. One tree serves every
+Minkowski distance, and a query visits only the leaves that could still
+hold one of the k nearest rows. Trees are built on first use per
+(features, standardization, scope) and kept with LRU eviction. scipy's
+cKDTree is used when scipy is installed; otherwise a NumPy implementation
+with the same results is used.
+"""
+
+import functools
+import math
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+from score_store import ScoreTable
+
+FEATURES = ["score", "avg_salary_thousands", "establishments", "employees", "employees_per_establishment"]
+
+# Heavy-tailed counts, log1p-transformed by the log_zscore standardization
+COUNT_FEATURES = {"establishments", "employees", "employees_per_establishment"}
+
+# Distance name -> Minkowski p
+DISTANCES = {"euclidean": 2.0, "manhattan": 1.0, "chebyshev": math.inf}
+
+STANDARDIZATIONS = ["log_zscore", "zscore", "minmax", "none"]
+
+SCOPES = ["group", "all"]
+
+# Leaves are scanned with one vectorized pass, so they can be fairly large
+LEAF_SIZE = 128
+
+
+class NeighborError(Exception):
+    """Raised for an unknown feature, distance, standardization or scope."""
+
+
+class Neighbors(NamedTuple):
+    """The nearest rows to a query row, closest first, excluding the row itself."""
+
+    features: tuple[str, ...]
+    rows: list[int]
+    distances: list[float]
+
+
+def feature_matrix(table: ScoreTable) -> np.ndarray:
+    """Return one row per table row, one column per entry of FEATURES."""
+    establishments = table.establishments.astype(np.float64)
+    employees = table.employees.astype(np.float64)
+    per_establishment = np.divide(
+        employees, establishments, out=np.zeros(len(table)), where=establishments > 0
+    )
+    matrix = np.column_stack([table.score, table.avg_salary_thousands, establishments, employees, per_establishment])
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _power_norm(diff: np.ndarray, p: float) -> np.ndarray:
+    """Minkowski norm along the last axis, raised to the power p (the max norm for p=inf)."""
+    if p == 2.0:
+        return np.einsum("...i,...i->...", diff, diff)
+    if p == 1.0:
+        return np.abs(diff).sum(axis=-1)
+    return np.abs(diff).max(axis=-1)
+
+
+def _root(value, p: float):
+    """Undo _power_norm's power."""
+    return np.sqrt(value) if p == 2.0 else value
+
+
+class KDTree:
+    """Static KD-tree over the rows of a point matrix.
+
+    Points are reordered so that every node covers one contiguous slice,
+    split at the median of its widest dimension until at most leaf_size
+    points remain. A query descends depth-first into the nearer child and
+    visits the farther one only if its lower bound can still beat the
+    current k-th nearest point. The bound is updated one coordinate at a
+    time (Arya and Mount), so internal nodes cost a few float operations
+    and only leaves touch NumPy.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        points = np.asarray(points, dtype=np.float64)
+        order = np.arange(len(points), dtype=np.intp)
+        starts, ends, children, split_dims, split_values = [], [], [], [], []
+
+        pending = [(0, len(points), -1, 0)]
+        while pending:
+            start, end, parent, side = pending.pop()
+            node = len(starts)
+            if parent >= 0:
+                children[parent][side] = node
+            starts.append(start)
+            ends.append(end)
+            children.append(None)
+            split_dims.append(0)
+            split_values.append(0.0)
+            if end - start <= leaf_size:
+                continue
+
+            block = points[order[start:end]]
+            spread = block.max(axis=0) - block.min(axis=0)
+            dim = int(np.argmax(spread))
+            if spread[dim] == 0:
+                continue
+            mid = (end - start) // 2
+            part = np.argpartition(block[:, dim], mid)
+            order[start:end] = order[start:end][part]
+            children[node] = [-1, -1]
+            split_dims[node] = dim
+            split_values[node] = float(block[part[mid], dim])
+            pending.append((start, start + mid, node, 0))
+            pending.append((start + mid, end, node, 1))
+
+        self.points = points[order]
+        self.index = order
+        self._starts, self._ends, self._children = starts, ends, children
+        self._split_dims, self._split_values = split_dims, split_values
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def query(self, point: np.ndarray, k: int, p: float = 2.0) -> tuple[np.ndarray, np.ndarray]:
+        """Return (distances, point indices) of the k nearest points, closest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+
+        points, starts, ends, children = self.points, self._starts, self._ends, self._children
+        split_dims, split_values = self._split_dims, self._split_values
+        coords = point.tolist()
+        best_d = np.full(k, np.inf)
+        best_i = np.full(k, -1, dtype=np.intp)
+        worst = math.inf
+
+        if p == 2.0:
+            def bound(offsets, total, dim, offset):
+                return total - offsets[dim] ** 2 + offset * offset
+        elif p == 1.0:
+            def bound(offsets, total, dim, offset):
+                return total - offsets[dim] + offset
+        else:
+            def bound(offsets, total, dim, offset):
+                return max(max(offsets[:dim] + offsets[dim + 1:], default=0.0), offset)
+
+        def visit(node, offsets, total):
+            nonlocal best_d, best_i, worst
+            split = children[node]
+            if split is None:
+                start, end = starts[node], ends[node]
+                d = _power_norm(points[start:end] - point, p)
+                if d.min() < worst:
+                    d = np.concatenate([best_d, d])
+                    i = np.concatenate([best_i, np.arange(start, end)])
+                    keep = np.argpartition(d, k - 1)[:k]
+                    best_d, best_i = d[keep], i[keep]
+                    worst = float(best_d.max())
+                return
+            dim = split_dims[node]
+            diff = coords[dim] - split_values[node]
+            near, far = (split[0], split[1]) if diff < 0 else (split[1], split[0])
+            visit(near, offsets, total)
+            offset = abs(diff)
+            far_total = bound(offsets, total, dim, offset)
+            if far_total < worst:
+                saved = offsets[dim]
+                offsets[dim] = offset
+                visit(far, offsets, far_total)
+                offsets[dim] = saved
+
+        visit(0, [0.0] * len(coords), 0.0)
+
+        found = best_i >= 0
+        best_d, best_i = _root(best_d[found], p), self.index[best_i[found]]
+        order = np.lexsort((best_i, best_d))
+        return best_d[order], best_i[order]
+
+
+@functools.lru_cache(maxsize=None)
+def _ckdtree():
+    """Import scipy's cKDTree on the first tree build (scipy is slow to import), or None."""
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:  # Optional: fall back to the NumPy KD-tree above
+        return None
+    return cKDTree
+
+
+class _ScipyKDTree:
+    """cKDTree behind the KDTree query interface."""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self._tree = _ckdtree()(points, leafsize=leaf_size)
+
+    def __len__(self) -> int:
+        return self._tree.n
+
+    def query(self, point: np.ndarray, k: int, p: float = 2.0) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        d, i = self._tree.query(point, k=[*range(1, k + 1)], p=p)
+        order = np.lexsort((i, d))
+        return d[order], i[order].astype(np.intp)
+
+
+class _Space(NamedTuple):
+    """Standardized points for one search scope and the tree indexing them."""
+
+    rows: np.ndarray
+    shift: np.ndarray
+    scale: np.ndarray
+    log_columns: np.ndarray
+    tree: "KDTree | _ScipyKDTree"
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        values = np.where(self.log_columns, np.log1p(features), features)
+        return (values - self.shift) / self.scale
+
+
+class NeighborIndex:
+    """KD-tree search over one table's feature vectors."""
+
+    def __init__(self, table: ScoreTable, max_entries: int = 128):
+        self.table = table
+        self.max_entries = max_entries
+        self.features = feature_matrix(table)
+        self.group = table.corp_code.astype(np.int64) * len(table.emp_sizes) + table.size_code
+        self._spaces: OrderedDict[tuple, _Space] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve_features(self, features: list[str] | None) -> tuple[str, ...]:
+        """Validate a feature selection; None selects every feature."""
+        if not features:
+            return tuple(FEATURES)
+        unknown = [f for f in features if f not in FEATURES]
+        if unknown:
+            raise NeighborError(f"Unknown feature '{unknown[0]}'. Use: {', '.join(FEATURES)}.")
+        return tuple(dict.fromkeys(features))
+
+    def _space(self, features: tuple[str, ...], standardize: str, group: int | None) -> _Space:
+        """Return the standardized, indexed points for a scope, building them on first use."""
+        key = (features, standardize, group)
+        with self._lock:
+            space = self._spaces.get(key)
+            if space is not None:
+                self._spaces.move_to_end(key)
+                return space
+
+        table = self.table
+        if group is None:
+            rows = np.arange(len(table), dtype=np.intp)
+        else:
+            rows = table.ranked_rows[table.group_bounds[group]:table.group_bounds[group + 1]].astype(np.intp)
+
+        columns = [FEATURES.index(f) for f in features]
+        log_columns = np.array([standardize == "log_zscore" and f in COUNT_FEATURES for f in features])
+        values = self.features[np.ix_(rows, columns)]
+        values = np.where(log_columns, np.log1p(values), values)
+
+        if standardize in ("zscore", "log_zscore"):
+            shift, scale = values.mean(axis=0), values.std(axis=0)
+        elif standardize == "minmax":
+            shift, scale = values.min(axis=0), np.ptp(values, axis=0)
+        else:
+            shift, scale = np.zeros(len(columns)), np.ones(len(columns))
+        # Constant features carry no information; keep them from dividing by zero
+        scale = np.where(scale > 0, scale, 1.0)
+
+        points = (values - shift) / scale
+        tree = (_ScipyKDTree if _ckdtree() is not None else KDTree)(points)
+        space = _Space(rows, shift, scale, log_columns, tree)
+        with self._lock:
+            self._spaces[key] = space
+            while len(self._spaces) > self.max_entries:
+                self._spaces.popitem(last=False)
+        return space
+
+    def query(
+        self,
+        row: int,
+        k: int,
+        scope: str = "group",
+        distance: str = "euclidean",
+        standardize: str = "log_zscore",
+        features: list[str] | None = None,
+    ) -> Neighbors:
+        """Return the k rows nearest to ``row``, excluding the row itself."""
+        if scope not in SCOPES:
+            raise NeighborError(f"Unknown scope '{scope}'. Use: {', '.join(SCOPES)}.")
+        if distance not in DISTANCES:
+            raise NeighborError(f"Unknown distance '{distance}'. Use: {', '.join(DISTANCES)}.")
+        if standardize not in STANDARDIZATIONS:
+            raise NeighborError(f"Unknown standardization '{standardize}'. Use: {', '.join(STANDARDIZATIONS)}.")
+        selected = self.resolve_features(features)
+
+        space = self._space(selected, standardize, int(self.group[row]) if scope == "group" else None)
+        point = space.transform(self.features[row, [FEATURES.index(f) for f in selected]])
+        # One extra so the query row itself can be dropped
+        d, positions = space.tree.query(point, k + 1, DISTANCES[distance])
+        rows = space.rows[positions]
+        keep = rows != row
+        return Neighbors(selected, rows[keep][:k].tolist(), d[keep][:k].tolist())
+
+    def warm(self, scope: str = "group", standardize: str = "log_zscore") -> int:
+        """Build the trees that default queries in a scope use; return how many were built.
+
+        Stops early rather than evict trees once the cache is full.
+        """
+        groups = [None] if scope == "all" else np.unique(self.group).tolist()
+        built = 0
+        for group in groups[:self.max_entries]:
+            self._space(tuple(FEATURES), standardize, group)
+            built += 1
+        return built
+
+    def stats(self) -> dict:
+        """Return the number of cached trees."""
+        with self._lock:
+            return {"entries": len(self._spaces), "max_entries": self.max_entries}
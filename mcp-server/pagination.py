@@ -0,0 +1,61 @@
+"""
+Opaque cursors for paging through ranked and listed tool results.
+
+A cursor records the data version, a digest of the normalized query and the
+offset of the next item. It is accepted only for the same query against the
+same data version, so pages never mix two tables or two queries. Tools cap
+the page size on the server; a client asking for more gets a full page and a
+next_cursor to continue from.
+"""
+
+import base64
+import hashlib
+import json
+from typing import Hashable, NamedTuple
+
+
+class CursorError(Exception):
+    """Raised for a malformed cursor, or one issued for another query or data version."""
+
+
+class Page(NamedTuple):
+    """The slice of results a page covers and the cursor for the next one (None on the last)."""
+
+    start: int
+    stop: int
+    next_cursor: str | None
+
+
+def query_digest(key: Hashable) -> str:
+    """Short digest of a normalized query key."""
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def encode_cursor(version: str, key: Hashable, offset: int) -> str:
+    state = {"v": version, "q": query_digest(key), "o": offset}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, version: str, key: Hashable) -> int:
+    """Return the offset a cursor resumes from, checking it belongs to this query and version."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        offset = int(state["o"])
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("Invalid cursor") from None
+    if state.get("v") != version:
+        raise CursorError(
+            f"Cursor was issued for data version {state.get('v')}, but {version} is now loaded. "
+            "Start again without a cursor."
+        )
+    if state.get("q") != query_digest(key) or offset < 0:
+        raise CursorError("Cursor was issued for a different query")
+    return offset
+
+
+def plan_page(total: int, page_size: int, cursor: str | None, version: str, key: Hashable) -> Page:
+    """Return the page of ``total`` results that ``cursor`` (or None, the first page) selects."""
+    start = decode_cursor(cursor, version, key) if cursor else 0
+    start = min(start, total)
+    stop = min(start + page_size, total)
+    return Page(start, stop, encode_cursor(version, key, stop) if stop < total else None)
@@ -0,0 +1,92 @@
+"""
+Score tables partitioned on disk and loaded on demand.
+
+Some data is too large, or too rarely used, to keep resident: other data
+years (vintages.py) and county-level shards (counties.py). A PartitionStore
+loads a partition's table the first time a request asks for it and keeps
+loaded partitions in an LRU map. Once they exceed the memory budget, the
+least recently used ones are dropped. Requests already holding a dropped
+table keep using it until they finish. Snapshots are memory-mapped, so their
+pages are shared with other workers and can be reclaimed by the OS.
+"""
+
+import abc
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable
+
+from score_store import ScoreTable
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionStore(abc.ABC):
+    """Lazily loaded, memory-bounded score tables keyed by partition.
+
+    Subclasses map a key to its file with ``path_for``.
+    """
+
+    def __init__(self, load: Callable[[Path], ScoreTable], max_bytes: int):
+        self.max_bytes = max_bytes
+        self._load = load
+        self._tables: OrderedDict[Hashable, ScoreTable] = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes loads so concurrent first requests for a partition read it once
+        self._load_lock = threading.Lock()
+        self.current_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @abc.abstractmethod
+    def path_for(self, key: Hashable) -> Path | None:
+        """Return the file holding a partition, or None if there is none."""
+
+    def get(self, key: Hashable) -> ScoreTable | None:
+        """Return a partition's table, loading it on first use, or None if there is none."""
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        path = self.path_for(key)
+        if path is None:
+            return None
+
+        with self._load_lock:
+            with self._lock:
+                table = self._tables.get(key)
+            if table is not None:
+                return table
+            table = self._load(path)
+            logger.info("Loaded partition %s (%d rows, %d bytes)", key, len(table), table.nbytes)
+
+            with self._lock:
+                self.loads += 1
+                self._tables[key] = table
+                self.current_bytes += table.nbytes
+                # Always keep the table just loaded, even if it alone exceeds the budget
+                while self.current_bytes > self.max_bytes and len(self._tables) > 1:
+                    _, evicted = self._tables.popitem(last=False)
+                    self.current_bytes -= evicted.nbytes
+                    self.evictions += 1
+        return table
+
+    def clear(self) -> None:
+        """Drop every loaded partition, e.g. after the files on disk changed."""
+        with self._lock:
+            self._tables.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Return loaded partitions and memory use."""
+        with self._lock:
+            return {
+                "loaded": sorted(self._tables),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,62 @@
+"""
+Response profiles: how much of a tool response to send.
+
+    verbose    the full response (the default)
+    compact    leaves out what is the same in every response: the methodology
+               block (published once as the score://methodology resource),
+               score interpretations (the bands are in that resource),
+               explanatory notes and summaries, and null fields. Caveats
+               that depend on the data go in a "warnings" list, which is
+               always kept
+    columnar   compact, with each list of records sent as one "fields" header
+               plus a list of value rows, the layout get_opportunity_scores
+               already uses for its results
+
+For LLM clients every byte is latency and tokens: a compact
+get_opportunity_score response is about half the size of the verbose one,
+and a columnar top_states page about half as well.
+Error responses are always sent in full, since their text is the point.
+"""
+
+FORMATS = ["verbose", "compact", "columnar"]
+
+# Keys whose values are constant text, or derivable from the score
+CONSTANT_KEYS = frozenset({"methodology", "interpretation", "note", "summary"})
+
+METHODOLOGY_URI = "score://methodology"
+
+
+def format_error(fmt: str) -> dict:
+    return {"error": f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}."}
+
+
+def _compact(value):
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items() if k not in CONSTANT_KEYS and v is not None}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def _columnar(value):
+    if isinstance(value, dict):
+        return {k: _columnar(v) for k, v in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(v, dict) for v in value):
+            fields = list(dict.fromkeys(k for record in value for k in record))
+            return {"fields": fields, "rows": [[_columnar(record.get(f)) for f in fields] for record in value]}
+        return [_columnar(v) for v in value]
+    return value
+
+
+def shape(payload: dict, fmt: str) -> dict:
+    """Return a tool response in the given profile (see FORMATS)."""
+    if fmt == "verbose" or "error" in payload:
+        return payload
+    if fmt not in FORMATS:
+        return format_error(fmt)
+    compact = _compact(payload)
+    if "methodology" in payload:
+        year = payload.get("year")
+        compact["methodology_uri"] = f"{METHODOLOGY_URI}/{year}" if year is not None else METHODOLOGY_URI
+    return compact if fmt == "compact" else _columnar(compact)
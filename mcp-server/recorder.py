@@ -0,0 +1,143 @@
+"""
+Opt-in traffic recording for offline replay.
+
+Each tool call (and each call to the /test, /test/batch and /export routes)
+is written as one JSON line to an append-only log:
+
+    {"ts": 1760000000.123, "tool": "top_states", "args": {...}, "ms": 1.84,
+     "bytes": 1321, "hash": "9f2c4e1a0b7d3c55", "v": "4b42953ef9b3"}
+
+Route entries have "route", "method", "query" and, for POST, "body" in
+place of "tool" and "args", plus the response "status". "ts" is when the
+call started, "ms" how long the server took to answer it, "hash" a digest
+of the response body and "v" the data version loaded at the time. Calls
+that returned an error payload are marked "err": 1. Each process starts
+its section of the log with a header line, which readers skip.
+
+The request path only hands the entry to a bounded queue. A background
+thread serializes the entries and appends them in batches with one write
+each, so several workers can share a log file. When the queue is full, or
+the log has reached its size limit, entries are dropped and counted
+rather than slowing requests down.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = 1
+
+# Entries written per write() call at most
+BATCH_ENTRIES = 512
+
+_STOP = object()
+
+
+def digest(body: bytes) -> str:
+    """Short digest of a response body, for spotting changed responses."""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+class TrafficRecorder:
+    """Append entries to a traffic log from a background thread."""
+
+    def __init__(self, path: Path, max_queue: int = 10000, max_bytes: int | None = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.recorded = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._full = False
+        header = {"log": "score-traffic", "format": LOG_FORMAT, "pid": os.getpid(), "started": round(time.time(), 3)}
+        self._write([header])
+        self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, entry: dict) -> None:
+        """Queue an entry for writing; drop it if the recorder is behind or the log is full."""
+        if self._full:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_ENTRIES:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            entries = batch[:-1] if stop else batch
+            if entries:
+                try:
+                    written = self._write(entries)
+                except (OSError, TypeError, ValueError):
+                    logger.exception("Could not write %d traffic log entries", len(entries))
+                    written = False
+                if written:
+                    self.recorded += len(entries)
+                else:
+                    self.dropped += len(entries)
+            if stop:
+                return
+
+    def _write(self, entries: list[dict]) -> bool:
+        """Append entries in one write; return False if the log is at its size limit."""
+        data = "".join(
+            json.dumps(entry, separators=(",", ":"), sort_keys=True, default=str) + "\n" for entry in entries
+        ).encode("utf-8")
+        if self.max_bytes is not None and self._size + len(data) > self.max_bytes:
+            self._full = True
+            return False
+        os.write(self._fd, data)
+        self._size += len(data)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write the queued entries and close the log."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        os.close(self._fd)
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "bytes": self._size,
+            "full": self._full,
+        }
+
+
+def read_log(path: Path) -> list[dict]:
+    """Return a traffic log's entries in start-time order, skipping headers.
+
+    A torn last line (the server stopped mid-write) is ignored.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "tool" in entry or "route" in entry:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries
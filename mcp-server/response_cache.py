@@ -0,0 +1,104 @@
+"""
+Bounded cache of serialized tool responses.
+
+Tool responses are deterministic for a given data version, so the server
+caches each one as ready-to-send JSON bytes alongside the response dict,
+keyed by the tool name, the normalized arguments and the data version.
+Entries are evicted least-recently-used once the cache exceeds its memory
+budget.
+"""
+
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple
+
+
+class CachedResponse(NamedTuple):
+    """A response dict and its JSON encoding. Treat both as read-only.
+
+    ``renderings`` holds transport-specific forms of the same response (such
+    as an MCP tool result), filled in lazily by the caller.
+    """
+
+    payload: dict
+    body: bytes
+    renderings: dict
+
+
+def encode_response(payload: dict) -> CachedResponse:
+    """Serialize a response dict the same way starlette's JSONResponse does."""
+    body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return CachedResponse(payload, body, {})
+
+
+def _deep_sizeof(obj) -> int:
+    """Approximate the memory held by a tree of dicts, lists and scalars."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(v) for v in obj)
+    return size
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of CachedResponse objects with a byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[CachedResponse, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        """Return a cached response and mark it recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, response: CachedResponse) -> None:
+        """Store a response, evicting least-recently-used entries to stay in budget."""
+        # The body is counted twice to cover a decoded text rendering
+        size = 2 * len(response.body) + _deep_sizeof(response.payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (response, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,342 @@
+"""
+Columnar score store for the Business Opportunity Score MCP server.
+
+The lookup table is held column-wise: states, corporation types and employee
+size bands are interned to small integer codes, numeric fields live in typed
+NumPy arrays, and a dense (state_code, corp_code, size_code) -> row offset
+cube answers point lookups without hashing tuples of strings.
+
+A ScoreTable is never mutated after construction, so it can be shared freely
+between concurrent tool calls.
+"""
+
+import csv
+import hashlib
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from label_index import LabelIndex, corp_type_index, emp_size_index, state_index
+
+# Canonical ordering for employee size bands (smallest to largest)
+EMP_SIZE_ORDER = ["1-4", "5-9", "10-19", "20-49", "50-99", "100-249", "250-499", "500-999", "1000+"]
+
+# Canonical ordering for confidence labels
+CONFIDENCE_LEVELS = ["high", "medium", "low"]
+
+# How the score column was produced, for tables whose source does not say:
+# model.R's random forest ("random_forest") or ingest.py's formula ("formula")
+DEFAULT_SCORE_METHOD = "random_forest"
+
+# Derived index arrays, built at load time or mapped from a snapshot
+INDEX_NAMES = ["row_index", "ranked_rows", "ranked_neg_scores", "group_bounds", "group_rank"]
+
+
+def file_sha256(path: Path) -> str:
+    """Return the hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _intern(value: str, codes: dict[str, int]) -> int:
+    """Return the provisional code for a label, assigning a new one if needed."""
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(codes)
+    return code
+
+
+def _optional_float(value: str) -> float:
+    """Parse a numeric cell, mapping blanks and R's NA to NaN."""
+    return float(value) if value and value != "NA" else float("nan")
+
+
+def _recode(provisional: dict[str, int], ordered: list[str], raw: array, dtype) -> np.ndarray:
+    """Map first-seen codes onto the codes implied by an ordered label list."""
+    position = {label: i for i, label in enumerate(ordered)}
+    remap = np.empty(len(provisional), dtype=dtype)
+    for label, code in provisional.items():
+        remap[code] = position[label]
+    return remap[np.frombuffer(raw, dtype=np.int32)] if len(raw) else np.empty(0, dtype=dtype)
+
+
+class ScoreTable:
+    """Immutable, category-coded, column-oriented score lookup table."""
+
+    def __init__(
+        self,
+        states: list[str],
+        corp_types: list[str],
+        emp_sizes: list[str],
+        confidence_levels: list[str],
+        state_code: np.ndarray,
+        corp_code: np.ndarray,
+        size_code: np.ndarray,
+        confidence_code: np.ndarray,
+        score: np.ndarray,
+        establishments: np.ndarray,
+        employees: np.ndarray,
+        avg_salary_thousands: np.ndarray,
+        payroll_momentum: np.ndarray | None = None,
+        indexes: dict[str, np.ndarray] | None = None,
+        version: str = "unversioned",
+        score_method: str = DEFAULT_SCORE_METHOD,
+        lazy_labels: bool = False,
+    ):
+        # Identifies the data a response was computed from
+        self.version = version
+        self.score_method = score_method
+
+        # Category dictionaries (code -> label)
+        self.states = tuple(states)
+        self.corp_types = tuple(corp_types)
+        self.emp_sizes = tuple(emp_sizes)
+        self.confidence_levels = tuple(confidence_levels)
+
+        # Input spelling -> code indexes, with suggestions for misses
+        # (shared with other tables that have the same labels; ``lazy_labels``
+        # defers their suggestion indexes to the first miss)
+        self.state_labels: LabelIndex = state_index(self.states, lazy_labels)
+        self.corp_labels: LabelIndex = corp_type_index(self.corp_types, lazy_labels)
+        self.size_labels: LabelIndex = emp_size_index(self.emp_sizes, lazy_labels)
+
+        # Per-row columns
+        self.state_code = state_code
+        self.corp_code = corp_code
+        self.size_code = size_code
+        self.confidence_code = confidence_code
+        self.score = score
+        self.establishments = establishments
+        self.employees = employees
+        self.avg_salary_thousands = avg_salary_thousands
+        # Raw model feature (Q1 payroll x 4 / annual payroll); older tables lack it
+        self.payroll_momentum = payroll_momentum
+
+        if indexes is not None:
+            # Prebuilt indexes, e.g. mapped from a binary snapshot
+            for name in INDEX_NAMES:
+                setattr(self, name, indexes[name])
+        else:
+            # Dense (state, corp_type, emp_size) -> row offset cube, -1 where missing
+            self.row_index = np.full(
+                (len(self.states), len(self.corp_types), len(self.emp_sizes)), -1, dtype=np.int32
+            )
+            self.row_index[state_code, corp_code, size_code] = np.arange(len(score), dtype=np.int32)
+            self._build_ranked_index()
+
+        # Dense (state, corp_type, emp_size) score tensor, NaN where ``present`` is False
+        self.present = self.row_index >= 0
+        self.score_cube = np.where(self.present, self.score[self.row_index], np.nan)
+
+        for array_ in (*self.columns().values(), *self.indexes().values(), self.present, self.score_cube):
+            array_.flags.writeable = False
+
+        # Memoryviews return plain Python scalars and are much cheaper than
+        # NumPy scalar indexing on the single-row hot path
+        self._cells = {name: memoryview(column) for name, column in self.columns().items()}
+        self._row_cells = memoryview(self.row_index)
+        self._record_cells = tuple(self._cells[name] for name in (
+            "state_code", "corp_code", "size_code", "score", "confidence_code",
+            "establishments", "employees", "avg_salary_thousands",
+        ))
+
+    def _build_ranked_index(self) -> None:
+        """Precompute a score-ordered row list for every (corp_type, emp_size) group.
+
+        Rows are sorted by group, then score descending, then state, so each
+        group occupies one contiguous slice of ``ranked_rows`` delimited by
+        ``group_bounds``. ``ranked_neg_scores`` holds the negated scores in the
+        same order (ascending within a group) for binary-searched range queries,
+        and ``group_rank`` gives each row its 1-based position in its group.
+        """
+        n_groups = len(self.corp_types) * len(self.emp_sizes)
+        group = self.corp_code.astype(np.int64) * len(self.emp_sizes) + self.size_code
+
+        order = np.lexsort((self.state_code, -self.score, group)).astype(np.int32)
+        counts = np.bincount(group, minlength=n_groups)
+
+        self.ranked_rows = order
+        self.ranked_neg_scores = -self.score[order]
+        self.group_bounds = np.zeros(n_groups + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.group_bounds[1:])
+
+        position = np.arange(len(order), dtype=np.int64) - self.group_bounds[group[order]]
+        self.group_rank = np.empty(len(order), dtype=np.int32)
+        self.group_rank[order] = position + 1
+
+    @classmethod
+    def from_csv(cls, csv_path: Path) -> "ScoreTable":
+        """Parse a score_lookup.csv file into a ScoreTable."""
+        state_ids: dict[str, int] = {}
+        corp_ids: dict[str, int] = {}
+        size_ids: dict[str, int] = {}
+        confidence_ids: dict[str, int] = {}
+
+        # Typed buffers keep parsed values unboxed while the file is read
+        state_raw, corp_raw, size_raw, confidence_raw = array("i"), array("i"), array("i"), array("i")
+        score, salary, momentum = array("d"), array("d"), array("d")
+        establishments, employees = array("q"), array("q")
+        methods: set[str] = set()
+
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"{csv_path} is empty")
+            col = {name: i for i, name in enumerate(header)}
+            i_state, i_corp, i_size = col["state"], col["corp_type"], col["emp_size"]
+            i_score, i_conf = col["score"], col["confidence"]
+            i_estab, i_emp, i_salary = col["establishments"], col["employees"], col["avg_salary_thousands"]
+            i_momentum = col.get("payroll_momentum")
+            i_method = col.get("score_method")
+
+            for row in reader:
+                state_raw.append(_intern(row[i_state], state_ids))
+                corp_raw.append(_intern(row[i_corp], corp_ids))
+                size_raw.append(_intern(row[i_size], size_ids))
+                confidence_raw.append(_intern(row[i_conf], confidence_ids))
+                score.append(float(row[i_score]))
+                establishments.append(int(row[i_estab]))
+                employees.append(int(row[i_emp]))
+                salary.append(float(row[i_salary]))
+                if i_momentum is not None:
+                    momentum.append(_optional_float(row[i_momentum]))
+                if i_method is not None:
+                    methods.add(row[i_method])
+
+        if len(methods) > 1:
+            raise ValueError(f"{csv_path} mixes score methods: {', '.join(sorted(methods))}")
+
+        states = sorted(state_ids)
+        corp_types = sorted(corp_ids)
+        emp_sizes = sorted(size_ids, key=lambda x: EMP_SIZE_ORDER.index(x) if x in EMP_SIZE_ORDER else 99)
+        confidence_levels = [c for c in CONFIDENCE_LEVELS if c in confidence_ids]
+        confidence_levels += sorted(c for c in confidence_ids if c not in CONFIDENCE_LEVELS)
+
+        return cls(
+            states=states,
+            corp_types=corp_types,
+            emp_sizes=emp_sizes,
+            confidence_levels=confidence_levels,
+            state_code=_recode(state_ids, states, state_raw, np.uint16),
+            corp_code=_recode(corp_ids, corp_types, corp_raw, np.uint8),
+            size_code=_recode(size_ids, emp_sizes, size_raw, np.uint8),
+            confidence_code=_recode(confidence_ids, confidence_levels, confidence_raw, np.uint8),
+            score=np.frombuffer(score, dtype=np.float64).copy(),
+            establishments=np.frombuffer(establishments, dtype=np.int64).copy(),
+            employees=np.frombuffer(employees, dtype=np.int64).copy(),
+            avg_salary_thousands=np.frombuffer(salary, dtype=np.float64).copy(),
+            payroll_momentum=np.frombuffer(momentum, dtype=np.float64).copy() if i_momentum is not None else None,
+            version=file_sha256(csv_path)[:12],
+            score_method=methods.pop() if methods else DEFAULT_SCORE_METHOD,
+        )
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Return the per-row columns by name (optional columns only when present)."""
+        columns = {
+            "state_code": self.state_code,
+            "corp_code": self.corp_code,
+            "size_code": self.size_code,
+            "confidence_code": self.confidence_code,
+            "score": self.score,
+            "establishments": self.establishments,
+            "employees": self.employees,
+            "avg_salary_thousands": self.avg_salary_thousands,
+        }
+        if self.payroll_momentum is not None:
+            columns["payroll_momentum"] = self.payroll_momentum
+        return columns
+
+    def validate(self) -> list[str]:
+        """Return a list of problems that make the table unfit to serve."""
+        problems = []
+        if len(self) == 0:
+            problems.append("table has no rows")
+        if np.count_nonzero(self.row_index >= 0) != len(self):
+            problems.append("duplicate (state, corp_type, emp_size) rows")
+        if not np.all(np.isfinite(self.score)) or np.any((self.score < 0) | (self.score > 100)):
+            problems.append("scores outside 0-100")
+        if np.any(self.establishments < 0) or np.any(self.employees < 0):
+            problems.append("negative establishment or employee counts")
+        return problems
+
+    def indexes(self) -> dict[str, np.ndarray]:
+        """Return the derived index arrays by name."""
+        return {name: getattr(self, name) for name in INDEX_NAMES}
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays and the derived indexes."""
+        return sum(a.nbytes for a in (*self.columns().values(), *self.indexes().values()))
+
+    def find(self, state: str, corp_type: str, emp_size: str) -> int:
+        """Return the row offset for a combination, or -1 if it is not present."""
+        try:
+            # Spellings seen before index the cube straight from the label memos
+            return self._row_cells[
+                self.state_labels.resolved[state], self.corp_labels.resolved[corp_type],
+                self.size_labels.resolved[emp_size],
+            ]
+        except (KeyError, TypeError):
+            # New spelling, or a remembered miss (None)
+            pass
+        s = self.state_labels.resolve(state)
+        c = self.corp_labels.resolve(corp_type)
+        e = self.size_labels.resolve(emp_size)
+        if s is None or c is None or e is None:
+            return -1
+        return self._row_cells[s, c, e]
+
+    def group_slice(self, corp_type: str, emp_size: str) -> slice:
+        """Return the slice of ``ranked_rows`` holding a (corp_type, emp_size) group."""
+        c = self.corp_labels.resolve(corp_type)
+        e = self.size_labels.resolve(emp_size)
+        if c is None or e is None:
+            return slice(0, 0)
+        g = c * len(self.emp_sizes) + e
+        return slice(int(self.group_bounds[g]), int(self.group_bounds[g + 1]))
+
+    def ranked_group(self, corp_type: str, emp_size: str) -> np.ndarray:
+        """Return a group's row offsets ordered by score descending."""
+        return self.ranked_rows[self.group_slice(corp_type, emp_size)]
+
+    def score_range(self, corp_type: str, emp_size: str, min_score: float, max_score: float) -> np.ndarray:
+        """Return a group's rows scoring within [min_score, max_score], best first."""
+        group = self.group_slice(corp_type, emp_size)
+        neg_scores = self.ranked_neg_scores[group]
+        lo = np.searchsorted(neg_scores, -max_score, side="left")
+        hi = np.searchsorted(neg_scores, -min_score, side="right")
+        return self.ranked_rows[group][lo:hi]
+
+    def rank(self, row: int) -> tuple[int, int]:
+        """Return (1-based rank, group size) for a row within its group."""
+        g = int(self.corp_code[row]) * len(self.emp_sizes) + int(self.size_code[row])
+        return int(self.group_rank[row]), int(self.group_bounds[g + 1] - self.group_bounds[g])
+
+    def count_below(self, row: int) -> int:
+        """Return how many rows in the row's group score strictly lower."""
+        g = int(self.corp_code[row]) * len(self.emp_sizes) + int(self.size_code[row])
+        start, end = int(self.group_bounds[g]), int(self.group_bounds[g + 1])
+        below = np.searchsorted(self.ranked_neg_scores[start:end], -self.score[row], side="right")
+        return end - start - int(below)
+
+    def record(self, row: int) -> dict:
+        """Materialize one row as a plain dict of Python values."""
+        state, corp, size, score, confidence, establishments, employees, salary = self._record_cells
+        return {
+            "state": self.states[state[row]],
+            "corp_type": self.corp_types[corp[row]],
+            "emp_size": self.emp_sizes[size[row]],
+            "score": score[row],
+            "confidence": self.confidence_levels[confidence[row]],
+            "establishments": establishments[row],
+            "employees": employees[row],
+            "avg_salary_thousands": salary[row],
+        }
@@ -0,0 +1,158 @@
+"""
+Re-scoring the lookup table with caller-supplied weights.
+
+model.R blends three features into the opportunity score, each normalized
+within its (corp_type, emp_size) group:
+
+    salary    min-max normalized average salary
+    momentum  payroll momentum capped at 1.5, divided by 1.5
+    density   min-max normalized log(establishments + 1)
+
+with weights 0.4 / 0.35 / 0.25. The normalized components do not depend
+on the weights, so they are computed once per table; a re-score is then a
+single matrix-vector product plus a sort to rebuild the per-group ranking.
+Results are memoized per weight vector with LRU eviction.
+
+Note that the published score comes from a random forest fitted to this
+formula, so re-scored values are close to, but not the same as, the
+``score`` column.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+from score_store import ScoreTable
+
+COMPONENTS = ["salary", "momentum", "density"]
+
+DEFAULT_WEIGHTS = {"salary": 0.4, "momentum": 0.35, "density": 0.25}
+
+# model.R caps payroll momentum before scaling it to 0-1
+MOMENTUM_CAP = 1.5
+
+# Added to min-max denominators in model.R so flat groups do not divide by zero
+_EPSILON = 0.01
+
+
+class ScoringError(Exception):
+    """Raised for invalid weights or a table without the features they need."""
+
+
+class Rescored(NamedTuple):
+    """Scores for every row under one weight vector, with per-group ranking."""
+
+    weights: tuple[float, ...]
+    score: np.ndarray
+    ranked_rows: np.ndarray
+    group_rank: np.ndarray
+
+
+def _group_min_max(values: np.ndarray, ranked_rows: np.ndarray, group_bounds: np.ndarray) -> np.ndarray:
+    """Min-max normalize values within groups, as model.R does."""
+    n_groups = len(group_bounds) - 1
+    group = np.repeat(np.arange(n_groups), np.diff(group_bounds))
+    sorted_values = values[ranked_rows]
+    nonempty = np.flatnonzero(np.diff(group_bounds))
+    starts = group_bounds[:-1][nonempty]
+
+    lo = np.zeros(n_groups)
+    hi = np.zeros(n_groups)
+    lo[nonempty] = np.minimum.reduceat(sorted_values, starts)
+    hi[nonempty] = np.maximum.reduceat(sorted_values, starts)
+
+    normalized = np.empty(len(values))
+    normalized[ranked_rows] = (sorted_values - lo[group]) / (hi[group] - lo[group] + _EPSILON)
+    return normalized
+
+
+class WeightedScorer:
+    """Re-scores one table under arbitrary component weights."""
+
+    def __init__(self, table: ScoreTable, max_entries: int = 64):
+        self.table = table
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple[float, ...], Rescored] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.group = table.corp_code.astype(np.int64) * len(table.emp_sizes) + table.size_code
+        salary = _group_min_max(table.avg_salary_thousands, table.ranked_rows, table.group_bounds)
+        density = _group_min_max(
+            np.log(table.establishments.astype(np.float64) + 1), table.ranked_rows, table.group_bounds
+        )
+        if table.payroll_momentum is not None:
+            # Rows model.R would have dropped for a missing momentum count as zero
+            momentum = np.nan_to_num(np.minimum(table.payroll_momentum, MOMENTUM_CAP) / MOMENTUM_CAP)
+        else:
+            momentum = np.full(len(table), np.nan)
+        self.has_momentum = table.payroll_momentum is not None
+
+        # One row per table row, one column per entry of COMPONENTS
+        self.components = np.column_stack([salary, momentum, density])
+        self.components.flags.writeable = False
+
+    def default_weights(self) -> dict[str, float]:
+        """DEFAULT_WEIGHTS, with momentum left out when the table has no momentum column."""
+        if self.has_momentum:
+            return dict(DEFAULT_WEIGHTS)
+        return {**DEFAULT_WEIGHTS, "momentum": 0.0}
+
+    def normalize_weights(self, weights: dict[str, float]) -> tuple[float, ...]:
+        """Validate weights and scale them to sum to 1, in COMPONENTS order."""
+        unknown = set(weights) - set(COMPONENTS)
+        if unknown:
+            raise ScoringError(f"Unknown weight '{sorted(unknown)[0]}'. Use: {', '.join(COMPONENTS)}.")
+        values = [float(weights.get(name, 0.0)) for name in COMPONENTS]
+        if any(not np.isfinite(v) or v < 0 for v in values):
+            raise ScoringError("Weights must be non-negative numbers")
+        total = sum(values)
+        if total <= 0:
+            raise ScoringError("At least one weight must be positive")
+        if values[COMPONENTS.index("momentum")] > 0 and not self.has_momentum:
+            raise ScoringError(
+                "This lookup table has no payroll_momentum column, so momentum cannot be weighted. "
+                "Regenerate score_lookup.csv with the current model.R, or leave the momentum weight unset."
+            )
+        # Rounded so equivalent weight vectors share a cache entry
+        return tuple(round(v / total, 6) for v in values)
+
+    def rescore(self, weights: dict[str, float]) -> Rescored:
+        """Return every row's score under the given weights, memoized per weight vector."""
+        key = self.normalize_weights(weights)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        w = np.array(key)
+        used = w > 0
+        # Same rounding and bounds as model.R
+        score = np.clip(np.round(self.components[:, used] @ w[used] * 100, 1), 0, 100)
+
+        # Same ordering as ScoreTable's ranked index: group, score descending,
+        # state. Scores have one decimal, so the three keys pack into one int64
+        # and a single argsort replaces a three-key lexsort.
+        table = self.table
+        tenths = 1000 - np.rint(score * 10).astype(np.int64)
+        packed = (self.group * 1001 + tenths) * len(table.states) + table.state_code
+        ranked_rows = np.argsort(packed).astype(np.int32)
+        position = np.arange(len(score), dtype=np.int64) - table.group_bounds[self.group[ranked_rows]]
+        group_rank = np.empty(len(score), dtype=np.int32)
+        group_rank[ranked_rows] = position + 1
+
+        result = Rescored(key, score, ranked_rows, group_rank)
+        for array_ in (score, ranked_rows, group_rank):
+            array_.flags.writeable = False
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        """Return the number of memoized weight vectors."""
+        with self._lock:
+            return {"entries": len(self._cache), "max_entries": self.max_entries}
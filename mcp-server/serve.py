@@ -0,0 +1,115 @@
+"""
+Run the MCP server as several worker processes behind one port.
+
+Tool work and JSON encoding hold the GIL, so one process tops out at about
+one core. This launcher starts uvicorn with N worker processes, all serving
+/mcp and the custom routes from the same socket.
+
+    python serve.py --workers 4 --port 8000
+
+Before the workers start, the binary snapshot is built (or rebuilt if it
+is stale). Each worker memory-maps that file read-only, so the column and
+index pages are shared through the page cache. Resident memory grows only
+by each worker's interpreter and caches, not by another copy of the table.
+
+Workers do not share MCP session state, and uvicorn hands each connection
+to whichever worker accepts it. The transport therefore runs in stateless
+HTTP mode: every request carries everything needed to serve it, and no
+worker needs sticky routing. /metrics and /stats report the worker that
+answered the request.
+
+For reloads, each worker polls the CSV and snapshot (SCORE_RELOAD_INTERVAL,
+10 seconds by default here). /admin/reload rewrites the snapshot before it
+reloads, so the other workers follow within one poll interval.
+
+With --cold-start (SCORE_COLD_START=1), each worker loads the table and
+warms the weighted scorer and neighbour trees in a background thread, so
+the port opens as soon as the code is imported. Tool calls that arrive
+first wait only for the table. The mode suits content that scales to zero.
+
+With --record PATH (SCORE_TRAFFIC_LOG), every worker appends the tool calls
+it serves to one traffic log, which benchmarks/replay.py re-drives against
+another build for capacity planning.
+
+On Posit Connect, scale with the content's process settings instead. When
+it may run more than one process, set MCP_STATELESS_HTTP=1.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+
+from snapshot import ensure_snapshot
+
+SERVER_DIR = Path(__file__).resolve().parent
+DEFAULT_CSV_PATH = SERVER_DIR / "score_lookup.csv"
+
+logger = logging.getLogger(__name__)
+
+
+def prepare_snapshot(csv_path: Path) -> None:
+    """Build the snapshot the workers will share, if it is missing or stale."""
+    try:
+        path, rebuilt = ensure_snapshot(csv_path)
+    except FileNotFoundError:
+        logger.warning("No lookup table at %s; workers will start without data", csv_path)
+        return
+    if rebuilt:
+        logger.info("Built shared snapshot %s", path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SCORE_WORKERS", os.cpu_count() or 1)),
+        help="worker processes (default: SCORE_WORKERS or the number of CPUs)",
+    )
+    parser.add_argument(
+        "--cold-start",
+        action="store_true",
+        help="load the table in the background instead of before the port opens",
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        metavar="PATH",
+        help="append every tool call to a traffic log for replay (see recorder.py)",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s: %(message)s")
+    prepare_snapshot(DEFAULT_CSV_PATH)
+
+    # Read by server.py in every worker
+    os.environ["SCORE_WORKERS"] = str(args.workers)
+    if args.cold_start:
+        os.environ["SCORE_COLD_START"] = "1"
+    if args.record:
+        os.environ["SCORE_TRAFFIC_LOG"] = str(args.record.resolve())
+    if args.workers > 1:
+        os.environ["MCP_STATELESS_HTTP"] = "1"
+        os.environ.setdefault("SCORE_RELOAD_INTERVAL", "10")
+
+    uvicorn.run(
+        "server:app",
+        app_dir=str(SERVER_DIR),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,14 +9,51 @@ Deploy this server on Posit Connect to provide AI assistants with real-time
 business intelligence scoring capabilities.
 """
 
-import csv
+import atexit
+import functools
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import math
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Callable, Hashable, NamedTuple
 
+import numpy as np
 from fastmcp import FastMCP
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools import ToolResult
+from mcp.types import TextContent
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
-from starlette.responses import HTMLResponse
+
+from admission import Shed, SingleFlight, ToolLimit, parse_limits
+from counties import DEFAULT_COUNTY_DIR, CountyStore
+from export import EXPORT_FIELDS, MEDIA_TYPES, ExportError, RowFilter, encode_chunks, plan_export, records
+from label_index import LabelIndex
+from metrics import CONTENT_TYPE, SIZE_BUCKETS, Registry
+from neighbors import DISTANCES, FEATURES, SCOPES, STANDARDIZATIONS, NeighborError, NeighborIndex
+from pagination import CursorError, plan_page
+from profiles import FORMATS, METHODOLOGY_URI, format_error, shape
+from query import QueryError, parse_aggregate, run_query
+from recorder import TrafficRecorder, digest
+from response_cache import CachedResponse, ResponseCache, encode_response
+from score_store import DEFAULT_SCORE_METHOD, EMP_SIZE_ORDER, ScoreTable
+from scoring import DEFAULT_WEIGHTS, ScoringError, WeightedScorer
+from snapshot import SnapshotError, ensure_snapshot, load_snapshot, snapshot_path_for
+from vintages import VintageStore
+
+try:
+    import brotli
+except ImportError:  # Optional: landing page is served with gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
 
 # Initialize the MCP server
 mcp = FastMCP(
@@ -32,22 +69,183 @@ mcp = FastMCP(
     Scores range from 0-100, where higher scores indicate better business opportunities
     based on factors like average salaries, establishment density, and economic momentum.
 
+    To score many combinations at once, use get_opportunity_scores instead of calling
+    get_opportunity_score repeatedly.
+
     Use list_states, list_corp_types, and list_emp_sizes to discover valid parameter values.
+
+    Use top_states, state_rank, and states_in_score_range to rank states within a
+    corporation type and employee size group. Use score_with_weights to rank them with
+    custom salary, momentum and density weights.
+
+    Use query_scores to answer aggregate questions (averages, weighted averages, totals by
+    state, corporation type or employee size) in one call instead of looping over
+    get_opportunity_score.
+
+    Use similar_markets to find the states (or other segments) whose salary, size and score
+    profile is closest to a given one.
+
+    Use score_matrix to get a whole 2-D slice (e.g. every state by employee size for one
+    corporation type) in one call, as labelled rows and columns.
+
+    Where county-level data is installed, get_opportunity_score and state_rank accept a county
+    and top_counties ranks the counties of a state.
+
+    get_opportunity_score(s), compare_states, top_states, state_rank, states_in_score_range
+    and score_matrix accept an optional year to read another Census data year; use
+    score_trend for year-over-year changes.
+
+    Use export_scores to page through many rows at once, optionally filtered by state,
+    corporation type, employee size, confidence and score range.
+
+    If a response has a retry_after field, the server is busy with that tool: wait that many
+    seconds before calling it again.
+
+    Every tool except export_scores takes format="compact" to leave out the methodology,
+    interpretations and notes (read them once from the score://methodology resource) or
+    format="columnar" to also send lists of records as one "fields" header plus "rows".
+    top_states, compare_states, states_in_score_range and list_states return at most one
+    page of results; pass next_cursor back as cursor for the next page.
     """,
 )
 
-# Load the lookup table at startup
-LOOKUP_DATA: dict[tuple[str, str, str], dict] = {}
-STATES: set[str] = set()
-CORP_TYPES: set[str] = set()
-EMP_SIZES: set[str] = set()
+# Load the lookup table at startup. TABLE is only ever replaced wholesale and
+# never mutated, so each request takes one local reference to it and keeps a
+# consistent view even if a reload swaps in a new table mid-request.
+TABLE: ScoreTable | None = None
+DEFAULT_CSV_PATH = Path(__file__).parent / "score_lookup.csv"
+
+# CBP year of the current table; other years are served from VINTAGES
+DATA_YEAR = int(os.getenv("SCORE_DATA_YEAR", "2022"))
+
+_reload_lock = threading.Lock()
+
+# Cold-start mode: import returns without loading the table, which is loaded
+# (and the lazily built indexes warmed) in a background thread while the
+# transport starts accepting connections. Requests that need the table wait
+# for it, up to SCORE_WARM_TIMEOUT seconds; the others are served at once.
+# A missing or stale snapshot is written first, so only the first start
+# after a new CSV pays for parsing it.
+COLD_START = os.getenv("SCORE_COLD_START", "").lower() in ("1", "true", "yes")
+WARM_TIMEOUT = float(os.getenv("SCORE_WARM_TIMEOUT", "30"))
+# Seconds between the table becoming ready and the index warm-up, which holds
+# the GIL; the first requests after a cold start get the CPU to themselves
+WARM_INDEX_DELAY = float(os.getenv("SCORE_WARM_INDEX_DELAY", "2"))
+_TABLE_READY = threading.Event()
+
+# Number of worker processes serving this app (set by serve.py). Workers share
+# the memory-mapped snapshot but nothing else, so MCP sessions are stateless
+# and a reload is propagated by rewriting the snapshot (see admin_reload).
+WORKERS = int(os.getenv("SCORE_WORKERS", "1"))
+STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "").lower() in ("1", "true", "yes")
+
+# Re-scores the current table with custom weights; rebuilt lazily after a reload
+_scorer: WeightedScorer | None = None
+_scorer_lock = threading.Lock()
+SCORER_MAX_ENTRIES = int(os.getenv("SCORE_WEIGHT_CACHE_ENTRIES", "64"))
+
+# KD-trees over the current table's features; rebuilt lazily after a reload
+_neighbors: NeighborIndex | None = None
+_neighbors_lock = threading.Lock()
+NEIGHBOR_MAX_TREES = int(os.getenv("SCORE_NEIGHBOR_TREES", "128"))
+
+# Serialized tool responses, keyed by tool, normalized arguments and data
+# version. The list tools never change for a version, so their responses are
+# built once when a table is loaded.
+RESPONSE_CACHE = ResponseCache(max_bytes=int(os.getenv("SCORE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+_STATIC_RESPONSES: dict[Hashable, CachedResponse] = {}
+
+# Per-worker (concurrency, queue) limits for the tools that can be expensive,
+# so a burst of them cannot crowd out cheap lookups; SCORE_TOOL_LIMITS
+# overrides entries (see admission.py). Tools without a limit are neither
+# queued nor coalesced: they are answered from the response cache.
+DEFAULT_TOOL_LIMITS = {
+    "top_states": (4, 16),
+    "compare_states": (2, 8),
+    "get_opportunity_scores": (2, 8),
+    "top_counties": (2, 8),
+    "score_matrix": (2, 8),
+    "score_trend": (2, 8),
+    "similar_markets": (2, 8),
+    "score_with_weights": (2, 8),
+    "query_scores": (2, 8),
+    "export_scores": (2, 8),
+}
+TOOL_LIMITS = {
+    tool: ToolLimit(concurrency, queue, timeout=float(os.getenv("SCORE_QUEUE_TIMEOUT", "10")))
+    for tool, (concurrency, queue) in {
+        **DEFAULT_TOOL_LIMITS, **parse_limits(os.getenv("SCORE_TOOL_LIMITS", ""))
+    }.items()
+    if concurrency > 0
+}
+# Identical limited calls in flight, keyed by tool and arguments
+_IN_FLIGHT = SingleFlight()
+
+# Label arguments spelled canonically in coalescing keys, and their table index
+_LABEL_ARGUMENTS = {
+    "state": "state_labels", "states": "state_labels",
+    "corp_type": "corp_labels", "corp_types": "corp_labels",
+    "emp_size": "size_labels", "emp_sizes": "size_labels",
+}
+
+# Opt-in traffic log for capacity planning: tool calls and calls to
+# RECORDED_ROUTES are appended to SCORE_TRAFFIC_LOG (see recorder.py), to be
+# re-driven against a candidate build with benchmarks/replay.py. Workers
+# append to the same file; recording stops at SCORE_TRAFFIC_MAX_BYTES.
+TRAFFIC_LOG = os.getenv("SCORE_TRAFFIC_LOG", "")
+RECORDER = TrafficRecorder(
+    Path(TRAFFIC_LOG),
+    max_queue=int(os.getenv("SCORE_TRAFFIC_QUEUE", "10000")),
+    max_bytes=int(os.getenv("SCORE_TRAFFIC_MAX_BYTES", str(1024 * 1024 * 1024))),
+) if TRAFFIC_LOG else None
+if RECORDER is not None:
+    atexit.register(RECORDER.close)
+RECORDED_ROUTES = {"/test", "/test/batch", "/export"}
+
+# Instrumentation, exposed at /metrics
+METRICS = Registry()
+TOOL_LATENCY = METRICS.histogram("mcp_tool_duration_seconds", "Tool call latency in seconds.", ("tool",))
+TOOL_CALLS = METRICS.counter("mcp_tool_calls_total", "Tool calls.", ("tool",))
+TOOL_ERRORS = METRICS.counter(
+    "mcp_tool_errors_total", "Tool calls that returned an error, by kind.", ("tool", "kind")
+)
+TOOL_RESPONSE_BYTES = METRICS.histogram(
+    "mcp_tool_response_bytes", "Serialized tool response size in bytes.", ("tool",), SIZE_BUCKETS
+)
+ROUTE_LATENCY = METRICS.histogram(
+    "http_route_duration_seconds", "Custom route latency in seconds (to response start for streams).", ("route",)
+)
+ROUTE_REQUESTS = METRICS.counter("http_route_requests_total", "Custom route requests by status.", ("route", "status"))
+ROUTE_RESPONSE_BYTES = METRICS.histogram(
+    "http_route_response_bytes", "Custom route response body size in bytes.", ("route",), SIZE_BUCKETS
+)
+TABLE_ROWS = METRICS.gauge("score_table_rows", "Rows in the loaded score table.")
+TABLE_LOAD_SECONDS = METRICS.gauge("score_table_load_duration_seconds", "Time taken by the last table load.")
+TABLE_LOADED_AT = METRICS.gauge("score_table_loaded_timestamp_seconds", "Unix time the loaded table was swapped in.")
+TABLE_INFO = METRICS.gauge("score_table_info", "Loaded data version (always 1).", ("version",))
+ADMISSIONS = METRICS.counter(
+    "mcp_tool_admissions_total",
+    "Limited tool calls by outcome (admitted, queued, coalesced, rejected, timed_out).",
+    ("tool", "outcome"),
+)
+ADMISSION_WAIT = METRICS.histogram(
+    "mcp_tool_queue_wait_seconds", "Time limited tool calls spent queued before running.", ("tool",)
+)
+TOOL_ACTIVE = METRICS.gauge("mcp_tool_active_calls", "Limited tool calls running.", ("tool",))
+TOOL_QUEUED = METRICS.gauge("mcp_tool_queued_calls", "Limited tool calls waiting for a slot.", ("tool",))
 
 
-def load_lookup_table():
-    """Load the score lookup table from CSV."""
-    global LOOKUP_DATA, STATES, CORP_TYPES, EMP_SIZES
+def _read_table(csv_path: Path) -> ScoreTable:
+    """Build a ScoreTable from the snapshot or CSV without publishing it.
 
-    csv_path = Path(__file__).parent / "score_lookup.csv"
+    A binary snapshot next to the CSV (built with ``python snapshot.py``) is
+    memory-mapped when present and up to date; otherwise the CSV is parsed.
+    """
+    try:
+        return load_snapshot(snapshot_path_for(csv_path), csv_path)
+    except SnapshotError as e:
+        if snapshot_path_for(csv_path).exists():
+            logger.warning("Ignoring score snapshot, falling back to CSV: %s", e)
 
     if not csv_path.exists():
         raise FileNotFoundError(
@@ -55,70 +253,538 @@ def load_lookup_table():
             "Please run model.R first to generate the lookup table."
         )
 
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            state = row["state"]
-            corp_type = row["corp_type"]
-            emp_size = row["emp_size"]
-
-            STATES.add(state)
-            CORP_TYPES.add(corp_type)
-            EMP_SIZES.add(emp_size)
-
-            key = (state.lower(), corp_type.lower(), emp_size.lower())
-            LOOKUP_DATA[key] = {
-                "state": state,
-                "corp_type": corp_type,
-                "emp_size": emp_size,
-                "score": float(row["score"]),
-                "confidence": row["confidence"],
-                "establishments": int(row["establishments"]),
-                "employees": int(row["employees"]),
-                "avg_salary_thousands": float(row["avg_salary_thousands"]),
+    return ScoreTable.from_csv(csv_path)
+
+
+# Other CBP years (score_lookup_<year>.csv), loaded on first use
+VINTAGES = VintageStore(
+    DEFAULT_CSV_PATH,
+    _read_table,
+    max_bytes=int(os.getenv("SCORE_VINTAGE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
+
+
+# County-level shards (counties/), loaded per state on first use
+COUNTIES = CountyStore(
+    Path(os.getenv("SCORE_COUNTY_DIR", str(DEFAULT_COUNTY_DIR))),
+    max_bytes=int(os.getenv("SCORE_COUNTY_MAX_BYTES", str(128 * 1024 * 1024))),
+)
+
+
+def load_lookup_table(csv_path: Path | None = None) -> ScoreTable:
+    """Load the score lookup table."""
+    global TABLE
+
+    start = time.perf_counter()
+    TABLE = _read_table(csv_path or DEFAULT_CSV_PATH)
+    _record_table_loaded(TABLE, time.perf_counter() - start)
+    _prebuild_static_responses()
+    return TABLE
+
+
+def _record_table_loaded(table: ScoreTable, seconds: float) -> None:
+    """Update the table gauges after a load or reload."""
+    TABLE_ROWS.set(len(table))
+    TABLE_LOAD_SECONDS.set(seconds)
+    TABLE_LOADED_AT.set(time.time())
+    TABLE_INFO.clear()
+    TABLE_INFO.set(1, table.version)
+
+
+def reload_lookup_table(csv_path: Path | None = None) -> dict:
+    """Rebuild the lookup table off to the side, validate it and swap it in.
+
+    In-flight requests keep the table they started with; the old table is
+    freed once the last of them finishes.
+    """
+    global TABLE
+
+    with _reload_lock:
+        previous = TABLE
+        previous_version = previous.version if previous is not None else None
+        start = time.perf_counter()
+        try:
+            table = _read_table(csv_path or DEFAULT_CSV_PATH)
+        except Exception as e:
+            logger.exception("Lookup table reload failed")
+            return {"reloaded": False, "error": f"Could not load lookup table: {e}", "data_version": previous_version}
+
+        problems = table.validate()
+        if problems:
+            logger.error("Rejected reloaded lookup table: %s", "; ".join(problems))
+            return {"reloaded": False, "error": "Validation failed", "problems": problems, "data_version": previous_version}
+
+        # Other vintages and county shards may have been rewritten too; they reload on next use
+        VINTAGES.clear()
+        COUNTIES.reload_index()
+
+        if table.version == previous_version:
+            return {"reloaded": False, "data_version": previous_version, "note": "Data unchanged"}
+
+        TABLE = table
+        _record_table_loaded(table, time.perf_counter() - start)
+        _prebuild_static_responses()
+        RESPONSE_CACHE.clear()
+        logger.info("Swapped in lookup table %s (%d rows)", table.version, len(table))
+        return {"reloaded": True, "data_version": table.version, "previous_version": previous_version, "rows": len(table)}
+
+
+def _watch_lookup_table(csv_path: Path, interval: float) -> None:
+    """Poll the CSV and its snapshot and reload once a change has settled."""
+    def signature():
+        stats = []
+        for path in (csv_path, snapshot_path_for(csv_path)):
+            try:
+                stat = path.stat()
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return stats
+
+    last = signature()
+    while True:
+        time.sleep(interval)
+        current = signature()
+        if current == last:
+            continue
+        # Wait for the writer to finish before reading a half-written file
+        while True:
+            time.sleep(interval)
+            settled = signature()
+            if settled == current:
+                break
+            current = settled
+        last = current
+        reload_lookup_table(csv_path)
+
+
+# Constant description of how scores are produced, shared by every score response
+METHODOLOGY = {
+    "source": f"US Census Bureau County Business Patterns ({DATA_YEAR})",
+    "model": "Random Forest regression on salary, momentum, and density features",
+    "score_range": "0-100 (higher = better opportunity)"
+}
+
+# Model description for each table score_method (see score_store.DEFAULT_SCORE_METHOD)
+SCORE_MODELS = {
+    "random_forest": METHODOLOGY["model"],
+    "formula": "Weighted formula on salary (40%), momentum (35%), and density (25%) features",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _methodology(year: int, score_method: str = DEFAULT_SCORE_METHOD) -> dict:
+    """METHODOLOGY for a data year and scoring method, one shared dict per pair."""
+    if year == DATA_YEAR and score_method == DEFAULT_SCORE_METHOD:
+        return METHODOLOGY
+    return {
+        **METHODOLOGY,
+        "source": f"US Census Bureau County Business Patterns ({year})",
+        "model": SCORE_MODELS.get(score_method, score_method),
+    }
+
+
+# Upper bound on the number of items accepted by get_opportunity_scores
+MAX_BATCH_ITEMS = 10000
+
+# Page size caps for ranked results (top_states, compare_states,
+# states_in_score_range) and for list_states; longer results are paged
+MAX_RANK_PAGE = 100
+MAX_LIST_PAGE = 500
+
+FORMAT_HELP = (
+    "Response format: verbose, compact (without constant text) or columnar "
+    "(compact, with record lists as a fields header plus rows) (default: verbose)"
+)
+
+# Upper bound on the groups returned by query_scores
+MAX_QUERY_GROUPS = 5000
+
+# Upper bound on the rows per export_scores page (the /export route streams without one)
+MAX_EXPORT_PAGE = 5000
+
+# Maximum neighbours returned by similar_markets
+MAX_NEIGHBORS = 100
+
+# Maximum cells in one score_matrix slice
+MAX_MATRIX_CELLS = 20000
+
+
+def _table_for(year: int | None) -> ScoreTable | None:
+    """Return the table for a data year (None means the current one), or None if unavailable."""
+    if year is None or year == DATA_YEAR:
+        return TABLE
+    return VINTAGES.get(year)
+
+
+def _available_years() -> list[int]:
+    """Every data year that can be served."""
+    years = set(VINTAGES.years())
+    if TABLE is not None:
+        years.add(DATA_YEAR)
+    return sorted(years)
+
+
+def _unknown_year(year: int) -> dict:
+    """Build the error response for a year with no table."""
+    return {"error": f"No data for year {year}", "available_years": _available_years()}
+
+
+def _cached_response(
+    tool: str,
+    key: Callable[[ScoreTable | None], Hashable],
+    build: Callable[[], dict],
+    year: int | None = None,
+    fmt: str = "verbose",
+) -> CachedResponse:
+    """Return the serialized response for a tool call, from the cache when possible.
+
+    ``key`` maps the table for ``year`` to the normalized arguments;
+    ``build`` computes the verbose response dict on a miss, which is then
+    shaped into the ``fmt`` profile (see profiles.py).
+    """
+    if fmt not in FORMATS:
+        return encode_response(format_error(fmt))
+    table = _table_for(year)
+    version = table.version if table is not None else None
+    cache_key = (tool, version, key(table)) if year is None else (tool, version, key(table), year)
+    if fmt != "verbose":
+        cache_key += (fmt,)
+
+    cached = _STATIC_RESPONSES.get(cache_key) or RESPONSE_CACHE.get(cache_key)
+    if cached is None:
+        cached = encode_response(shape(build(), fmt))
+        # Only cache if no reload swapped the table while building
+        if cached.payload.get("data_version") == version:
+            RESPONSE_CACHE.put(cache_key, cached)
+    return cached
+
+
+def _uncached_response(build: Callable[[], dict], fmt: str = "verbose") -> CachedResponse:
+    """Serialize a response that is not cached, in the ``fmt`` profile."""
+    if fmt not in FORMATS:
+        return encode_response(format_error(fmt))
+    return encode_response(shape(build(), fmt))
+
+
+def _tool_result(response: CachedResponse) -> ToolResult:
+    """Wrap a serialized response as an MCP tool result without re-encoding it."""
+    result = response.renderings.get("mcp")
+    if result is None:
+        # Built once per cached response; fastmcp does not mutate tool results
+        result = response.renderings["mcp"] = ToolResult.model_construct(
+            content=[TextContent(type="text", text=response.body.decode("utf-8"))],
+            structured_content=response.payload,
+            meta=None,
+            is_error=False,
+        )
+    return result
+
+
+def _error_kind(payload: dict) -> str | None:
+    """Classify an error response for the error counters, or None if it succeeded."""
+    error = payload.get("error")
+    if error is None:
+        # Batch tools report per-item misses alongside their results
+        return "partial" if payload.get("errors") else None
+    if "not loaded" in error:
+        return "not_loaded"
+    if error.startswith("No data for year"):
+        return "unknown_year"
+    if error.startswith("County-level data"):
+        return "no_county_data"
+    suggestions = " ".join(payload.get("suggestions") or ())
+    for field in ("state", "corp_type", "emp_size", "confidence"):
+        if f"Invalid {field} " in suggestions:
+            return f"invalid_{field}"
+    if error.startswith("No data found"):
+        return "missing_combination"
+    return "invalid_request"
+
+
+def _instrumented(tool: Callable) -> Callable:
+    """Record latency, calls, errors and response size for a tool function."""
+    name = tool.__name__
+    latency = TOOL_LATENCY.labels(name)
+    calls = TOOL_CALLS.labels(name)
+    response_bytes = TOOL_RESPONSE_BYTES.labels(name)
+
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        if not _TABLE_READY.is_set():
+            _TABLE_READY.wait(WARM_TIMEOUT)
+        try:
+            result = tool(*args, **kwargs)
+        except Exception:
+            TOOL_ERRORS.inc(name, "exception")
+            raise
+        finally:
+            latency.observe(time.perf_counter() - start)
+            calls.inc()
+
+        payload = result.structured_content if isinstance(result, ToolResult) else result
+        if isinstance(payload, dict) and ("error" in payload or payload.get("errors")):
+            TOOL_ERRORS.inc(name, _error_kind(payload))
+        if isinstance(result, ToolResult):
+            text = result.content[0].text
+            response_bytes.observe(len(text) if text.isascii() else len(text.encode("utf-8")))
+        return result
+
+    # Clients see the description= text, not the docstring; without one, fastmcp
+    # does not import its docstring parser at startup (~50ms). It stays on __wrapped__.
+    wrapper.__doc__ = None
+    return wrapper
+
+
+def _instrumented_route(route: str) -> Callable:
+    """Record latency, status and body size for a custom route handler."""
+    def decorate(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        async def wrapper(request: Request):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = await handler(request)
+                return response
+            finally:
+                elapsed = time.perf_counter() - start
+                ROUTE_LATENCY.observe(elapsed, route)
+                ROUTE_REQUESTS.inc(route, str(response.status_code) if response is not None else "500")
+                body = getattr(response, "body", None)
+                if body is not None:
+                    ROUTE_RESPONSE_BYTES.observe(len(body), route)
+                if RECORDER is not None and route in RECORDED_ROUTES:
+                    await _record_route(route, request, elapsed, response)
+
+        return wrapper
+
+    return decorate
+
+
+async def _record_route(route: str, request: Request, elapsed: float, response) -> None:
+    """Append a custom route call to the traffic log."""
+    table = TABLE
+    entry = {
+        "ts": round(time.time() - elapsed, 3),
+        "route": route,
+        "method": request.method,
+        "query": request.url.query,
+        "ms": round(elapsed * 1000, 3),
+        "status": response.status_code if response is not None else 500,
+        "v": table.version if table is not None else None,
+    }
+    if request.method == "POST":
+        entry["body"] = (await request.body()).decode("utf-8", "replace")
+    # Streamed responses (/export) are not buffered, so only their status is known
+    body = getattr(response, "body", None)
+    if body is not None:
+        entry["bytes"] = len(body)
+        entry["hash"] = digest(body)
+    RECORDER.record(entry)
+
+
+class _TrafficRecording(Middleware):
+    """Append MCP tool calls to the traffic log, timed from arrival so queueing counts."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> ToolResult:
+        start = time.perf_counter()
+        result = None
+        try:
+            result = await call_next(context)
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            table = TABLE
+            entry = {
+                "ts": round(time.time() - elapsed, 3),
+                "tool": context.message.name,
+                "args": context.message.arguments or {},
+                "ms": round(elapsed * 1000, 3),
+                "v": table.version if table is not None else None,
             }
+            if result is not None and result.content:
+                body = result.content[0].text.encode("utf-8")
+                entry["bytes"] = len(body)
+                entry["hash"] = digest(body)
+            payload = result.structured_content if result is not None else None
+            if result is None or (isinstance(payload, dict) and "error" in payload):
+                entry["err"] = 1
+            RECORDER.record(entry)
+
+
+def _coalescing_key(name: str, arguments: dict) -> tuple:
+    """Key a limited call by tool and arguments, with labels spelled canonically.
+
+    "texas", "TX" and "Texas" then share one computation. If a label does not
+    resolve, the arguments are used as sent, so error responses echo each
+    caller's own input.
+    """
+    table = TABLE
+    canonical = dict(arguments)
+    for argument, index in _LABEL_ARGUMENTS.items():
+        value = canonical.get(argument)
+        if value is None or table is None:
+            continue
+        labels = getattr(table, index)
+        values = [value] if isinstance(value, str) else value
+        valid = isinstance(values, list) and all(isinstance(v, str) for v in values)
+        codes = [labels.resolve(v) for v in values] if valid else [None]
+        if None in codes:
+            canonical = arguments
+            break
+        resolved = [labels.labels[code] for code in codes]
+        canonical[argument] = resolved[0] if isinstance(value, str) else resolved
+    return name, json.dumps(canonical, sort_keys=True, default=str)
+
+
+class _AdmissionControl(Middleware):
+    """Apply TOOL_LIMITS to MCP tool calls, coalescing identical ones."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> ToolResult:
+        name = context.message.name
+        limit = TOOL_LIMITS.get(name)
+        if limit is None:
+            return await call_next(context)
+
+        key = _coalescing_key(name, context.message.arguments or {})
+        result, shared = await _IN_FLIGHT.do(key, lambda: self._admit(name, limit, context, call_next))
+        if shared:
+            ADMISSIONS.inc(name, "coalesced")
+        return result
+
+    @staticmethod
+    async def _admit(name: str, limit: ToolLimit, context: MiddlewareContext, call_next: CallNext) -> ToolResult:
+        start = time.perf_counter()
+        try:
+            waited = await limit.acquire()
+        except Shed as e:
+            ADMISSIONS.inc(name, e.reason)
+            return _tool_result(encode_response({
+                "error": f"Server busy: too many {name} calls in progress. Retry after {e.retry_after} seconds.",
+                "retry_after": e.retry_after,
+            }))
+
+        ADMISSIONS.inc(name, "queued" if waited else "admitted")
+        if waited:
+            ADMISSION_WAIT.observe(time.perf_counter() - start, name)
+        start = time.perf_counter()
+        try:
+            return await call_next(context)
+        finally:
+            limit.observe(time.perf_counter() - start)
+            limit.release()
+
+
+# Outermost, so recorded timings include admission queueing
+if RECORDER is not None:
+    mcp.add_middleware(_TrafficRecording())
+mcp.add_middleware(_AdmissionControl())
+
+
+async def _wait_for_table() -> None:
+    """Wait (off the event loop) for a cold-start table load to finish."""
+    if not _TABLE_READY.is_set():
+        await run_in_threadpool(_TABLE_READY.wait, WARM_TIMEOUT)
+
+
+def _prebuild_static_responses() -> None:
+    """Serialize the argument-free list tool responses for the current table."""
+    global _STATIC_RESPONSES
+
+    table = TABLE
+    responses = {}
+    if table is not None:
+        for tool, impl in (
+            ("list_states", _list_states_impl),
+            ("list_corp_types", _list_corp_types_impl),
+            ("list_emp_sizes", _list_emp_sizes_impl),
+        ):
+            response = encode_response(impl())
+            if response.payload.get("data_version") == table.version:
+                responses[(tool, table.version, ())] = response
+    _STATIC_RESPONSES = responses
+
+
+def _score_key(table: ScoreTable | None, state: str, corp_type: str, emp_size: str) -> Hashable:
+    """Cache key for a single combination: its row when found, else the raw input."""
+    row = table.find(state, corp_type, emp_size) if table is not None else -1
+    return ("row", row) if row >= 0 else ("raw", state, corp_type, emp_size)
+
+
+def _group_key(table: ScoreTable | None, corp_type: str, emp_size: str) -> Hashable:
+    """Cache key for a (corp_type, emp_size) group: its codes when resolved, else the raw input."""
+    if table is not None:
+        c = table.corp_labels.resolve(corp_type)
+        e = table.size_labels.resolve(emp_size)
+        if c is not None and e is not None:
+            return ("group", c, e)
+    return ("raw", corp_type, emp_size)
+
+
+def _canonical_group(table: ScoreTable | None, corp_type: str, emp_size: str) -> tuple[str, str]:
+    """Return the canonical corp_type and emp_size labels, keeping unrecognized input as given."""
+    if table is None:
+        return corp_type, emp_size
+    c = table.corp_labels.resolve(corp_type)
+    e = table.size_labels.resolve(emp_size)
+    return (
+        table.corp_types[c] if c is not None else corp_type,
+        table.emp_sizes[e] if e is not None else emp_size,
+    )
+
+
+def _invalid_label(labels: LabelIndex, value: str, field: str, list_tool: str) -> str | None:
+    """Describe an unrecognized label with its closest valid spellings, or None if it resolves."""
+    if labels.resolve(value) is not None:
+        return None
+    message = f"Invalid {field} '{value}'."
+    close = labels.suggest(value)
+    if close:
+        message += f" Did you mean {', '.join(repr(c) for c in close)}?"
+    return message + f" Use {list_tool} to see valid options."
+
+
+def _group_problems(table: ScoreTable, corp_type: str, emp_size: str) -> list[str]:
+    """Return messages for an unrecognized corp_type or emp_size."""
+    problems = [
+        _invalid_label(table.corp_labels, corp_type, "corp_type", "list_corp_types"),
+        _invalid_label(table.size_labels, emp_size, "emp_size", "list_emp_sizes"),
+    ]
+    return [p for p in problems if p]
 
 
-# Load data on module import
-try:
-    load_lookup_table()
-except FileNotFoundError:
-    # Will be loaded later or fail gracefully
-    pass
+def _not_found(table: ScoreTable, state: str, corp_type: str, emp_size: str) -> dict:
+    """Build the error response for a combination that is not in the table."""
+    # Try to provide helpful error message
+    state_problem = _invalid_label(table.state_labels, state, "state", "list_states")
+    suggestions = ([state_problem] if state_problem else []) + _group_problems(table, corp_type, emp_size)
+
+    return {
+        "error": "No data found for the specified combination",
+        "suggestions": suggestions if suggestions else ["This combination may not exist in the census data"],
+        "provided": {"state": state, "corp_type": corp_type, "emp_size": emp_size},
+        "data_version": table.version
+    }
 
 
-def _get_opportunity_score_impl(state: str, corp_type: str, emp_size: str) -> dict:
+def _get_opportunity_score_impl(state: str, corp_type: str, emp_size: str, year: int | None = None) -> dict:
     """Internal implementation for getting opportunity score."""
-    if not LOOKUP_DATA:
+    table = _table_for(year)
+    if table is None:
+        if year is not None and year != DATA_YEAR:
+            return _unknown_year(year)
         return {
             "error": "Lookup table not loaded. Please ensure score_lookup.csv exists.",
             "hint": "Run the R model script first: Rscript model.R"
         }
 
-    # Normalize inputs
-    key = (state.lower().strip(), corp_type.lower().strip(), emp_size.lower().strip())
+    row = table.find(state, corp_type, emp_size)
 
-    if key not in LOOKUP_DATA:
-        # Try to provide helpful error message
-        state_match = state.lower().strip() in [s.lower() for s in STATES]
-        corp_match = corp_type.lower().strip() in [c.lower() for c in CORP_TYPES]
-        emp_match = emp_size.lower().strip() in [e.lower() for e in EMP_SIZES]
+    if row < 0:
+        return _not_found(table, state, corp_type, emp_size)
 
-        suggestions = []
-        if not state_match:
-            suggestions.append(f"Invalid state '{state}'. Use list_states to see valid options.")
-        if not corp_match:
-            suggestions.append(f"Invalid corp_type '{corp_type}'. Use list_corp_types to see valid options.")
-        if not emp_match:
-            suggestions.append(f"Invalid emp_size '{emp_size}'. Use list_emp_sizes to see valid options.")
-
-        return {
-            "error": "No data found for the specified combination",
-            "suggestions": suggestions if suggestions else ["This combination may not exist in the census data"],
-            "provided": {"state": state, "corp_type": corp_type, "emp_size": emp_size}
-        }
-
-    data = LOOKUP_DATA[key]
+    data = table.record(row)
 
     return {
         "score": data["score"],
@@ -132,11 +798,8 @@ def _get_opportunity_score_impl(state: str, corp_type: str, emp_size: str) -> di
             "total_employees": data["employees"],
             "avg_salary_thousands": round(data["avg_salary_thousands"], 2),
         },
-        "methodology": {
-            "source": "US Census Bureau County Business Patterns (2022)",
-            "model": "Random Forest regression on salary, momentum, and density features",
-            "score_range": "0-100 (higher = better opportunity)"
-        }
+        "methodology": _methodology(year or DATA_YEAR, table.score_method),
+        "data_version": table.version
     }
 
 
@@ -155,13 +818,106 @@ def _get_opportunity_score_impl(state: str, corp_type: str, emp_size: str) -> di
     number of establishments, total employees, and average salary.
     """
 )
+@_instrumented
 def get_opportunity_score(
     state: Annotated[str, "US State name (e.g., 'California', 'Texas', 'New York')"],
     corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
     emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    county: Annotated[str | None, "County within the state (e.g., 'Harris County'); needs county data"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
 ) -> dict:
     """Get business opportunity score for the specified parameters."""
-    return _get_opportunity_score_impl(state, corp_type, emp_size)
+    if county is not None:
+        return _tool_result(_uncached_response(lambda: _county_score_impl(state, county, corp_type, emp_size, year), format))
+    return _tool_result(_get_opportunity_score_response(state, corp_type, emp_size, year, format))
+
+
+def _get_opportunity_score_response(
+    state: str, corp_type: str, emp_size: str, year: int | None = None, fmt: str = "verbose"
+) -> CachedResponse:
+    """Cached, serialized get_opportunity_score response."""
+    return _cached_response(
+        "get_opportunity_score",
+        lambda table: _score_key(table, state, corp_type, emp_size),
+        lambda: _get_opportunity_score_impl(state, corp_type, emp_size, year),
+        year,
+        fmt,
+    )
+
+
+def _county_shard(state: str, year: int | None) -> tuple[ScoreTable | None, str, dict | None]:
+    """Return (shard, canonical state, None), or (None, state, error response) if there is no shard."""
+    if not COUNTIES.available:
+        return None, state, {
+            "error": "County-level data is not installed",
+            "hint": "Build it from county scores with: python counties.py county_scores.csv"
+        }
+    county_year = COUNTIES.year or DATA_YEAR
+    if year is not None and year != county_year:
+        return None, state, {"error": f"County-level data is only available for {county_year}"}
+    name = COUNTIES.resolve_state(state)
+    shard = COUNTIES.get(name) if name is not None else None
+    table = TABLE
+    code = table.state_labels.resolve(state) if table is not None else None
+    if shard is None and code is not None:
+        # A real state, just not one the county data covers
+        return None, table.states[code], {
+            "error": f"No county data for {table.states[code]}",
+            "states_with_county_data": COUNTIES.state_labels.labels,
+        }
+    if shard is None:
+        problem = _invalid_label(COUNTIES.state_labels, state, "state", "list_states")
+        return None, state, {
+            "error": "County-level data is not available for this state",
+            "suggestions": [problem] if problem else [f"No county data for {state}"],
+        }
+    return shard, name, None
+
+
+def _county_not_found(shard: ScoreTable, state: str, county: str, corp_type: str, emp_size: str) -> dict:
+    """Build the error response for a county combination that is not in the shard."""
+    county_problem = _invalid_label(shard.state_labels, county, "county", "top_counties")
+    suggestions = ([county_problem] if county_problem else []) + _group_problems(shard, corp_type, emp_size)
+    return {
+        "error": "No data found for the specified combination",
+        "suggestions": suggestions if suggestions else ["This combination may not exist in the census data"],
+        "provided": {"state": state, "county": county, "corp_type": corp_type, "emp_size": emp_size},
+        "data_version": shard.version
+    }
+
+
+def _county_score_impl(state: str, county: str, corp_type: str, emp_size: str, year: int | None = None) -> dict:
+    """Internal implementation for a county-level opportunity score."""
+    shard, state_name, error = _county_shard(state, year)
+    if error is not None:
+        return error
+
+    row = shard.find(county, corp_type, emp_size)
+    if row < 0:
+        return _county_not_found(shard, state_name, county, corp_type, emp_size)
+
+    data = shard.record(row)
+    rank, total = shard.rank(row)
+    rollup = COUNTIES.state_info(state_name)["rollup"].get(f"{data['corp_type']}|{data['emp_size']}")
+    return {
+        "score": data["score"],
+        "interpretation": _interpret_score(data["score"]),
+        "confidence": data["confidence"],
+        "details": {
+            "state": state_name,
+            "county": data["state"],
+            "corporation_type": data["corp_type"],
+            "employee_size": data["emp_size"],
+            "establishments": data["establishments"],
+            "total_employees": data["employees"],
+            "avg_salary_thousands": round(data["avg_salary_thousands"], 2),
+        },
+        "county_rank": {"rank": rank, "out_of": total},
+        "state_rollup": rollup,
+        "methodology": _methodology(COUNTIES.year or DATA_YEAR, shard.score_method),
+        "data_version": shard.version
+    }
 
 
 def _interpret_score(score: float) -> str:
@@ -178,30 +934,220 @@ def _interpret_score(score: float) -> str:
         return "Limited - Challenging business environment"
 
 
-def _list_states_impl() -> dict:
+# Score band lower bounds and their interpretations, for vectorized lookups
+_SCORE_THRESHOLDS = [20, 40, 60, 80]
+_SCORE_LABELS = [_interpret_score(t) for t in [0, *_SCORE_THRESHOLDS]]
+
+
+def _methodology_resource(year: int) -> dict:
+    """The constant text that compact and columnar responses leave out."""
+    table = _table_for(year)
+    return {
+        "year": year,
+        "methodology": _methodology(year, table.score_method if table is not None else DEFAULT_SCORE_METHOD),
+        "interpretation": [
+            {"min_score": low, "interpretation": label} for low, label in zip([0, *_SCORE_THRESHOLDS], _SCORE_LABELS)
+        ],
+        "formats": FORMATS,
+    }
+
+
+@mcp.resource(
+    METHODOLOGY_URI,
+    name="methodology",
+    description="How scores are produced and how to read them, for the current data year",
+    mime_type="application/json",
+)
+def methodology() -> dict:
+    return _methodology_resource(DATA_YEAR)
+
+
+@mcp.resource(
+    METHODOLOGY_URI + "/{year}",
+    name="methodology_for_year",
+    description="How scores are produced and how to read them, for one Census data year",
+    mime_type="application/json",
+)
+def methodology_for_year(year: int) -> dict:
+    if year not in _available_years():
+        return _unknown_year(year)
+    return _methodology_resource(year)
+
+
+def _split_items(items: list) -> tuple[list[str], list[str], list[str], list[int]]:
+    """Split batch items into state, corp_type and emp_size columns.
+
+    Items may be {"state", "corp_type", "emp_size"} objects or 3-element
+    lists. Returns the three columns plus the indexes of malformed items.
+    """
+    states, corp_types, emp_sizes, malformed = [], [], [], []
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            state, corp_type, emp_size = item.get("state"), item.get("corp_type"), item.get("emp_size")
+        elif isinstance(item, (list, tuple)) and len(item) == 3:
+            state, corp_type, emp_size = item
+        else:
+            state = corp_type = emp_size = None
+        if not (isinstance(state, str) and isinstance(corp_type, str) and isinstance(emp_size, str)):
+            malformed.append(i)
+            state = corp_type = emp_size = ""
+        states.append(state)
+        corp_types.append(corp_type)
+        emp_sizes.append(emp_size)
+    return states, corp_types, emp_sizes, malformed
+
+
+def _encode(values: list[str], labels: LabelIndex) -> np.ndarray:
+    """Map labels to category codes (-1 if unknown), resolving each distinct label once."""
+    lookup = {}
+    for v in set(values):
+        code = labels.resolve(v)
+        lookup[v] = -1 if code is None else code
+    return np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+
+
+def _get_opportunity_scores_impl(
+    items: list, include_details: bool = True, year: int | None = None, interpretations: bool = True
+) -> dict:
+    """Internal implementation for scoring many combinations in one pass.
+
+    ``interpretations`` is False for the compact and columnar formats, which
+    leave interpretations out (the shaping there only drops dict keys, not
+    columns of the results table).
+    """
+    table = _table_for(year)
+    if table is None:
+        if year is not None and year != DATA_YEAR:
+            return _unknown_year(year)
+        return {
+            "error": "Lookup table not loaded. Please ensure score_lookup.csv exists.",
+            "hint": "Run the R model script first: Rscript model.R"
+        }
+    if len(items) > MAX_BATCH_ITEMS:
+        return {"error": f"Too many items ({len(items)}). The maximum per call is {MAX_BATCH_ITEMS}."}
+
+    states, corp_types, emp_sizes, malformed = _split_items(items)
+
+    # Resolve every item to a row offset at once
+    s = _encode(states, table.state_labels)
+    c = _encode(corp_types, table.corp_labels)
+    e = _encode(emp_sizes, table.size_labels)
+    valid = (s >= 0) & (c >= 0) & (e >= 0)
+    rows = np.full(len(items), -1, dtype=np.int32)
+    rows[valid] = table.row_index[s[valid], c[valid], e[valid]]
+
+    found = np.flatnonzero(rows >= 0)
+    hit_rows = rows[found]
+    scores = table.score[hit_rows]
+
+    columns = {
+        "index": found.tolist(),
+        "state": [table.states[i] for i in table.state_code[hit_rows].tolist()],
+        "corp_type": [table.corp_types[i] for i in table.corp_code[hit_rows].tolist()],
+        "emp_size": [table.emp_sizes[i] for i in table.size_code[hit_rows].tolist()],
+        "score": scores.tolist(),
+        "confidence": [table.confidence_levels[i] for i in table.confidence_code[hit_rows].tolist()],
+    }
+    if include_details:
+        if interpretations:
+            bands = np.searchsorted(_SCORE_THRESHOLDS, scores, side="right")
+            columns["interpretation"] = [_SCORE_LABELS[b] for b in bands.tolist()]
+        columns["establishments"] = table.establishments[hit_rows].tolist()
+        columns["total_employees"] = table.employees[hit_rows].tolist()
+        columns["avg_salary_thousands"] = [round(v, 2) for v in table.avg_salary_thousands[hit_rows].tolist()]
+
+    errors = []
+    malformed_set = set(malformed)
+    for i in np.flatnonzero(rows < 0).tolist():
+        if i in malformed_set:
+            errors.append({"index": i, "error": "Each item needs string state, corp_type and emp_size values"})
+            continue
+        miss = _not_found(table, states[i], corp_types[i], emp_sizes[i])
+        errors.append({"index": i, "error": miss["error"], "suggestions": miss["suggestions"]})
+
+    return {
+        "count": len(items),
+        "found": len(found),
+        "fields": list(columns),
+        "results": [list(r) for r in zip(*columns.values())],
+        "errors": errors,
+        "methodology": _methodology(year or DATA_YEAR, table.score_method),
+        "data_version": table.version
+    }
+
+
+@mcp.tool(
+    description="""
+    Get business opportunity scores for many state, corporation type, and employee size
+    combinations in one call. Prefer this over repeated get_opportunity_score calls.
+
+    Returns a shared header: "fields" names the columns of each entry in "results",
+    and "index" gives the entry's position in the request. Items that could not be
+    scored are listed in "errors" with suggestions. Set include_details to false to
+    return only the score and confidence for each item.
+    """
+)
+@_instrumented
+def get_opportunity_scores(
+    items: Annotated[
+        list[dict[str, str] | list[str]],
+        "Combinations to score, as objects with state, corp_type and emp_size "
+        "(e.g., [{'state': 'Texas', 'corp_type': 's-corp', 'emp_size': '10-19'}]) or as [state, corp_type, emp_size] lists",
+    ],
+    include_details: Annotated[bool, "Include interpretation, establishments, employees and salary (default: true)"] = True,
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Get business opportunity scores for many combinations."""
+    return _tool_result(_uncached_response(
+        lambda: _get_opportunity_scores_impl(items, include_details, year, interpretations=format == "verbose"), format
+    ))
+
+
+def _list_states_impl(cursor: str | None = None) -> dict:
     """Internal implementation for listing states."""
-    if not STATES:
+    table = TABLE
+    if table is None:
         return {"error": "Data not loaded"}
 
-    sorted_states = sorted(STATES)
+    try:
+        page = plan_page(len(table.states), MAX_LIST_PAGE, cursor, table.version, ("list_states",))
+    except CursorError as e:
+        return {"error": str(e), "data_version": table.version}
+    sorted_states = list(table.states[page.start:page.stop])
     return {
-        "count": len(sorted_states),
+        "count": len(table.states),
         "states": sorted_states,
-        "note": "Use these exact state names when calling get_opportunity_score"
+        "next_cursor": page.next_cursor,
+        "note": "Use these exact state names when calling get_opportunity_score",
+        "data_version": table.version
     }
 
 
 @mcp.tool(
-    description="List all valid US states available in the dataset. Use these exact values when calling get_opportunity_score."
+    description=f"""
+    List all valid US states available in the dataset. Use these exact values when calling get_opportunity_score.
+    Returns up to {MAX_LIST_PAGE} states per call; pass next_cursor back as cursor for the rest.
+    """
 )
-def list_states() -> dict:
+@_instrumented
+def list_states(
+    cursor: Annotated[str | None, "Cursor from a previous page's next_cursor"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
     """Get list of all available states."""
-    return _list_states_impl()
+    return _tool_result(_cached_response(
+        "list_states",
+        lambda table: () if cursor is None else (cursor,),
+        lambda: _list_states_impl(cursor),
+        fmt=format,
+    ))
 
 
 def _list_corp_types_impl() -> dict:
     """Internal implementation for listing corp types."""
-    if not CORP_TYPES:
+    table = TABLE
+    if table is None:
         return {"error": "Data not loaded"}
 
     type_descriptions = {
@@ -215,65 +1161,95 @@ def _list_corp_types_impl() -> dict:
     }
 
     return {
-        "count": len(CORP_TYPES),
+        "count": len(table.corp_types),
         "corp_types": [
             {"code": ct, "description": type_descriptions.get(ct, ct)}
-            for ct in sorted(CORP_TYPES)
-        ]
+            for ct in table.corp_types
+        ],
+        "data_version": table.version
     }
 
 
 @mcp.tool(
     description="List all valid corporation types. Use these codes when calling get_opportunity_score."
 )
-def list_corp_types() -> dict:
+@_instrumented
+def list_corp_types(
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
     """Get list of all available corporation types."""
-    return _list_corp_types_impl()
+    return _tool_result(_cached_response("list_corp_types", lambda table: (), _list_corp_types_impl, fmt=format))
 
 
 def _list_emp_sizes_impl() -> dict:
     """Internal implementation for listing employee sizes."""
-    if not EMP_SIZES:
+    table = TABLE
+    if table is None:
         return {"error": "Data not loaded"}
 
-    size_order = ["1-4", "5-9", "10-19", "20-49", "50-99", "100-249", "250-499", "500-999", "1000+"]
-    sorted_sizes = sorted(EMP_SIZES, key=lambda x: size_order.index(x) if x in size_order else 99)
+    # Size bands are stored in EMP_SIZE_ORDER order
+    sorted_sizes = list(table.emp_sizes)
 
     return {
         "count": len(sorted_sizes),
         "emp_sizes": sorted_sizes,
-        "note": "Ranges represent number of employees at establishment"
+        "note": "Ranges represent number of employees at establishment",
+        "data_version": table.version
     }
 
 
 @mcp.tool(
     description="List all valid employee size categories. Use these codes when calling get_opportunity_score."
 )
-def list_emp_sizes() -> dict:
+@_instrumented
+def list_emp_sizes(
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
     """Get list of all available employee size categories."""
-    return _list_emp_sizes_impl()
+    return _tool_result(_cached_response("list_emp_sizes", lambda table: (), _list_emp_sizes_impl, fmt=format))
 
 
 @mcp.tool(
-    description="""
+    description=f"""
     Compare opportunity scores across multiple states for a given corporation type and employee size.
-    Useful for identifying the best locations for a specific business profile.
+    Useful for identifying the best locations for a specific business profile. Results are paged
+    {MAX_RANK_PAGE} at a time; pass next_cursor back as cursor for the next page.
     """
 )
+@_instrumented
 def compare_states(
     states: Annotated[list[str], "List of US states to compare (e.g., ['California', 'Texas', 'New York'])"],
     corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
     emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    cursor: Annotated[str | None, "Cursor from a previous page's next_cursor"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
 ) -> dict:
     """Compare opportunity scores across multiple states."""
+    return _tool_result(_cached_response(
+        "compare_states",
+        lambda table: (tuple(states), corp_type, emp_size, cursor),
+        lambda: _compare_states_impl(states, corp_type, emp_size, year, cursor),
+        year,
+        format,
+    ))
+
+
+def _compare_states_impl(
+    states: list[str], corp_type: str, emp_size: str, year: int | None = None, cursor: str | None = None
+) -> dict:
+    """Internal implementation for comparing states."""
+    table = _table_for(year)
+    if table is None and year is not None and year != DATA_YEAR:
+        return _unknown_year(year)
 
     results = []
     errors = []
 
     for state in states:
-        key = (state.lower().strip(), corp_type.lower().strip(), emp_size.lower().strip())
-        if key in LOOKUP_DATA:
-            data = LOOKUP_DATA[key]
+        row = table.find(state, corp_type, emp_size) if table is not None else -1
+        if row >= 0:
+            data = table.record(row)
             results.append({
                 "state": data["state"],
                 "score": data["score"],
@@ -286,73 +1262,1149 @@ def compare_states(
     # Sort by score descending
     results.sort(key=lambda x: x["score"], reverse=True)
 
-    return {
+    version = table.version if table is not None else None
+    try:
+        page = plan_page(len(results), MAX_RANK_PAGE, cursor, version, (tuple(states), corp_type, emp_size, year))
+    except CursorError as e:
+        return {"error": str(e), "data_version": version}
+
+    response = {
         "comparison": {
             "corp_type": corp_type,
             "emp_size": emp_size,
-            "results": results,
+            "results": results[page.start:page.stop],
             "best_state": results[0]["state"] if results else None,
             "worst_state": results[-1]["state"] if results else None,
         },
+        "next_cursor": page.next_cursor,
         "errors": errors if errors else None,
-        "summary": f"Compared {len(results)} states for {corp_type} businesses with {emp_size} employees"
+        "summary": f"Compared {len(results)} states for {corp_type} businesses with {emp_size} employees",
+        "data_version": table.version if table is not None else None
     }
+    if errors and table is not None:
+        state_problems = (_invalid_label(table.state_labels, s, "state", "list_states") for s in errors)
+        problems = _group_problems(table, corp_type, emp_size) + [p for p in state_problems if p]
+        if problems:
+            response["suggestions"] = problems
+    if year is not None:
+        response["year"] = year
+    return response
+
+
+def _top_states_impl(
+    corp_type: str, emp_size: str, n: int = 10, year: int | None = None, cursor: str | None = None
+) -> dict:
+    """Internal implementation for getting top states."""
+    table = _table_for(year)
+    if table is None and year is not None and year != DATA_YEAR:
+        return _unknown_year(year)
+    # Rows come from the precomputed score-ordered group index
+    rows = table.ranked_group(corp_type, emp_size) if table is not None else np.empty(0, dtype=np.int32)
+    query_corp_type, query_emp_size = _canonical_group(table, corp_type, emp_size)
+
+    version = table.version if table is not None else None
+    try:
+        page = plan_page(
+            min(max(n, 0), len(rows)), MAX_RANK_PAGE, cursor, version, (query_corp_type, query_emp_size, n, year)
+        )
+    except CursorError as e:
+        return {"error": str(e), "data_version": version}
 
+    matching = []
+    for i, row in enumerate(rows[page.start:page.stop].tolist(), page.start + 1):
+        data = table.record(row)
+        matching.append({
+            "rank": i,
+            "state": data["state"],
+            "score": data["score"],
+            "confidence": data["confidence"],
+            "establishments": data["establishments"],
+            "avg_salary_thousands": round(data["avg_salary_thousands"], 2)
+        })
 
-def _top_states_impl(corp_type: str, emp_size: str, n: int = 10) -> dict:
-    """Internal implementation for getting top states."""
+    response = {
+        "query": {
+            "corp_type": query_corp_type,
+            "emp_size": query_emp_size,
+            "requested": n
+        },
+        "top_states": matching,
+        "next_cursor": page.next_cursor,
+        "total_available": len(rows),
+        "data_version": table.version if table is not None else None
+    }
+    if not matching and table is not None:
+        problems = _group_problems(table, corp_type, emp_size)
+        if problems:
+            response["suggestions"] = problems
+    if year is not None:
+        response["year"] = year
+    return response
+
+
+@mcp.tool(
+    description=f"""
+    Get the top N states by opportunity score for a specific corporation type and employee size.
+    Useful for finding the best locations to establish or expand a business. Results are paged
+    {MAX_RANK_PAGE} at a time; pass next_cursor back as cursor for the next page.
+    """
+)
+@_instrumented
+def top_states(
+    corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
+    emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    n: Annotated[int, f"Number of top states to return, in pages of up to {MAX_RANK_PAGE} (default: 10)"] = 10,
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    cursor: Annotated[str | None, "Cursor from a previous page's next_cursor"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Get top N states by opportunity score."""
+    return _tool_result(_top_states_response(corp_type, emp_size, n, year, cursor, format))
+
+
+def _top_states_response(
+    corp_type: str, emp_size: str, n: int, year: int | None = None, cursor: str | None = None, fmt: str = "verbose"
+) -> CachedResponse:
+    """Cached, serialized top_states response."""
+    return _cached_response(
+        "top_states",
+        lambda table: (_group_key(table, corp_type, emp_size), n, cursor),
+        lambda: _top_states_impl(corp_type, emp_size, n, year, cursor),
+        year,
+        fmt,
+    )
+
+
+def _state_rank_impl(state: str, corp_type: str, emp_size: str, year: int | None = None) -> dict:
+    """Internal implementation for a state's rank within its group."""
+    table = _table_for(year)
+    if table is None:
+        if year is not None and year != DATA_YEAR:
+            return _unknown_year(year)
+        return {"error": "Data not loaded"}
+
+    row = table.find(state, corp_type, emp_size)
+    if row < 0:
+        return _not_found(table, state, corp_type, emp_size)
+
+    data = table.record(row)
+    rank, total = table.rank(row)
+    below = table.count_below(row)
+
+    response = {
+        "state": data["state"],
+        "corp_type": data["corp_type"],
+        "emp_size": data["emp_size"],
+        "score": data["score"],
+        "rank": rank,
+        "out_of": total,
+        "percentile": round(100 * below / (total - 1), 1) if total > 1 else 100.0,
+        "note": "Percentile is the share of other states in this group with a lower score",
+        "data_version": table.version
+    }
+    if year is not None:
+        response["year"] = year
+    return response
+
+
+@mcp.tool(
+    description="""
+    Get a state's rank and percentile among all states for a specific corporation type and employee size.
+    Rank 1 is the highest opportunity score in the group.
+    """
+)
+@_instrumented
+def state_rank(
+    state: Annotated[str, "US State name (e.g., 'California', 'Texas', 'New York')"],
+    corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
+    emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    county: Annotated[str | None, "County within the state (e.g., 'Harris County'); needs county data"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Get a state's rank and percentile within its group."""
+    if county is not None:
+        return _tool_result(_uncached_response(lambda: _county_rank_impl(state, county, corp_type, emp_size, year), format))
+    return _tool_result(_state_rank_response(state, corp_type, emp_size, year, format))
+
+
+def _county_rank_impl(state: str, county: str, corp_type: str, emp_size: str, year: int | None = None) -> dict:
+    """Internal implementation for a county's rank among its state's counties."""
+    shard, state_name, error = _county_shard(state, year)
+    if error is not None:
+        return error
+
+    row = shard.find(county, corp_type, emp_size)
+    if row < 0:
+        return _county_not_found(shard, state_name, county, corp_type, emp_size)
+
+    data = shard.record(row)
+    rank, total = shard.rank(row)
+    below = shard.count_below(row)
+    return {
+        "state": state_name,
+        "county": data["state"],
+        "corp_type": data["corp_type"],
+        "emp_size": data["emp_size"],
+        "score": data["score"],
+        "rank": rank,
+        "out_of": total,
+        "percentile": round(100 * below / (total - 1), 1) if total > 1 else 100.0,
+        "note": "Rank and percentile are among the counties of this state in the same group",
+        "data_version": shard.version
+    }
+
+
+def _state_rank_response(
+    state: str, corp_type: str, emp_size: str, year: int | None = None, fmt: str = "verbose"
+) -> CachedResponse:
+    """Cached, serialized state_rank response."""
+    return _cached_response(
+        "state_rank",
+        lambda table: _score_key(table, state, corp_type, emp_size),
+        lambda: _state_rank_impl(state, corp_type, emp_size, year),
+        year,
+        fmt,
+    )
+
+
+def _states_in_score_range_impl(
+    corp_type: str,
+    emp_size: str,
+    min_score: float = 0,
+    max_score: float = 100,
+    year: int | None = None,
+    cursor: str | None = None,
+) -> dict:
+    """Internal implementation for finding states within a score range."""
+    table = _table_for(year)
+    if table is None:
+        if year is not None and year != DATA_YEAR:
+            return _unknown_year(year)
+        return {"error": "Data not loaded"}
+    if _finite(min_score) is None or _finite(max_score) is None:
+        return {"error": "min_score and max_score must be finite numbers", "data_version": table.version}
+
+    group = table.group_slice(corp_type, emp_size)
+    rows = table.score_range(corp_type, emp_size, min_score, max_score)
+    query_corp_type, query_emp_size = _canonical_group(table, corp_type, emp_size)
+    try:
+        page = plan_page(
+            len(rows), MAX_RANK_PAGE, cursor, table.version, (query_corp_type, query_emp_size, min_score, max_score, year)
+        )
+    except CursorError as e:
+        return {"error": str(e), "data_version": table.version}
+
+    results = []
+    for row in rows[page.start:page.stop].tolist():
+        data = table.record(row)
+        results.append({
+            "rank": int(table.group_rank[row]),
+            "state": data["state"],
+            "score": data["score"],
+            "confidence": data["confidence"],
+        })
+
+    response = {
+        "query": {
+            "corp_type": query_corp_type,
+            "emp_size": query_emp_size,
+            "min_score": min_score,
+            "max_score": max_score
+        },
+        "states": results,
+        "count": len(rows),
+        "next_cursor": page.next_cursor,
+        "total_available": group.stop - group.start,
+        "data_version": table.version
+    }
+    if group.stop == group.start:
+        problems = _group_problems(table, corp_type, emp_size)
+        if problems:
+            response["suggestions"] = problems
+    if year is not None:
+        response["year"] = year
+    return response
+
+
+@mcp.tool(
+    description=f"""
+    Find all states whose opportunity score falls within a range for a specific corporation type
+    and employee size. Results are ordered by score, highest first, and paged {MAX_RANK_PAGE} at a
+    time; pass next_cursor back as cursor for the next page.
+    """
+)
+@_instrumented
+def states_in_score_range(
+    corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
+    emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    min_score: Annotated[float, "Minimum score, inclusive (default: 0)"] = 0,
+    max_score: Annotated[float, "Maximum score, inclusive (default: 100)"] = 100,
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    cursor: Annotated[str | None, "Cursor from a previous page's next_cursor"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Get states scoring within a range."""
+    return _tool_result(_states_in_score_range_response(corp_type, emp_size, min_score, max_score, year, cursor, format))
+
+
+def _states_in_score_range_response(
+    corp_type: str,
+    emp_size: str,
+    min_score: float,
+    max_score: float,
+    year: int | None = None,
+    cursor: str | None = None,
+    fmt: str = "verbose",
+) -> CachedResponse:
+    """Cached, serialized states_in_score_range response."""
+    return _cached_response(
+        "states_in_score_range",
+        lambda table: (_group_key(table, corp_type, emp_size), min_score, max_score, cursor),
+        lambda: _states_in_score_range_impl(corp_type, emp_size, min_score, max_score, year, cursor),
+        year,
+        fmt,
+    )
+
+
+def _top_counties_impl(state: str, corp_type: str, emp_size: str, n: int = 10, year: int | None = None) -> dict:
+    """Internal implementation for ranking a state's counties."""
+    shard, state_name, error = _county_shard(state, year)
+    if error is not None:
+        return error
+
+    rows = shard.ranked_group(corp_type, emp_size)
     matching = []
-    corp_key = corp_type.lower().strip()
-    emp_key = emp_size.lower().strip()
+    for i, row in enumerate(rows[:min(max(n, 0), len(rows))].tolist(), 1):
+        data = shard.record(row)
+        matching.append({
+            "rank": i,
+            "county": data["state"],
+            "score": data["score"],
+            "confidence": data["confidence"],
+            "establishments": data["establishments"],
+            "avg_salary_thousands": round(data["avg_salary_thousands"], 2)
+        })
+
+    query_corp_type, query_emp_size = _canonical_group(shard, corp_type, emp_size)
+    response = {
+        "query": {"state": state_name, "corp_type": query_corp_type, "emp_size": query_emp_size, "requested": n},
+        "top_counties": matching,
+        "total_available": len(rows),
+        "state_rollup": COUNTIES.state_info(state_name)["rollup"].get(f"{query_corp_type}|{query_emp_size}"),
+        "data_version": shard.version
+    }
+    if not matching:
+        problems = _group_problems(shard, corp_type, emp_size)
+        if problems:
+            response["suggestions"] = problems
+    return response
 
-    for key, data in LOOKUP_DATA.items():
-        if key[1] == corp_key and key[2] == emp_key:
-            matching.append({
-                "rank": 0,  # Will be set after sorting
-                "state": data["state"],
-                "score": data["score"],
-                "confidence": data["confidence"],
-                "establishments": data["establishments"],
-                "avg_salary_thousands": round(data["avg_salary_thousands"], 2)
-            })
 
-    # Sort by score descending
-    matching.sort(key=lambda x: x["score"], reverse=True)
+@mcp.tool(
+    description="""
+    Get the top N counties within a state by opportunity score for a corporation type and
+    employee size, with the state's county totals for that group. Requires county-level data;
+    use get_opportunity_score or state_rank with a county for a single county.
+    """
+)
+@_instrumented
+def top_counties(
+    state: Annotated[str, "US State name (e.g., 'California', 'Texas', 'New York')"],
+    corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
+    emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    n: Annotated[int, "Number of top counties to return (default: 10)"] = 10,
+    year: Annotated[int | None, "Census data year (default: the year of the county data)"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Get top N counties in a state by opportunity score."""
+    return _tool_result(_uncached_response(lambda: _top_counties_impl(state, corp_type, emp_size, n, year), format))
+
+
+def _finite(value) -> float | None:
+    """Coerce a number or numeric string to a finite float, or None if it is not one."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _export_filter(
+    table: ScoreTable,
+    states: list[str] | None = None,
+    corp_types: list[str] | None = None,
+    emp_sizes: list[str] | None = None,
+    confidence: list[str] | None = None,
+    min_score: float | None = None,
+    max_score: float | None = None,
+) -> tuple[RowFilter, list[str]]:
+    """Resolve export filter labels to a RowFilter, plus messages for unrecognized ones."""
+    problems = []
+
+    def codes(values, labels, field, list_tool):
+        if not values:
+            return None
+        resolved = []
+        for value in values:
+            problem = _invalid_label(labels, value, field, list_tool)
+            if problem:
+                problems.append(problem)
+            else:
+                resolved.append(labels.resolve(value))
+        return resolved
+
+    confidence_codes = None
+    if confidence:
+        levels = {level.lower(): i for i, level in enumerate(table.confidence_levels)}
+        confidence_codes = []
+        for value in confidence:
+            code = levels.get(value.strip().lower())
+            if code is None:
+                problems.append(
+                    f"Invalid confidence '{value}'. Valid options: {', '.join(table.confidence_levels)}."
+                )
+            else:
+                confidence_codes.append(code)
+
+    bounds = {"min_score": min_score, "max_score": max_score}
+    for name, value in bounds.items():
+        if value is not None:
+            bounds[name] = _finite(value)
+            if bounds[name] is None:
+                problems.append(f"{name} must be a finite number, not {value!r}")
+
+    row_filter = RowFilter(
+        table,
+        state_codes=codes(states, table.state_labels, "state", "list_states"),
+        corp_codes=codes(corp_types, table.corp_labels, "corp_type", "list_corp_types"),
+        size_codes=codes(emp_sizes, table.size_labels, "emp_size", "list_emp_sizes"),
+        confidence_codes=confidence_codes,
+        min_score=bounds["min_score"],
+        max_score=bounds["max_score"],
+    )
+    return row_filter, problems
+
+
+def _export_scores_impl(
+    states: list[str] | None = None,
+    corp_types: list[str] | None = None,
+    emp_sizes: list[str] | None = None,
+    confidence: list[str] | None = None,
+    min_score: float | None = None,
+    max_score: float | None = None,
+    format: str = "json",
+    cursor: str | None = None,
+    page_size: int = 1000,
+) -> dict:
+    """Internal implementation for exporting a page of rows."""
+    table = TABLE
+    if table is None:
+        return {"error": "Data not loaded"}
+    if format not in ("json", "csv", "ndjson"):
+        return {"error": f"Unsupported format '{format}'. Use json, csv or ndjson (Arrow is available from the /export route)."}
+
+    row_filter, problems = _export_filter(table, states, corp_types, emp_sizes, confidence, min_score, max_score)
+    if problems:
+        return {"error": "Invalid filter", "suggestions": problems, "data_version": table.version}
+
+    page_size = max(1, min(page_size, MAX_EXPORT_PAGE))
+    try:
+        plan = plan_export(table, row_filter, cursor=cursor, limit=page_size)
+    except ExportError as e:
+        return {"error": str(e), "data_version": table.version}
+
+    chunks = row_filter.chunks(plan.start, plan.stop)
+    response = {"format": format}
+    if format == "json":
+        rows = [record for chunk in chunks for record in records(table, chunk)]
+        response.update({"fields": list(EXPORT_FIELDS), "rows": rows, "returned": len(rows)})
+    else:
+        data = b"".join(encode_chunks(format, table, chunks, header=plan.offset == 0)).decode("utf-8")
+        response.update({"data": data, "returned": min(page_size, plan.total - plan.offset)})
+    response.update({
+        "offset": plan.offset,
+        "total_matching": plan.total,
+        "next_cursor": plan.next_cursor,
+        "data_version": table.version,
+    })
+    return response
+
+
+@mcp.tool(
+    description="""
+    Export rows of the score table, optionally filtered by states, corporation types,
+    employee sizes, confidence levels and a score range. Omitted filters match everything.
 
-    # Add ranks
-    for i, item in enumerate(matching[:n], 1):
-        item["rank"] = i
+    Returns one page of rows (format "json" gives a "fields" header and "rows" lists;
+    "csv" and "ndjson" return the rows as text in "data"). Pass "next_cursor" back as
+    cursor to fetch the following page; it is null once the export is complete.
+    For bulk downloads use the /export HTTP route, which streams without a page limit.
+    """
+)
+@_instrumented
+def export_scores(
+    states: Annotated[list[str] | None, "States to include (default: all)"] = None,
+    corp_types: Annotated[list[str] | None, "Corporation types to include (default: all)"] = None,
+    emp_sizes: Annotated[list[str] | None, "Employee size categories to include (default: all)"] = None,
+    confidence: Annotated[list[str] | None, "Confidence levels to include: high, medium, low (default: all)"] = None,
+    min_score: Annotated[float | None, "Minimum score, inclusive"] = None,
+    max_score: Annotated[float | None, "Maximum score, inclusive"] = None,
+    format: Annotated[str, "Page format: json, csv or ndjson (default: json)"] = "json",
+    cursor: Annotated[str | None, "Cursor from a previous page's next_cursor"] = None,
+    page_size: Annotated[int, f"Rows per page (default: 1000, max: {MAX_EXPORT_PAGE})"] = 1000,
+) -> dict:
+    """Export a page of score table rows."""
+    return _tool_result(encode_response(
+        _export_scores_impl(states, corp_types, emp_sizes, confidence, min_score, max_score, format, cursor, page_size)
+    ))
+
+
+# Filter keys accepted by query_scores and the export_filter arguments they map to
+_QUERY_FILTERS = {"state": "states", "corp_type": "corp_types", "emp_size": "emp_sizes", "confidence": "confidence"}
+
+
+def _query_scores_impl(
+    filters: dict | None = None,
+    group_by: list[str] | None = None,
+    aggregates: list[str] | None = None,
+    order_by: list[str] | None = None,
+    limit: int = 50,
+) -> dict:
+    """Internal implementation for grouped aggregation queries."""
+    table = TABLE
+    if table is None:
+        return {"error": "Data not loaded"}
+
+    filters = dict(filters or {})
+    group_by = list(group_by or [])
+    aggregates = list(aggregates or ["count", "mean(score)"])
+    order_by = list(order_by or [])
+    limit = max(0, min(limit, MAX_QUERY_GROUPS))
+
+    label_filters = {}
+    for key, value in filters.items():
+        if key in _QUERY_FILTERS:
+            values = [value] if isinstance(value, str) else value
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                return {
+                    "error": f"Filter '{key}' takes a label or a list of labels, not {value!r}",
+                    "data_version": table.version
+                }
+            label_filters[_QUERY_FILTERS[key]] = values
+        elif key not in ("min_score", "max_score"):
+            return {
+                "error": f"Unknown filter '{key}'",
+                "hint": f"Filter on any of: {', '.join([*_QUERY_FILTERS, 'min_score', 'max_score'])}",
+                "data_version": table.version
+            }
+
+    row_filter, problems = _export_filter(
+        table, min_score=filters.get("min_score"), max_score=filters.get("max_score"), **label_filters
+    )
+    if problems:
+        return {"error": "Invalid filter", "suggestions": problems, "data_version": table.version}
+
+    try:
+        result = run_query(table, row_filter, group_by, [parse_aggregate(a) for a in aggregates], order_by, limit)
+    except QueryError as e:
+        return {"error": str(e), "data_version": table.version}
 
     return {
         "query": {
-            "corp_type": corp_type,
-            "emp_size": emp_size,
-            "requested": n
+            "filters": filters,
+            "group_by": group_by,
+            "aggregates": aggregates,
+            "order_by": order_by,
+            "limit": limit
         },
-        "top_states": matching[:n],
-        "total_available": len(matching)
+        **result,
+        "returned": len(result["results"]),
+        "data_version": table.version
     }
 
 
 @mcp.tool(
     description="""
-    Get the top N states by opportunity score for a specific corporation type and employee size.
-    Useful for finding the best locations to establish or expand a business.
+    Run an aggregate query over the score table in one call, instead of looping over
+    get_opportunity_score.
+
+    - filters: optional object with state, corp_type, emp_size, confidence (a value or a
+      list of values), min_score and max_score
+    - group_by: any of "state", "corp_type", "emp_size" (empty for one overall group)
+    - aggregates: "count", "mean(field)", "min(field)", "max(field)", "sum(field)" or
+      "weighted_mean(field, weight_field)" over score, establishments, employees or
+      avg_salary_thousands (default: count and mean(score))
+    - order_by: group fields or aggregate names such as "mean_score"; prefix "-" for descending
+    - limit: maximum groups returned (default: 50)
+
+    Example: average score by state for s-corps weighted by establishments, best first:
+    filters={"corp_type": "s-corp"}, group_by=["state"],
+    aggregates=["weighted_mean(score, establishments)"],
+    order_by=["-weighted_mean_score_by_establishments"].
+
+    Returns a "fields" header and one "results" list per group.
     """
 )
-def top_states(
+@_instrumented
+def query_scores(
+    filters: Annotated[dict[str, str | list[str] | float] | None, "Row filters, e.g. {'corp_type': 's-corp', 'emp_size': ['20-49', '100-249']}"] = None,
+    group_by: Annotated[list[str] | None, "Fields to group by: state, corp_type, emp_size"] = None,
+    aggregates: Annotated[list[str] | None, "Aggregates, e.g. ['count', 'mean(score)', 'weighted_mean(score, establishments)']"] = None,
+    order_by: Annotated[list[str] | None, "Sort keys, e.g. ['-mean_score']"] = None,
+    limit: Annotated[int, f"Maximum groups to return (default: 50, max: {MAX_QUERY_GROUPS})"] = 50,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Run a grouped aggregation over the score table."""
+    return _tool_result(_cached_response(
+        "query_scores",
+        lambda table: encode_response({
+            "filters": filters, "group_by": group_by, "aggregates": aggregates, "order_by": order_by, "limit": limit
+        }).body,
+        lambda: _query_scores_impl(filters, group_by, aggregates, order_by, limit),
+        fmt=format,
+    ))
+
+
+def _scorer_for(table: ScoreTable) -> WeightedScorer:
+    """Return the weighted scorer for a table, building it on first use."""
+    global _scorer
+
+    scorer = _scorer
+    if scorer is None or scorer.table is not table:
+        with _scorer_lock:
+            if _scorer is None or _scorer.table is not table:
+                _scorer = WeightedScorer(table, max_entries=SCORER_MAX_ENTRIES)
+            scorer = _scorer
+    return scorer
+
+
+def _score_with_weights_impl(
+    corp_type: str,
+    emp_size: str,
+    salary_weight: float = DEFAULT_WEIGHTS["salary"],
+    momentum_weight: float | None = None,
+    density_weight: float = DEFAULT_WEIGHTS["density"],
+    n: int = 10,
+) -> dict:
+    """Internal implementation for ranking states under custom weights.
+
+    An unset momentum weight is the model's 0.35 when the table has payroll
+    momentum, and 0 when it does not.
+    """
+    table = TABLE
+    if table is None:
+        return {"error": "Data not loaded"}
+
+    scorer = _scorer_for(table)
+    if momentum_weight is None:
+        momentum_weight = scorer.default_weights()["momentum"]
+    weights = {"salary": salary_weight, "momentum": momentum_weight, "density": density_weight}
+    try:
+        rescored = scorer.rescore(weights)
+    except ScoringError as e:
+        return {"error": str(e), "data_version": table.version}
+
+    group = table.group_slice(corp_type, emp_size)
+    rows = rescored.ranked_rows[group]
+
+    matching = []
+    for i, row in enumerate(rows[:max(n, 0)].tolist(), 1):
+        data = table.record(row)
+        matching.append({
+            "rank": i,
+            "state": data["state"],
+            "score": float(rescored.score[row]),
+            "published_score": data["score"],
+            "published_rank": int(table.group_rank[row]),
+            "confidence": data["confidence"],
+            "establishments": data["establishments"],
+            "avg_salary_thousands": round(data["avg_salary_thousands"], 2)
+        })
+
+    query_corp_type, query_emp_size = _canonical_group(table, corp_type, emp_size)
+    response = {
+        "query": {
+            "corp_type": query_corp_type,
+            "emp_size": query_emp_size,
+            "requested": n,
+            "weights": dict(zip(weights, rescored.weights))
+        },
+        "top_states": matching,
+        "total_available": len(rows),
+        "note": "Scores are recomputed from the model's weighted formula (weights scaled to sum to 1); "
+                "published_score is the served model score",
+        "data_version": table.version
+    }
+    if not scorer.has_momentum:
+        response["warnings"] = ["This table has no payroll momentum data, so momentum is not weighted"]
+    if not matching:
+        problems = _group_problems(table, corp_type, emp_size)
+        if problems:
+            response["suggestions"] = problems
+    return response
+
+
+@mcp.tool(
+    description="""
+    Rank states for a corporation type and employee size using your own weights for the three
+    score components: average salary, economic momentum (payroll growth) and establishment density.
+    The defaults (0.4, 0.35, 0.25) match the published model; weights are scaled to sum to 1.
+    When the loaded table has no payroll momentum data, momentum defaults to 0 and cannot be weighted.
+    Returns the top N states in the same shape as top_states, with each state's published score
+    and rank for comparison.
+    """
+)
+@_instrumented
+def score_with_weights(
     corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
     emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    salary_weight: Annotated[float, "Weight for average salary (default: 0.4)"] = DEFAULT_WEIGHTS["salary"],
+    momentum_weight: Annotated[float | None, "Weight for payroll momentum (default: 0.35, or 0 without momentum data)"] = None,
+    density_weight: Annotated[float, "Weight for establishment density (default: 0.25)"] = DEFAULT_WEIGHTS["density"],
     n: Annotated[int, "Number of top states to return (default: 10)"] = 10,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
 ) -> dict:
-    """Get top N states by opportunity score."""
-    return _top_states_impl(corp_type, emp_size, n)
+    """Rank states by opportunity score under custom weights."""
+    return _tool_result(_cached_response(
+        "score_with_weights",
+        lambda table: (_group_key(table, corp_type, emp_size), salary_weight, momentum_weight, density_weight, n),
+        lambda: _score_with_weights_impl(corp_type, emp_size, salary_weight, momentum_weight, density_weight, n),
+        fmt=format,
+    ))
+
+
+# Matrix axis -> (ScoreTable dictionary, label index, list tool), in cube order
+_MATRIX_AXES = {
+    "state": ("states", "state_labels", "list_states"),
+    "corp_type": ("corp_types", "corp_labels", "list_corp_types"),
+    "emp_size": ("emp_sizes", "size_labels", "list_emp_sizes"),
+}
+
+MATRIX_VALUES = ["score", "establishments", "employees", "avg_salary_thousands"]
+
+
+def _score_matrix_impl(
+    rows: str,
+    columns: str,
+    state: str | None = None,
+    corp_type: str | None = None,
+    emp_size: str | None = None,
+    value: str = "score",
+    row_labels: list[str] | None = None,
+    column_labels: list[str] | None = None,
+    year: int | None = None,
+) -> dict:
+    """Internal implementation for slicing the dense score tensor."""
+    table = _table_for(year)
+    if table is None:
+        if year is not None and year != DATA_YEAR:
+            return _unknown_year(year)
+        return {"error": "Data not loaded"}
+
+    axes = list(_MATRIX_AXES)
+    if rows not in axes or columns not in axes or rows == columns:
+        return {
+            "error": f"rows and columns must be two different axes out of: {', '.join(axes)}",
+            "data_version": table.version,
+        }
+    if value not in MATRIX_VALUES:
+        return {"error": f"Unknown value '{value}'. Use: {', '.join(MATRIX_VALUES)}.", "data_version": table.version}
+
+    fixed_axis = next(a for a in axes if a not in (rows, columns))
+    fixed_label = {"state": state, "corp_type": corp_type, "emp_size": emp_size}[fixed_axis]
+    if not fixed_label:
+        return {
+            "error": f"Pass {fixed_axis} to fix the axis that is neither rows nor columns",
+            "data_version": table.version,
+        }
+
+    problems = []
+
+    def codes(axis: str, wanted: list[str] | None) -> np.ndarray:
+        dictionary, labels, list_tool = _MATRIX_AXES[axis]
+        if not wanted:
+            return np.arange(len(getattr(table, dictionary)))
+        found = []
+        for label in wanted:
+            code = getattr(table, labels).resolve(label)
+            if code is None:
+                problems.append(_invalid_label(getattr(table, labels), label, axis, list_tool))
+            else:
+                found.append(code)
+        return np.array(list(dict.fromkeys(found)), dtype=np.intp)
+
+    row_codes = codes(rows, row_labels)
+    column_codes = codes(columns, column_labels)
+    fixed_codes = codes(fixed_axis, [fixed_label])
+    if problems:
+        return {"error": "Invalid labels", "suggestions": problems, "data_version": table.version}
+
+    cells = len(row_codes) * len(column_codes)
+    if cells > MAX_MATRIX_CELLS:
+        return {
+            "error": f"Slice has {cells} cells; at most {MAX_MATRIX_CELLS} are returned. "
+                     "Pass row_labels or column_labels to narrow it.",
+            "data_version": table.version,
+        }
+
+    # Broadcast the row codes down and the column codes across, in cube axis order
+    index = [None, None, None]
+    index[axes.index(rows)] = row_codes[:, None]
+    index[axes.index(columns)] = column_codes[None, :]
+    index[axes.index(fixed_axis)] = fixed_codes[0]
+    index = tuple(index)
+
+    present = table.present[index]
+    if value == "score":
+        values = table.score_cube[index]
+    else:
+        values = getattr(table, value)[np.where(present, table.row_index[index], 0)]
+        if value == "avg_salary_thousands":
+            values = np.round(values, 2)
+    matrix = values.astype(object)
+    matrix[~present] = None
+
+    row_dictionary = getattr(table, _MATRIX_AXES[rows][0])
+    column_dictionary = getattr(table, _MATRIX_AXES[columns][0])
+    response = {
+        "query": {
+            "rows": rows,
+            "columns": columns,
+            fixed_axis: getattr(table, _MATRIX_AXES[fixed_axis][0])[fixed_codes[0]],
+            "value": value
+        },
+        "row_labels": [row_dictionary[c] for c in row_codes.tolist()],
+        "column_labels": [column_dictionary[c] for c in column_codes.tolist()],
+        "values": matrix.tolist(),
+        "missing": cells - int(np.count_nonzero(present)),
+        "data_version": table.version
+    }
+    if year is not None:
+        response["year"] = year
+    return response
+
+
+@mcp.tool(
+    description=f"""
+    Get a whole 2-D slice of the score table in one call, e.g. every state by employee size
+    for one corporation type, or corporation type by employee size for one state.
+    Choose two axes out of state, corp_type and emp_size for rows and columns, and fix the
+    third by passing its parameter. Returns row_labels, column_labels and a values matrix
+    (values[i][j] is row i, column j; null where the combination has no data).
+    value selects what fills the cells: {", ".join(MATRIX_VALUES)}. Use row_labels and
+    column_labels to restrict the slice; at most {MAX_MATRIX_CELLS} cells are returned.
+    """
+)
+@_instrumented
+def score_matrix(
+    rows: Annotated[str, "Axis for the matrix rows: state, corp_type or emp_size"],
+    columns: Annotated[str, "Axis for the matrix columns: state, corp_type or emp_size"],
+    state: Annotated[str | None, "State to fix when neither rows nor columns is state"] = None,
+    corp_type: Annotated[str | None, "Corporation type to fix when neither rows nor columns is corp_type"] = None,
+    emp_size: Annotated[str | None, "Employee size to fix when neither rows nor columns is emp_size"] = None,
+    value: Annotated[str, "Cell value: score, establishments, employees or avg_salary_thousands (default: score)"] = "score",
+    row_labels: Annotated[list[str] | None, "Only these rows, in this order (default: all)"] = None,
+    column_labels: Annotated[list[str] | None, "Only these columns, in this order (default: all)"] = None,
+    year: Annotated[int | None, "Census data year (default: the current vintage; see /stats for others)"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Slice the score tensor into a labelled matrix."""
+    return _tool_result(_cached_response(
+        "score_matrix",
+        lambda table: (
+            rows, columns, state, corp_type, emp_size, value,
+            tuple(row_labels) if row_labels else None, tuple(column_labels) if column_labels else None,
+        ),
+        lambda: _score_matrix_impl(rows, columns, state, corp_type, emp_size, value, row_labels, column_labels, year),
+        year,
+        format,
+    ))
+
+
+TREND_ORDERS = ["score_change", "establishment_growth_pct", "rank_change", "state"]
+
+
+def _nullable(values: np.ndarray, digits: int | None = None) -> list:
+    """Convert a float array to a list with None in place of NaN, and ints where digits is None."""
+    missing = np.isnan(values)
+    if digits is None:
+        out = np.where(missing, 0, values).astype(np.int64).astype(object)
+    else:
+        out = np.round(values, digits).astype(object)
+    out[missing] = None
+    return out.tolist()
+
+
+def _vintage_versions(years: list[int] | None) -> tuple:
+    """(year, data version) for each requested year (default: every year), for cache keys.
+
+    A vintage file rewritten on disk gets a new version once it is reloaded,
+    so responses built from the old file are not served for it.
+    """
+    versions = []
+    for year in sorted(set(years)) if years else _available_years():
+        table = _table_for(year)
+        versions.append((year, table.version if table is not None else None))
+    return tuple(versions)
+
+
+def _score_trend_impl(
+    corp_type: str,
+    emp_size: str,
+    states: list[str] | None = None,
+    years: list[int] | None = None,
+    order_by: str = "score_change",
+    n: int = 10,
+) -> dict:
+    """Internal implementation for year-over-year changes within a group."""
+    current = TABLE
+    available = _available_years()
+    years = sorted(set(years)) if years else available
+    missing = [y for y in years if y not in available]
+    if missing:
+        return _unknown_year(missing[0])
+    if len(years) < 2:
+        return {
+            "error": "score_trend needs at least two years of data",
+            "available_years": available,
+            "data_version": current.version if current is not None else None,
+        }
+    if order_by not in TREND_ORDERS:
+        return {
+            "error": f"Unknown order_by '{order_by}'. Use: {', '.join(TREND_ORDERS)}.",
+            "data_version": current.version if current is not None else None,
+        }
+
+    tables = [_table_for(y) for y in years]
+    if any(t is None for t in tables):
+        return _unknown_year(years[tables.index(None)])
+    latest = tables[-1]
+
+    problems = _group_problems(latest, corp_type, emp_size)
+    names = sorted(set().union(*(t.states for t in tables)))
+    if states:
+        wanted = []
+        for state in states:
+            code = latest.state_labels.resolve(state)
+            if code is None:
+                problems.append(_invalid_label(latest.state_labels, state, "state", "list_states"))
+            else:
+                wanted.append(latest.states[code])
+        names = list(dict.fromkeys(wanted))
+    if problems:
+        return {
+            "error": "Invalid labels",
+            "suggestions": problems,
+            "data_version": current.version if current is not None else None,
+        }
+
+    # One (year, state) grid per measure; each vintage fills its row with one gather
+    shape = (len(years), len(names))
+    score, establishments, rank = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+    for y, table in enumerate(tables):
+        c = table.corp_labels.resolve(corp_type)
+        e = table.size_labels.resolve(emp_size)
+        if c is None or e is None:
+            continue
+        position = {name: i for i, name in enumerate(table.states)}
+        codes = np.array([position.get(name, -1) for name in names], dtype=np.intp)
+        rows = np.where(codes >= 0, table.row_index[codes, c, e], -1)
+        hit = rows >= 0
+        score[y, hit] = table.score[rows[hit]]
+        establishments[y, hit] = table.establishments[rows[hit]]
+        rank[y, hit] = table.group_rank[rows[hit]]
+
+    # Changes from the first to the last requested year
+    score_change = score[-1] - score[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(establishments[0] > 0, (establishments[-1] / establishments[0] - 1) * 100, np.nan)
+    rank_change = rank[0] - rank[-1]
+
+    present = ~np.all(np.isnan(score), axis=0)
+    if order_by == "state":
+        order = np.arange(len(names))
+    else:
+        key = {"score_change": score_change, "establishment_growth_pct": growth, "rank_change": rank_change}[order_by]
+        # Largest first, states without both endpoints last
+        order = np.lexsort((np.arange(len(names)), np.nan_to_num(-key, nan=np.inf)))
+    order = order[present[order]][:max(n, 0)]
+
+    columns = {
+        "scores": _nullable(score[:, order].T, 1),
+        "establishments": _nullable(establishments[:, order].T),
+        "ranks": _nullable(rank[:, order].T),
+        "score_change": _nullable(score_change[order], 1),
+        "establishment_growth_pct": _nullable(growth[order], 1),
+        "rank_change": _nullable(rank_change[order]),
+    }
+    trends = [
+        {"state": names[i], **{field: values[j] for field, values in columns.items()}}
+        for j, i in enumerate(order.tolist())
+    ]
+
+    query_corp_type, query_emp_size = _canonical_group(latest, corp_type, emp_size)
+    return {
+        "query": {"corp_type": query_corp_type, "emp_size": query_emp_size, "years": years, "order_by": order_by},
+        "trends": trends,
+        "total_available": int(np.count_nonzero(present)),
+        "note": f"scores, establishments and ranks are listed per year ({', '.join(map(str, years))}); changes "
+                f"compare {years[0]} with {years[-1]}, and a positive rank_change means the state moved up",
+        "data_versions": {str(y): t.version for y, t in zip(years, tables)},
+        "data_version": current.version if current is not None else None
+    }
+
+
+@mcp.tool(
+    description="""
+    Year-over-year changes for a corporation type and employee size across the available
+    Census data years: each state's score, establishments and rank per year, plus the score
+    change, establishment growth (%) and rank movement between the first and last year.
+    Order by score_change (default), establishment_growth_pct, rank_change or state.
+    """
+)
+@_instrumented
+def score_trend(
+    corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
+    emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    states: Annotated[list[str] | None, "Only these states (default: all)"] = None,
+    years: Annotated[list[int] | None, "Years to compare (default: every available year)"] = None,
+    order_by: Annotated[str, "score_change, establishment_growth_pct, rank_change or state (default: score_change)"] = "score_change",
+    n: Annotated[int, "Number of states to return (default: 10)"] = 10,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Get year-over-year score, establishment and rank changes."""
+    return _tool_result(_cached_response(
+        "score_trend",
+        lambda table: (
+            _group_key(table, corp_type, emp_size), tuple(states) if states else None,
+            _vintage_versions(years), order_by, max(n, 0),
+        ),
+        lambda: _score_trend_impl(corp_type, emp_size, states, years, order_by, n),
+        fmt=format,
+    ))
+
+
+def _neighbors_for(table: ScoreTable) -> NeighborIndex:
+    """Return the neighbour index for a table, building it on first use."""
+    global _neighbors
+
+    index = _neighbors
+    if index is None or index.table is not table:
+        with _neighbors_lock:
+            if _neighbors is None or _neighbors.table is not table:
+                _neighbors = NeighborIndex(table, max_entries=NEIGHBOR_MAX_TREES)
+            index = _neighbors
+    return index
+
+
+def _market(data: dict) -> dict:
+    """The fields similar_markets reports for one row."""
+    establishments = data["establishments"]
+    return {
+        "state": data["state"],
+        "corp_type": data["corp_type"],
+        "emp_size": data["emp_size"],
+        "score": data["score"],
+        "confidence": data["confidence"],
+        "establishments": establishments,
+        "employees": data["employees"],
+        "avg_salary_thousands": round(data["avg_salary_thousands"], 2),
+        "employees_per_establishment": round(data["employees"] / establishments, 2) if establishments else 0.0,
+    }
+
+
+def _similar_markets_impl(
+    state: str,
+    corp_type: str,
+    emp_size: str,
+    k: int = 5,
+    scope: str = "group",
+    distance: str = "euclidean",
+    standardize: str = "log_zscore",
+    features: list[str] | None = None,
+) -> dict:
+    """Internal implementation for finding the nearest markets to a combination."""
+    table = TABLE
+    if table is None:
+        return {"error": "Data not loaded"}
+
+    row = table.find(state, corp_type, emp_size)
+    if row < 0:
+        return _not_found(table, state, corp_type, emp_size)
+    if not 1 <= k <= MAX_NEIGHBORS:
+        return {"error": f"k must be between 1 and {MAX_NEIGHBORS}", "data_version": table.version}
+
+    try:
+        neighbors = _neighbors_for(table).query(row, k, scope, distance, standardize, features)
+    except NeighborError as e:
+        return {"error": str(e), "data_version": table.version}
+
+    reference = _market(table.record(row))
+    similar = [
+        {"rank": i, "distance": round(d, 4), **_market(table.record(r))}
+        for i, (r, d) in enumerate(zip(neighbors.rows, neighbors.distances), 1)
+    ]
+    return {
+        "query": {
+            "state": reference["state"],
+            "corp_type": reference["corp_type"],
+            "emp_size": reference["emp_size"],
+            "k": k,
+            "scope": scope,
+            "distance": distance,
+            "standardize": standardize,
+            "features": list(neighbors.features),
+        },
+        "reference": reference,
+        "similar_markets": similar,
+        "data_version": table.version
+    }
+
+
+@mcp.tool(
+    description=f"""
+    Find the markets most similar to a given state, corporation type and employee size.
+    Similarity is the distance between feature vectors built from score, average salary,
+    establishments, employees and employees per establishment, standardized over the rows
+    searched. With scope "group" (default) the other states in the same corporation type and
+    employee size are compared; with scope "all" every row in the table is.
+    Distances: {", ".join(DISTANCES)}. Standardization: {", ".join(STANDARDIZATIONS)}
+    (log_zscore, the default, log-scales the counts first so the largest states do not
+    dominate). Returns the k nearest markets, closest first, with their distances.
+    """
+)
+@_instrumented
+def similar_markets(
+    state: Annotated[str, "US State name (e.g., 'California', 'Texas', 'New York')"],
+    corp_type: Annotated[str, "Corporation type: c-corp, s-corp, sole-proprietor, partnership, nonprofit, government, other"],
+    emp_size: Annotated[str, "Employee size category: 1-4, 5-9, 10-19, 20-49, 50-99, 100-249, 250-499, 500-999, 1000+"],
+    k: Annotated[int, f"Number of similar markets to return (default: 5, max: {MAX_NEIGHBORS})"] = 5,
+    scope: Annotated[str, f"Rows to search: {' or '.join(SCOPES)} (default: group)"] = "group",
+    distance: Annotated[str, f"Distance: {', '.join(DISTANCES)} (default: euclidean)"] = "euclidean",
+    standardize: Annotated[str, f"Feature scaling: {', '.join(STANDARDIZATIONS)} (default: log_zscore)"] = "log_zscore",
+    features: Annotated[list[str] | None, f"Subset of features to compare (default: all of {', '.join(FEATURES)})"] = None,
+    format: Annotated[str, FORMAT_HELP] = "verbose",
+) -> dict:
+    """Find the nearest markets to a combination."""
+    return _tool_result(_cached_response(
+        "similar_markets",
+        lambda table: (
+            _score_key(table, state, corp_type, emp_size), k, scope, distance, standardize,
+            tuple(features) if features else None,
+        ),
+        lambda: _similar_markets_impl(state, corp_type, emp_size, k, scope, distance, standardize, features),
+        fmt=format,
+    ))
 
 
 @mcp.custom_route("/test", methods=["GET"])
+@_instrumented_route("/test")
 async def test_tool(request: Request):
     """Test endpoint to try tools directly."""
-    from starlette.responses import JSONResponse
+    from starlette.responses import JSONResponse, Response
+
+    await _wait_for_table()
 
     try:
         tool = request.query_params.get("tool", "get_opportunity_score")
@@ -361,35 +2413,221 @@ async def test_tool(request: Request):
         emp_size = request.query_params.get("emp_size", "")
 
         if tool == "get_opportunity_score" and state and corp_type and emp_size:
-            result = _get_opportunity_score_impl(state, corp_type, emp_size)
+            response = _get_opportunity_score_response(state, corp_type, emp_size)
         elif tool == "list_states":
-            result = _list_states_impl()
+            response = _cached_response("list_states", lambda table: (), _list_states_impl)
         elif tool == "list_corp_types":
-            result = _list_corp_types_impl()
+            response = _cached_response("list_corp_types", lambda table: (), _list_corp_types_impl)
         elif tool == "list_emp_sizes":
-            result = _list_emp_sizes_impl()
+            response = _cached_response("list_emp_sizes", lambda table: (), _list_emp_sizes_impl)
         elif tool == "top_states" and corp_type and emp_size:
             n = int(request.query_params.get("n", "10"))
-            result = _top_states_impl(corp_type, emp_size, n)
+            response = _top_states_response(corp_type, emp_size, n)
+        elif tool == "state_rank" and state and corp_type and emp_size:
+            response = _state_rank_response(state, corp_type, emp_size)
+        elif tool == "states_in_score_range" and corp_type and emp_size:
+            min_score = float(request.query_params.get("min_score", "0"))
+            max_score = float(request.query_params.get("max_score", "100"))
+            response = _states_in_score_range_response(corp_type, emp_size, min_score, max_score)
         else:
-            result = {"error": "Missing required parameters"}
+            return JSONResponse({"error": "Missing required parameters"})
 
-        return JSONResponse(result)
+        # Cached responses are already serialized
+        return Response(content=response.body, media_type="application/json")
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
-@mcp.custom_route("/", methods=["GET"])
-async def landing_page(request: Request) -> HTMLResponse:
-    """Serve a landing page with server info and setup instructions."""
+@mcp.custom_route("/test/batch", methods=["POST"])
+@_instrumented_route("/test/batch")
+async def test_batch_tool(request: Request):
+    """Test endpoint for get_opportunity_scores, taking a JSON body."""
+    from starlette.responses import JSONResponse
+
+    await _wait_for_table()
+
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "Body must be valid JSON"}, status_code=400)
+
+    items = body.get("items") if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        return JSONResponse({"error": "Body must be a JSON object with an 'items' list"}, status_code=400)
+
+    include_details = body.get("include_details", True)
+    if isinstance(include_details, str):
+        include_details = {"true": True, "1": True, "false": False, "0": False}.get(include_details.lower())
+    if not isinstance(include_details, bool):
+        return JSONResponse({"error": "'include_details' must be true or false"}, status_code=400)
+
+    try:
+        return JSONResponse(_get_opportunity_scores_impl(items, include_details))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@mcp.custom_route("/export", methods=["GET"])
+@_instrumented_route("/export")
+async def export(request: Request):
+    """Stream the score table, or a filtered slice of it.
+
+    Query parameters: format (ndjson, csv or arrow; default ndjson); state,
+    corp_type, emp_size and confidence filters (repeat the parameter or
+    separate values with commas); min_score and max_score; offset and limit
+    in matching rows; and cursor to resume from a previous response's
+    X-Next-Cursor header. Resumed CSV exports omit the header line.
+    """
+    from starlette.responses import JSONResponse, StreamingResponse
+
+    await _wait_for_table()
+    table = TABLE
+    if table is None:
+        return JSONResponse({"error": "Data not loaded"}, status_code=503)
+
+    params = request.query_params
+    fmt = params.get("format", "ndjson")
+    if fmt not in MEDIA_TYPES:
+        return JSONResponse({"error": f"Unsupported format '{fmt}'. Use one of: {', '.join(MEDIA_TYPES)}"}, status_code=400)
+
+    def values(name: str) -> list[str]:
+        return [v.strip() for raw in params.getlist(name) for v in raw.split(",") if v.strip()]
+
+    try:
+        min_score = float(params["min_score"]) if "min_score" in params else None
+        max_score = float(params["max_score"]) if "max_score" in params else None
+        offset = int(params.get("offset", "0"))
+        limit = int(params["limit"]) if "limit" in params else None
+    except ValueError:
+        return JSONResponse({"error": "min_score and max_score must be numbers; offset and limit integers"}, status_code=400)
+    if offset < 0 or (limit is not None and limit < 0):
+        return JSONResponse({"error": "offset and limit must not be negative"}, status_code=400)
+
+    row_filter, problems = _export_filter(
+        table, values("state"), values("corp_type"), values("emp_size"), values("confidence"), min_score, max_score
+    )
+    if problems:
+        return JSONResponse({"error": "Invalid filter", "suggestions": problems}, status_code=400)
+
+    try:
+        plan = await run_in_threadpool(plan_export, table, row_filter, params.get("cursor"), offset, limit)
+        body = encode_chunks(fmt, table, row_filter.chunks(plan.start, plan.stop), header=plan.offset == 0)
+    except ExportError as e:
+        return JSONResponse({"error": str(e), "data_version": table.version}, status_code=400)
+
+    extension = "arrows" if fmt == "arrow" else fmt
+    headers = {
+        "X-Data-Version": table.version,
+        "X-Total-Count": str(plan.total),
+        "Content-Disposition": f'attachment; filename="opportunity-scores-{table.version}.{extension}"',
+    }
+    if plan.next_cursor:
+        headers["X-Next-Cursor"] = plan.next_cursor
+    # Chunks are encoded lazily in a worker thread as the client reads them
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+@mcp.custom_route("/stats", methods=["GET"])
+@_instrumented_route("/stats")
+async def stats(request: Request):
+    """Report response cache counters and the loaded data version."""
+    from starlette.responses import JSONResponse
+
+    table = TABLE
+    return JSONResponse({
+        "data_version": table.version if table is not None else None,
+        "worker_pid": os.getpid(),
+        "rows": len(table) if table is not None else 0,
+        "data_year": DATA_YEAR,
+        "vintages": {"available_years": _available_years(), **VINTAGES.stats()},
+        "counties": {
+            "available": COUNTIES.available,
+            "states": len(COUNTIES.index["states"]) if COUNTIES.available else 0,
+            **COUNTIES.stats(),
+        },
+        "response_cache": RESPONSE_CACHE.stats(),
+        "prebuilt_responses": len(_STATIC_RESPONSES),
+        "cold_start": COLD_START,
+        "table_ready": _TABLE_READY.is_set(),
+        "admission": {
+            "coalescing": len(_IN_FLIGHT),
+            "tools": {tool: limit.stats() for tool, limit in TOOL_LIMITS.items()},
+        },
+        "traffic_log": RECORDER.stats() if RECORDER is not None else None,
+    })
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request):
+    """Expose instrumentation in the Prometheus text format."""
+    from starlette.responses import Response
+
+    for tool, limit in TOOL_LIMITS.items():
+        TOOL_ACTIVE.set(limit.active, tool)
+        TOOL_QUEUED.set(limit.queued, tool)
+    cache = RESPONSE_CACHE.stats()
+    lines = [
+        "# HELP score_response_cache_lookups_total Response cache lookups by result.",
+        "# TYPE score_response_cache_lookups_total counter",
+        f'score_response_cache_lookups_total{{result="hit"}} {cache["hits"]}',
+        f'score_response_cache_lookups_total{{result="miss"}} {cache["misses"]}',
+        "# HELP score_response_cache_evictions_total Response cache evictions.",
+        "# TYPE score_response_cache_evictions_total counter",
+        f"score_response_cache_evictions_total {cache['evictions']}",
+        "# HELP score_response_cache_bytes Approximate memory held by the response cache.",
+        "# TYPE score_response_cache_bytes gauge",
+        f"score_response_cache_bytes {cache['bytes']}",
+    ]
+    body = METRICS.render() + "\n".join(lines) + "\n"
+    return Response(content=body, media_type=CONTENT_TYPE)
+
+
+@mcp.custom_route("/admin/reload", methods=["POST"])
+@_instrumented_route("/admin/reload")
+async def admin_reload(request: Request):
+    """Reload the lookup table from disk without restarting the server."""
+    from starlette.responses import JSONResponse
+
+    token = os.getenv("SCORE_ADMIN_TOKEN")
+    if not token:
+        return JSONResponse({"error": "Reload route disabled. Set SCORE_ADMIN_TOKEN to enable it."}, status_code=404)
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), token):
+        return JSONResponse({"error": "Invalid admin token"}, status_code=403)
+
+    if WORKERS > 1:
+        # Other workers only see the new data through the shared snapshot;
+        # their file watchers pick it up once it has been rewritten
+        try:
+            await run_in_threadpool(ensure_snapshot, DEFAULT_CSV_PATH)
+        except Exception as e:
+            logger.exception("Snapshot rebuild failed")
+            return JSONResponse({"reloaded": False, "error": f"Could not rebuild snapshot: {e}"}, status_code=422)
+
+    # Parse and index off the event loop so in-flight requests are not stalled
+    result = await run_in_threadpool(reload_lookup_table)
+    return JSONResponse(result, status_code=422 if "error" in result else 200)
+
+
+def _render_landing_page(table: ScoreTable | None, mcp_url: str, is_posit_connect: bool) -> str:
+    """Render the landing page HTML."""
     # List our known tools directly
     tool_info = [
         ("get_opportunity_score", "Get business opportunity score for a state/corp_type/emp_size"),
+        ("get_opportunity_scores", "Score many state/corp_type/emp_size combinations in one call"),
         ("list_states", "List all valid US states"),
         ("list_corp_types", "List all valid corporation types"),
         ("list_emp_sizes", "List all valid employee size categories"),
         ("compare_states", "Compare scores across multiple states"),
         ("top_states", "Get top N states by opportunity score"),
+        ("state_rank", "Get a state's rank and percentile within its group"),
+        ("states_in_score_range", "Find states whose score falls within a range"),
+        ("score_with_weights", "Rank states using custom salary, momentum and density weights"),
+        ("similar_markets", "Find the markets most similar to a state, corp type and size"),
+        ("score_matrix", "Get a 2-D slice of scores as a labelled matrix"),
+        ("score_trend", "Compare scores, establishments and ranks across data years"),
+        ("top_counties", "Get top N counties in a state (needs county data)"),
+        ("query_scores", "Aggregate scores with filters, grouping and ordering"),
+        ("export_scores", "Page through filtered rows of the score table"),
     ]
 
     tools_html = "<ul>"
@@ -397,16 +2635,6 @@ async def landing_page(request: Request) -> HTMLResponse:
         tools_html += f"<li><code>{name}</code> - {desc}</li>"
     tools_html += "</ul>"
 
-    # Build base URL accounting for proxy
-    forwarded_proto = request.headers.get("x-forwarded-proto", request.url.scheme)
-    forwarded_host = request.headers.get("x-forwarded-host", request.url.netloc)
-    current_path = str(request.url.path).rstrip("/")
-    base_url = f"{forwarded_proto}://{forwarded_host}{current_path}"
-    mcp_url = f"{base_url}/mcp"
-
-    # Detect if running on Posit Connect
-    is_posit_connect = bool(os.getenv("CONNECT_SERVER"))
-
     html = f"""
     <!DOCTYPE html>
     <html>
@@ -495,21 +2723,21 @@ async def landing_page(request: Request) -> HTMLResponse:
                     <label for="state"><strong>State:</strong></label><br>
                     <select id="state" style="padding: 0.5rem; min-width: 150px;">
                         <option value="">Select state...</option>
-                        {chr(10).join(f'<option value="{s}">{s}</option>' for s in sorted(STATES)) if STATES else '<option value="California">California</option>'}
+                        {chr(10).join(f'<option value="{s}">{s}</option>' for s in table.states) if table else '<option value="California">California</option>'}
                     </select>
                 </div>
                 <div>
                     <label for="corp_type"><strong>Corporation Type:</strong></label><br>
                     <select id="corp_type" style="padding: 0.5rem; min-width: 150px;">
                         <option value="">Select type...</option>
-                        {chr(10).join(f'<option value="{c}">{c}</option>' for c in sorted(CORP_TYPES)) if CORP_TYPES else '<option value="c-corp">c-corp</option>'}
+                        {chr(10).join(f'<option value="{c}">{c}</option>' for c in table.corp_types) if table else '<option value="c-corp">c-corp</option>'}
                     </select>
                 </div>
                 <div>
                     <label for="emp_size"><strong>Employee Size:</strong></label><br>
                     <select id="emp_size" style="padding: 0.5rem; min-width: 150px;">
                         <option value="">Select size...</option>
-                        {chr(10).join(f'<option value="{e}">{e}</option>' for e in ["1-4", "5-9", "10-19", "20-49", "50-99", "100-249", "250-499", "500-999", "1000+"] if e in EMP_SIZES) if EMP_SIZES else '<option value="10-19">10-19</option>'}
+                        {chr(10).join(f'<option value="{e}">{e}</option>' for e in table.emp_sizes if e in EMP_SIZE_ORDER) if table else '<option value="10-19">10-19</option>'}
                     </select>
                 </div>
             </div>
@@ -565,19 +2793,178 @@ async def landing_page(request: Request) -> HTMLResponse:
         {tools_html}
 
         <h2>Data Source</h2>
-        <p>Scores are generated from US Census Bureau County Business Patterns (2022) data,
-        using a Random Forest model trained on salary, economic momentum, and establishment density features.</p>
+        <p>Scores are generated from US Census Bureau County Business Patterns ({DATA_YEAR}) data,
+        using {"a weighted formula over" if table and table.score_method == "formula" else "a Random Forest model trained on"}
+        salary, economic momentum, and establishment density features.</p>
 
-        <p>Data loaded: <strong>{"Yes" if LOOKUP_DATA else "No"}</strong>
-        {f" ({len(STATES)} states)" if STATES else ""}</p>
+        <p>Data loaded: <strong>{"Yes" if table else "No"}</strong>
+        {f" ({len(table.states)} states, data version <code>{table.version}</code>)" if table else ""}</p>
     </body>
     </html>
     """
-    return HTMLResponse(content=html)
+    return html
+
+
+class _LandingPage(NamedTuple):
+    """A rendered landing page and its compressed variants."""
+
+    etag: str
+    bodies: dict[str, bytes]
+
+
+# The MCP URL comes from client-supplied Host / X-Forwarded-Host headers, so
+# pages are only cached per data version, as a template. The URL is filled in
+# per request and compressed at a cheap level, which costs well under a
+# millisecond for this page, so no header value can force an expensive
+# compression or churn a cache.
+_LANDING_GZIP_LEVEL = 6
+_LANDING_BROTLI_QUALITY = 5
+
+# Stands in for the proxy-dependent MCP URL in the cached page template
+_MCP_URL_PLACEHOLDER = "\x00MCP_URL\x00"
+
+
+# Page templates keyed by (data version, running on Connect); keyed on the
+# version rather than the table so replaced tables can be freed
+_LANDING_TEMPLATES: OrderedDict[tuple, list[str]] = OrderedDict()
+_LANDING_TEMPLATES_MAX = 4
+
+
+def _landing_template(table: ScoreTable | None, is_posit_connect: bool) -> list[str]:
+    """Render the page once per data version, split around the MCP URL."""
+    key = (table.version if table is not None else None, is_posit_connect)
+    template = _LANDING_TEMPLATES.get(key)
+    if template is None:
+        template = _render_landing_page(table, _MCP_URL_PLACEHOLDER, is_posit_connect).split(_MCP_URL_PLACEHOLDER)
+        _LANDING_TEMPLATES[key] = template
+        while len(_LANDING_TEMPLATES) > _LANDING_TEMPLATES_MAX:
+            _LANDING_TEMPLATES.popitem(last=False)
+    return template
+
+
+def _build_landing_page(table: ScoreTable | None, mcp_url: str, is_posit_connect: bool) -> _LandingPage:
+    """Fill in the MCP URL and compress the page."""
+    body = mcp_url.join(_landing_template(table, is_posit_connect)).encode("utf-8")
+    bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=_LANDING_GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body, quality=_LANDING_BROTLI_QUALITY)
+    return _LandingPage(etag=hashlib.blake2b(body, digest_size=16).hexdigest(), bodies=bodies)
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Return the content codings a client accepts (ignoring those with q=0)."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+@mcp.custom_route("/", methods=["GET"])
+@_instrumented_route("/")
+async def landing_page(request: Request):
+    """Serve a landing page with server info and setup instructions.
+
+    The page is rendered once per data version, with the MCP URL filled in
+    per request. It is served with a strong ETag (304 on a matching
+    If-None-Match) and compressed with brotli or gzip when the client
+    accepts it.
+    """
+    from starlette.responses import HTMLResponse, Response
+
+    await _wait_for_table()
+    table = TABLE
+
+    # Build base URL accounting for proxy
+    forwarded_proto = request.headers.get("x-forwarded-proto", request.url.scheme)
+    forwarded_host = request.headers.get("x-forwarded-host", request.url.netloc)
+    current_path = str(request.url.path).rstrip("/")
+    base_url = f"{forwarded_proto}://{forwarded_host}{current_path}"
+    mcp_url = f"{base_url}/mcp"
+
+    # Detect if running on Posit Connect
+    is_posit_connect = bool(os.getenv("CONNECT_SERVER"))
+
+    # Render and compress off the event loop so MCP requests are not held up
+    page = await run_in_threadpool(_build_landing_page, table, mcp_url, is_posit_connect)
+
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    encoding = next((e for e in ("br", "gzip") if e in accepted and e in page.bodies), "identity")
+
+    # Each coding is a different representation, so it gets its own strong ETag
+    etags = {e: f'"{page.etag}"' if e == "identity" else f'"{page.etag}-{e}"' for e in page.bodies}
+    headers = {"ETag": etags[encoding], "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        requested = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in requested or requested & set(etags.values()):
+            return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return HTMLResponse(content=page.bodies[encoding], headers=headers)
+
+
+def _load_initial_table() -> None:
+    """Load the table at startup and release requests waiting for it."""
+    try:
+        load_lookup_table()
+    except FileNotFoundError:
+        # Will be loaded later or fail gracefully
+        pass
+    finally:
+        _TABLE_READY.set()
+
+
+def _warm() -> None:
+    """Load the table, then build the indexes the first requests would otherwise build."""
+    try:
+        # Leave a snapshot behind so later cold starts map it instead of parsing the CSV
+        ensure_snapshot(DEFAULT_CSV_PATH)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Could not write score snapshot: %s", e)
+    _load_initial_table()
+    table = TABLE
+    if table is None:
+        return
+    time.sleep(WARM_INDEX_DELAY)
+    if table is not TABLE:
+        return
+    start = time.perf_counter()
+    try:
+        scorer = _scorer_for(table)
+        scorer.rescore(scorer.default_weights())
+        trees = _neighbors_for(table).warm()
+    except Exception:
+        logger.exception("Index warm-up failed")
+        return
+    logger.info("Warmed scorer and %d neighbour trees in %.2fs", trees, time.perf_counter() - start)
+
+
+# Load data on module import, or in the background in cold-start mode
+if COLD_START:
+    threading.Thread(target=_warm, name="table-warmer", daemon=True).start()
+else:
+    _load_initial_table()
+
+# Optionally watch for a regenerated lookup table (seconds between polls)
+_reload_interval = float(os.getenv("SCORE_RELOAD_INTERVAL", "0"))
+if _reload_interval > 0:
+    threading.Thread(
+        target=_watch_lookup_table,
+        args=(DEFAULT_CSV_PATH, _reload_interval),
+        name="lookup-table-watcher",
+        daemon=True,
+    ).start()
 
 
 # ASGI app for deployment
-mcp_app = mcp.http_app(path="/mcp")
+mcp_app = mcp.http_app(path="/mcp", stateless_http=STATELESS_HTTP)
 app = mcp_app
 
 
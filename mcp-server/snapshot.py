@@ -0,0 +1,235 @@
+"""
+Binary snapshot format for the score lookup table.
+
+A snapshot is score_lookup.csv compiled into fixed-width, 64-byte aligned
+column blocks plus a JSON header holding the string dictionaries, column
+layout and a fingerprint of the source CSV. The server memory-maps it at
+startup instead of re-parsing the CSV, and processes on the same host share
+the mapped pages.
+
+Layout (little-endian):
+
+    magic          8 bytes   b"BOSSNAP\\0"
+    format version uint32
+    header length  uint32
+    header crc32   uint32
+    padding        to 64 bytes
+    header         JSON, utf-8
+    column blocks  each aligned to 64 bytes
+
+Build a snapshot next to the CSV with:
+
+    python snapshot.py [score_lookup.csv] [score_lookup.snapshot]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from score_store import DEFAULT_SCORE_METHOD, INDEX_NAMES, ScoreTable, file_sha256
+
+MAGIC = b"BOSSNAP\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sIII")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, stale, corrupt or of another version."""
+
+
+def snapshot_path_for(csv_path: Path) -> Path:
+    """Return the default snapshot location for a CSV file."""
+    return csv_path.with_suffix(".snapshot")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def source_fingerprint(csv_path: Path) -> dict:
+    """Describe the source CSV so a snapshot can be checked for staleness."""
+    stat = csv_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(csv_path)}
+
+
+def write_snapshot(table: ScoreTable, path: Path, source: dict | None = None) -> Path:
+    """Write a table to a snapshot file, replacing any existing one atomically."""
+    arrays = {**table.columns(), **table.indexes()}
+
+    # Lay out the column blocks first, relative to the start of the data area
+    layout = {}
+    offset = 0
+    for name, array_ in arrays.items():
+        offset = _align(offset)
+        layout[name] = {"dtype": array_.dtype.str, "shape": list(array_.shape), "offset": offset}
+        offset += array_.nbytes
+    data_size = offset
+
+    payload_crc = 0
+    for name, array_ in arrays.items():
+        payload_crc = zlib.crc32(np.ascontiguousarray(array_).tobytes(), payload_crc)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "rows": len(table),
+        "source": source,
+        "score_method": table.score_method,
+        "dictionaries": {
+            "states": list(table.states),
+            "corp_types": list(table.corp_types),
+            "emp_sizes": list(table.emp_sizes),
+            "confidence_levels": list(table.confidence_levels),
+        },
+        "columns": layout,
+        "data_size": data_size,
+        "payload_crc32": payload_crc,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _align(ALIGNMENT + len(header_bytes))
+
+    # Per-process temporary name so concurrent builders never share a file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes), zlib.crc32(header_bytes)))
+        f.write(b"\0" * (ALIGNMENT - _PREFIX.size))
+        f.write(header_bytes)
+        for name, array_ in arrays.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(array_).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read_header(mapped: mmap.mmap) -> tuple[dict, int]:
+    """Validate the fixed prefix and return (header, data start offset)."""
+    if len(mapped) < ALIGNMENT:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, header_len, header_crc = _PREFIX.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise SnapshotError("Not a score snapshot file")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot format version {version} is not supported (expected {FORMAT_VERSION})")
+
+    header_bytes = mapped[ALIGNMENT:ALIGNMENT + header_len]
+    if len(header_bytes) != header_len or zlib.crc32(header_bytes) != header_crc:
+        raise SnapshotError("Snapshot header checksum mismatch")
+    return json.loads(header_bytes), _align(ALIGNMENT + header_len)
+
+
+def is_fresh(header: dict, csv_path: Path) -> bool:
+    """Return True if the snapshot was built from the CSV currently on disk."""
+    source = header.get("source")
+    if not csv_path.exists():
+        # Deployments may ship the snapshot without the CSV
+        return True
+    if not source:
+        return False
+
+    stat = csv_path.stat()
+    if stat.st_size != source["size"]:
+        return False
+    if stat.st_mtime_ns == source["mtime_ns"]:
+        return True
+    # Same size but touched (e.g. copied during deployment): compare contents
+    return file_sha256(csv_path) == source["sha256"]
+
+
+def load_snapshot(
+    path: Path, csv_path: Path | None = None, verify: bool = True, lazy_labels: bool = False
+) -> ScoreTable:
+    """Memory-map a snapshot and return a ScoreTable backed by the mapped pages.
+
+    Raises SnapshotError if the snapshot is missing, stale relative to
+    csv_path, corrupt, or written by an incompatible format version.
+    ``lazy_labels`` defers the label suggestion indexes to their first use.
+    """
+    if not path.exists():
+        raise SnapshotError(f"Snapshot not found at {path}")
+    if path.stat().st_size < ALIGNMENT:
+        # mmap refuses empty files, e.g. a copy interrupted mid-deployment
+        raise SnapshotError("Snapshot is truncated")
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header, data_start = _read_header(mapped)
+    try:
+        return _table_from_header(mapped, header, data_start, path, csv_path, verify, lazy_labels)
+    except (KeyError, TypeError, ValueError) as e:
+        # A header from an older writer, or one naming arrays that are not there
+        raise SnapshotError(f"Snapshot at {path} has a malformed header ({type(e).__name__}: {e})") from e
+
+
+def _table_from_header(
+    mapped: mmap.mmap, header: dict, data_start: int, path: Path, csv_path: Path | None, verify: bool,
+    lazy_labels: bool = False,
+) -> ScoreTable:
+    if csv_path is not None and not is_fresh(header, csv_path):
+        raise SnapshotError(f"Snapshot at {path} is stale relative to {csv_path}")
+    if len(mapped) < data_start + header["data_size"]:
+        raise SnapshotError("Snapshot is truncated")
+
+    arrays = {}
+    payload_crc = 0
+    for name, spec in header["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        array_ = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + spec["offset"])
+        arrays[name] = array_.reshape(spec["shape"])
+        if verify:
+            payload_crc = zlib.crc32(array_, payload_crc)
+    if verify and payload_crc != header["payload_crc32"]:
+        raise SnapshotError("Snapshot payload checksum mismatch")
+
+    dictionaries = header["dictionaries"]
+    source = header.get("source") or {}
+    return ScoreTable(
+        states=dictionaries["states"],
+        corp_types=dictionaries["corp_types"],
+        emp_sizes=dictionaries["emp_sizes"],
+        confidence_levels=dictionaries["confidence_levels"],
+        indexes={name: arrays.pop(name) for name in INDEX_NAMES},
+        version=source.get("sha256", f"{header['payload_crc32']:08x}")[:12],
+        score_method=header.get("score_method", DEFAULT_SCORE_METHOD),
+        lazy_labels=lazy_labels,
+        **arrays,
+    )
+
+
+def build_snapshot(csv_path: Path, snapshot_path: Path | None = None) -> Path:
+    """Compile a score_lookup.csv file into a snapshot."""
+    table = ScoreTable.from_csv(csv_path)
+    return write_snapshot(table, snapshot_path or snapshot_path_for(csv_path), source_fingerprint(csv_path))
+
+
+def ensure_snapshot(csv_path: Path, snapshot_path: Path | None = None) -> tuple[Path, bool]:
+    """Build the snapshot unless an up-to-date one already exists.
+
+    Returns (snapshot path, whether it was rebuilt).
+    """
+    path = snapshot_path or snapshot_path_for(csv_path)
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            header, _ = _read_header(mapped)
+        if is_fresh(header, csv_path):
+            return path, False
+    except (OSError, ValueError, SnapshotError):
+        pass
+    return build_snapshot(csv_path, path), True
+
+
+if __name__ == "__main__":
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "score_lookup.csv"
+    dst = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    out = build_snapshot(src, dst)
+    print(f"Wrote {out} ({out.stat().st_size:,} bytes)")
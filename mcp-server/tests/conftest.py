@@ -0,0 +1,82 @@
+"""
+Shared fixtures. The tests import the server modules from mcp-server/ and,
+unless they build their own table, run against the shipped score_lookup.csv.
+
+    python -m pytest -q tests
+"""
+
+import asyncio
+import csv
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+CSV_PATH = SERVER_DIR / "score_lookup.csv"
+
+
+def read_rows(path: Path = CSV_PATH) -> list[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def write_rows(path: Path, rows: list[dict]) -> Path:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture(scope="session")
+def table():
+    from score_store import ScoreTable
+
+    return ScoreTable.from_csv(CSV_PATH)
+
+
+@pytest.fixture
+def csv_copy(tmp_path) -> Path:
+    """A writable copy of the shipped lookup table."""
+    return Path(shutil.copy(CSV_PATH, tmp_path / "score_lookup.csv"))
+
+
+@pytest.fixture(scope="session")
+def server():
+    import server
+
+    return server
+
+
+@pytest.fixture
+def call_tool(server):
+    """Call a tool through an in-memory MCP client and return the decoded response."""
+    from fastmcp import Client
+
+    async def call(name: str, args: dict):
+        async with Client(server.mcp) as client:
+            result = await client.call_tool(name, args, raise_on_error=False)
+            return json.loads(result.content[0].text)
+
+    return lambda name, **args: asyncio.run(call(name, args))
+
+
+@pytest.fixture
+def restore_table(server):
+    """Put the shipped table back after a test that reloads the server."""
+    yield
+    server.reload_lookup_table(CSV_PATH)
+
+
+@pytest.fixture(scope="session")
+def client(server):
+    """HTTP client for the custom routes (/test, /test/batch, /export)."""
+    from starlette.testclient import TestClient
+
+    with TestClient(server.mcp.http_app()) as test_client:
+        yield test_client
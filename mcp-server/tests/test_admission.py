@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from admission import MIN_RETRY_AFTER, Shed, SingleFlight, ToolLimit, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits("top_states=4:16, query_scores=1, score_matrix=0") == {
+        "top_states": (4, 16), "query_scores": (1, 0), "score_matrix": (0, 0),
+    }
+    with pytest.raises(ValueError, match="Invalid tool limit"):
+        parse_limits("top_states=four")
+
+
+def test_full_queue_sheds_and_slots_pass_in_order():
+    async def scenario():
+        limit = ToolLimit(concurrency=1, queue=2)
+        assert await limit.acquire() is False
+        waiters = [asyncio.ensure_future(limit.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Shed) as shed:
+            await limit.acquire()
+        assert shed.value.reason == "rejected"
+        assert (limit.active, limit.queued) == (1, 2)
+
+        limit.release()
+        assert await waiters[0] is True and not waiters[1].done()
+        limit.release()
+        assert await waiters[1] is True
+        limit.release()
+        assert (limit.active, limit.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_queued_call_times_out():
+    async def scenario():
+        limit = ToolLimit(concurrency=1, queue=1, timeout=0.01)
+        await limit.acquire()
+        with pytest.raises(Shed) as shed:
+            await limit.acquire()
+        assert shed.value.reason == "timed_out"
+        assert limit.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_before_the_first_call_finishes():
+    async def scenario():
+        limit = ToolLimit(concurrency=1, queue=0)
+        await limit.acquire()
+        await asyncio.sleep(0.3)
+        with pytest.raises(Shed) as shed:
+            await limit.acquire()
+        # Seeded from how long the running call has taken so far
+        assert shed.value.retry_after >= 0.3
+        limit.observe(0.02)
+        limit.release()
+        assert limit.retry_after() == MIN_RETRY_AFTER
+
+    asyncio.run(scenario())
+
+
+def test_single_flight_shares_overlapping_calls():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(3)))
+        assert [r for r, _ in results] == ["result"] * 3
+        assert sorted(shared for _, shared in results) == [False, True, True]
+        assert len(calls) == 1 and len(flight) == 0
+
+    asyncio.run(scenario())
+
+
+def test_coalescing_key_spells_labels_canonically(server):
+    key = server._coalescing_key
+    assert key("top_states", {"corp_type": "S Corp", "emp_size": "20 to 49"}) == \
+        key("top_states", {"corp_type": "s-corp", "emp_size": "20-49"})
+    assert key("compare_states", {"states": ["texas", "CA"]}) == key("compare_states", {"states": ["Texas", "California"]})
+    # Unresolved labels keep every argument as sent
+    assert key("top_counties", {"state": "texas", "corp_type": "nope"}) != \
+        key("top_counties", {"state": "Texas", "corp_type": "nope"})
+    assert key("compare_states", {"states": "Texas", "corp_type": 5}) == \
+        ("compare_states", '{"corp_type": 5, "states": "Texas"}')
@@ -0,0 +1,46 @@
+import pytest
+
+ITEMS = [
+    {"state": "Texas", "corp_type": "s-corp", "emp_size": "20-49"},
+    ["Ohio", "c-corp", "1-4"],
+    {"state": "Atlantis", "corp_type": "s-corp", "emp_size": "20-49"},
+    {"state": "Texas"},
+]
+
+
+def test_batch_scores_match_single_lookups(call_tool):
+    result = call_tool("get_opportunity_scores", items=ITEMS)
+    assert (result["count"], result["found"]) == (4, 2)
+    rows = [dict(zip(result["fields"], row)) for row in result["results"]]
+    assert [row["index"] for row in rows] == [0, 1]
+    for row, item in zip(rows, ITEMS):
+        single = call_tool("get_opportunity_score", state=row["state"], corp_type=row["corp_type"],
+                           emp_size=row["emp_size"])
+        assert row["score"] == single["score"]
+    assert [error["index"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["suggestions"]
+
+
+@pytest.mark.parametrize("flag, detailed", [(True, True), (False, False), ("true", True), ("false", False),
+                                            ("0", False), ("1", True)])
+def test_batch_route_include_details(client, flag, detailed):
+    response = client.post("/test/batch", json={"items": ITEMS[:1], "include_details": flag})
+    assert response.status_code == 200
+    assert ("establishments" in response.json()["fields"]) is detailed
+
+
+@pytest.mark.parametrize("flag", ["no", 2, None])
+def test_batch_route_rejects_unclear_include_details(client, flag):
+    response = client.post("/test/batch", json={"items": ITEMS[:1], "include_details": flag})
+    assert response.status_code == 400
+    assert "include_details" in response.json()["error"]
+
+
+def test_batch_route_internal_errors_are_500s(server, client, monkeypatch):
+    def broken(items, include_details):
+        raise ValueError("scoring failed")
+
+    monkeypatch.setattr(server, "_get_opportunity_scores_impl", broken)
+    response = client.post("/test/batch", json={"items": ITEMS[:1]})
+    assert response.status_code == 500
+    assert client.post("/test/batch", content=b"{not json").status_code == 400
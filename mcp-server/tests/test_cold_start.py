@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+from tests.conftest import SERVER_DIR
+
+PROBE = """
+import asyncio, json, sys
+import server
+from fastmcp import Client
+
+heavy = [m for m in ("pyarrow", "scipy") if m in sys.modules]
+
+async def first_call():
+    async with Client(server.mcp) as client:
+        result = await client.call_tool(
+            "get_opportunity_score", {"state": "Texas", "corp_type": "s-corp", "emp_size": "20-49"}
+        )
+        return json.loads(result.content[0].text)
+
+print(json.dumps({"heavy": heavy, "response": asyncio.run(first_call())}))
+"""
+
+
+def test_cold_start_serves_the_first_call():
+    env = {**os.environ, "SCORE_COLD_START": "1"}
+    env.pop("SCORE_RELOAD_INTERVAL", None)
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=SERVER_DIR, env=env, capture_output=True, text=True,
+                         check=True, timeout=120)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["heavy"] == []
+    assert "score" in result["response"]
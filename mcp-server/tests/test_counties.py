@@ -0,0 +1,71 @@
+import pytest
+
+from counties import build_county_shards
+from label_index import county_index
+from partitions import PartitionStore
+from tests.conftest import read_rows, write_rows
+
+COUNTIES = {"Texas": ["Harris County", "Dallas County", "Travis County"], "Maryland": ["Baltimore County",
+                                                                                     "Baltimore city"]}
+GROUP = {"corp_type": "s-corp", "emp_size": "20-49"}
+
+
+@pytest.fixture(scope="module")
+def county_dir(server, tmp_path_factory):
+    """County shards for two states, installed for the tests in this module."""
+    directory = tmp_path_factory.mktemp("counties")
+    rows = []
+    for row in read_rows():
+        for i, county in enumerate(COUNTIES.get(row["state"], [])):
+            score = min(100.0, float(row["score"]) + 7 * i)
+            rows.append({"county": county, **row, "score": str(score)})
+    build_county_shards(write_rows(directory / "county_scores.csv", rows), directory)
+
+    previous = server.COUNTIES.directory
+    server.COUNTIES.directory = directory
+    server.COUNTIES.reload_index()
+    server.RESPONSE_CACHE.clear()
+    yield directory
+    server.COUNTIES.directory = previous
+    server.COUNTIES.reload_index()
+    server.RESPONSE_CACHE.clear()
+
+
+def test_county_score_and_rank(county_dir, call_tool):
+    result = call_tool("get_opportunity_score", state="TX", county="travis", **GROUP)
+    assert result["details"]["county"] == "Travis County"
+    assert result["county_rank"] == {"rank": 1, "out_of": 3}
+
+
+def test_top_counties_bounds_n(county_dir, call_tool):
+    ranked = call_tool("top_counties", state="Texas", n=10, **GROUP)["top_counties"]
+    assert [c["county"] for c in ranked] == ["Travis County", "Dallas County", "Harris County"]
+    assert call_tool("top_counties", state="Texas", n=-2, **GROUP)["top_counties"] == []
+
+
+def test_state_without_county_data_is_named(county_dir, call_tool):
+    result = call_tool("top_counties", state="ohio", **GROUP)
+    assert result["error"] == "No county data for Ohio"
+    assert sorted(result["states_with_county_data"]) == ["Maryland", "Texas"]
+
+
+def test_unknown_state_gets_suggestions(county_dir, call_tool):
+    assert "suggestions" in call_tool("top_counties", state="Texsa", **GROUP)
+
+
+def test_ambiguous_short_county_names_need_the_suffix():
+    index = county_index(tuple(COUNTIES["Maryland"]))
+    assert index.resolve("Baltimore") is None
+    assert index.resolve("baltimore city") == 1
+
+
+def test_county_index_builds_suggestions_lazily(table):
+    index = county_index(tuple(COUNTIES["Texas"]))
+    assert index._variants is None
+    assert index.suggest("Haris County") == ["Harris County"]
+    assert table.state_labels._variants is not None
+
+
+def test_partition_store_requires_path_for():
+    with pytest.raises(TypeError):
+        PartitionStore(lambda path: None, 0)
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from export import ExportError, RowFilter, plan_export
+
+
+def _pages(table, row_filter, limit):
+    cursor, plans = None, []
+    while True:
+        plan = plan_export(table, row_filter, cursor=cursor, limit=limit)
+        plans.append(plan)
+        cursor = plan.next_cursor
+        if cursor is None:
+            return plans
+
+
+def test_pages_cover_every_match_once(table):
+    row_filter = RowFilter(table, corp_codes=[table.corp_labels.resolve("s-corp")], min_score=40)
+    expected = [int(r) for chunk in row_filter.chunks(0, len(table)) for r in chunk]
+    plans = _pages(table, row_filter, limit=17)
+    rows = [int(r) for plan in plans for chunk in row_filter.chunks(plan.start, plan.stop) for r in chunk]
+    assert rows == expected
+    assert [plan.offset for plan in plans] == list(range(0, len(expected), 17))
+    assert {plan.total for plan in plans} == {len(expected)}
+
+
+def test_total_is_counted_on_the_first_page_only(table, monkeypatch):
+    row_filter = RowFilter(table, min_score=50)
+    calls = []
+    count = RowFilter.count
+    monkeypatch.setattr(RowFilter, "count", lambda self, start=0: calls.append(start) or count(self, start))
+    assert len(_pages(table, row_filter, limit=100)) > 2
+    assert calls == [0]
+
+
+def test_offset_skips_matching_rows(table):
+    row_filter = RowFilter(table, max_score=30)
+    plan = plan_export(table, row_filter, offset=5, limit=3)
+    assert plan.start == row_filter.nth_match(0, 5)
+    assert plan.offset == 5
+
+
+def test_cursor_is_tied_to_the_filter(table):
+    cursor = plan_export(table, RowFilter(table, min_score=50), limit=10).next_cursor
+    with pytest.raises(ExportError, match="different filters"):
+        plan_export(table, RowFilter(table, min_score=60), cursor=cursor, limit=10)
+    with pytest.raises(ExportError, match="Invalid cursor"):
+        plan_export(table, RowFilter(table, min_score=50), cursor="not-a-cursor", limit=10)
+
+
+def test_export_tool_pages(call_tool):
+    rows, cursor = [], None
+    while True:
+        page = call_tool("export_scores", states=["Texas", "Ohio"], page_size=100, cursor=cursor)
+        rows += page["rows"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(rows) == page["total_matching"]
+    assert {row[0] for row in rows} == {"Texas", "Ohio"}
+
+
+def test_export_cursor_is_rejected_after_a_reload(server, call_tool, csv_copy, restore_table):
+    from tests.conftest import read_rows, write_rows
+
+    cursor = call_tool("export_scores", page_size=10)["next_cursor"]
+    rows = read_rows(csv_copy)
+    rows[0]["score"] = "1.5"
+    write_rows(csv_copy, rows)
+    assert server.reload_lookup_table(csv_copy)["reloaded"]
+    assert "Restart the export" in call_tool("export_scores", page_size=10, cursor=cursor)["error"]
+
+
+def test_export_route_formats_agree(client):
+    ndjson = client.get("/export", params={"state": "Texas", "limit": 40})
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert len(lines) == 40 and ndjson.headers["x-next-cursor"]
+    csv_text = client.get("/export", params={"state": "Texas", "limit": 40, "format": "csv"}).text.splitlines()
+    assert csv_text[0].startswith("state,corp_type") and len(csv_text) == 41
+    resumed = client.get("/export", params={"state": "Texas", "cursor": ndjson.headers["x-next-cursor"]})
+    assert len(resumed.text.splitlines()) == int(ndjson.headers["x-total-count"]) - 40
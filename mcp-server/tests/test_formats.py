@@ -0,0 +1,64 @@
+import pytest
+
+from tests.conftest import read_rows, write_rows
+
+ITEMS = [["Texas", "s-corp", "20-49"], ["Ohio", "c-corp", "1-4"]]
+GROUP = {"corp_type": "s-corp", "emp_size": "20-49"}
+
+
+def test_verbose_batch_includes_interpretations(call_tool):
+    result = call_tool("get_opportunity_scores", items=ITEMS)
+    assert "interpretation" in result["fields"] and "methodology" in result
+
+
+@pytest.mark.parametrize("fmt", ["compact", "columnar"])
+def test_compact_batch_leaves_out_interpretations(call_tool, fmt):
+    result = call_tool("get_opportunity_scores", items=ITEMS, format=fmt)
+    assert "interpretation" not in result["fields"]
+    assert all(len(row) == len(result["fields"]) for row in result["results"])
+    assert "methodology" not in result and result["methodology_uri"].startswith("score://methodology")
+
+
+def test_compact_single_score(call_tool):
+    verbose = call_tool("get_opportunity_score", state="Texas", **GROUP)
+    compact = call_tool("get_opportunity_score", state="Texas", format="compact", **GROUP)
+    assert compact["score"] == verbose["score"]
+    assert "interpretation" not in compact and "methodology" not in compact
+
+
+def test_columnar_records(call_tool):
+    result = call_tool("top_states", n=3, format="columnar", **GROUP)
+    table = result["top_states"]
+    assert table["fields"][:2] == ["rank", "state"] and [row[0] for row in table["rows"]] == [1, 2, 3]
+
+
+def test_unknown_format_is_an_error(call_tool):
+    assert "Unknown format" in call_tool("top_states", format="xml", **GROUP)["error"]
+
+
+def test_pages_follow_cursors(server, call_tool, monkeypatch):
+    monkeypatch.setattr(server, "MAX_RANK_PAGE", 20)
+    server.RESPONSE_CACHE.clear()
+    ranks, cursor, pages = [], None, 0
+    while True:
+        page = call_tool("top_states", n=45, cursor=cursor, **GROUP)
+        ranks += [s["rank"] for s in page["top_states"]]
+        cursor, pages = page.get("next_cursor"), pages + 1
+        if cursor is None:
+            break
+    server.RESPONSE_CACHE.clear()
+    assert pages == 3 and ranks == list(range(1, 46))
+
+
+def test_cursor_is_bound_to_query_and_version(server, call_tool, csv_copy, restore_table, monkeypatch):
+    monkeypatch.setattr(server, "MAX_RANK_PAGE", 5)
+    server.RESPONSE_CACHE.clear()
+    cursor = call_tool("top_states", n=20, **GROUP)["next_cursor"]
+    assert "error" in call_tool("top_states", n=20, cursor=cursor, corp_type="c-corp", emp_size="20-49")
+    assert "error" in call_tool("top_states", n=20, cursor="garbage", **GROUP)
+
+    rows = read_rows(csv_copy)
+    rows[0]["score"] = "3.5"
+    write_rows(csv_copy, rows)
+    assert server.reload_lookup_table(csv_copy)["reloaded"]
+    assert "error" in call_tool("top_states", n=20, cursor=cursor, **GROUP)
@@ -0,0 +1,101 @@
+import csv
+import json
+
+from ingest import OUTPUT_COLUMNS, ingest
+from score_store import ScoreTable, file_sha256
+
+HEADER = ["NAME", "NAICS2017", "NAICS2017_LABEL", "LFO_LABEL", "EMPSZES_LABEL", "YEAR",
+          "ESTAB", "PAYANN", "PAYQTR1", "EMP"]
+CORP = "C-corporations and other corporate legal forms of organization"
+SMALL = "Establishments with less than 5 employees"
+LARGE = "Establishments with 1,000 employees or more"
+
+
+def _extract(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def _rows(payroll=1000):
+    return [
+        ["Texas", "00", "Total for all sectors", CORP, SMALL, "2022", "1,200", f"{payroll}", "260", "40"],
+        ["Ohio", "00", "Total for all sectors", CORP, SMALL, "2022", "300", "900", "200", "30"],
+        ["Texas", "00", "Total for all sectors", CORP, LARGE, "2022", "12", "90000", "23000", "3000"],
+        ["Ohio", "00", "Total for all sectors", CORP, LARGE, "2022", "8", "70000", "17000", "2500"],
+        # Dropped: a sector row, an aggregate, a territory and a suppressed value
+        ["Texas", "23", "Construction", CORP, SMALL, "2022", "10", "100", "25", "4"],
+        ["Texas", "00", "Total for all sectors", "All establishments", SMALL, "2022", "9", "9", "2", "1"],
+        ["Guam", "00", "Total for all sectors", CORP, SMALL, "2022", "5", "50", "12", "2"],
+        ["Ohio", "00", "Total for all sectors", CORP, SMALL, "2021", "5", "D", "12", "2"],
+    ]
+
+
+def test_ingest_writes_a_loadable_table(tmp_path):
+    out = tmp_path / "score_lookup.csv"
+    summary = ingest([_extract(tmp_path / "cbp.csv", _rows())], out)
+    assert (summary["rows"], summary["groups_rescored"], summary["year"]) == (4, 2, "2022")
+
+    with open(out, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == OUTPUT_COLUMNS
+    assert {row["score_method"] for row in rows} == {"formula"}
+
+    table = ScoreTable.from_csv(out)
+    assert table.validate() == [] and table.score_method == "formula"
+    assert table.corp_types == ("c-corp",) and table.emp_sizes == ("1-4", "1000+")
+    assert table.record(table.find("Texas", "c-corp", "1-4"))["confidence"] == "high"
+
+
+def test_ingest_redoes_only_what_changed(tmp_path):
+    out, extract = tmp_path / "score_lookup.csv", tmp_path / "cbp.csv"
+    ingest([_extract(extract, _rows())], out)
+    first = out.read_bytes()
+
+    again = ingest([extract], out)
+    assert again["files_reread"] == [] and not again["written"] and out.read_bytes() == first
+
+    changed = ingest([_extract(extract, _rows(payroll=5000))], out)
+    assert changed["files_reread"] == [str(extract)]
+    assert changed["groups_rescored"] == 1 and changed["written"]
+
+
+def _as_model_r_output(out):
+    """Rewrite a lookup file the way model.R would, with random forest scores."""
+    with open(out, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    with open(out, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+        writer.writerows({**row, "score_method": "random_forest"} for row in rows)
+
+
+def _assert_formula_only(out):
+    with open(out, encoding="utf-8", newline="") as f:
+        assert {row["score_method"] for row in csv.DictReader(f)} == {"formula"}
+    assert ScoreTable.from_csv(out).validate() == []
+
+
+def test_ingest_rescores_on_top_of_a_model_r_table(tmp_path):
+    out, extract = tmp_path / "score_lookup.csv", tmp_path / "cbp.csv"
+    ingest([_extract(extract, _rows())], out)
+    _as_model_r_output(out)
+
+    summary = ingest([_extract(extract, _rows(payroll=5000))], out)
+    assert summary["groups_rescored"] == summary["groups_total"] == 2
+    _assert_formula_only(out)
+
+
+def test_ingest_never_copies_rows_of_another_score_method(tmp_path):
+    out, extract = tmp_path / "score_lookup.csv", tmp_path / "cbp.csv"
+    ingest([_extract(extract, _rows())], out)
+    _as_model_r_output(out)
+    # A manifest that already matches the rewritten file
+    manifest_path = tmp_path / ".ingest" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.write_text(json.dumps({**manifest, "output_sha256": file_sha256(out)}))
+
+    assert ingest([extract], out)["groups_rescored"] == 2
+    _assert_formula_only(out)
@@ -0,0 +1,75 @@
+import pytest
+
+from label_index import corp_type_index, edit_distance, emp_size_index, label_key, state_index
+
+
+@pytest.fixture(scope="module")
+def states(table):
+    return state_index(table.states)
+
+
+@pytest.mark.parametrize("spelling, label", [
+    ("Texas", "Texas"), ("texas", "Texas"), ("  NEW york ", "New York"), ("TX", "Texas"),
+    ("48", "Texas"), ("6", "California"), ("Washington D.C.", "District of Columbia"),
+])
+def test_state_spellings(states, table, spelling, label):
+    assert table.states[states.resolve(spelling)] == label
+
+
+@pytest.mark.parametrize("spelling, label", [
+    ("C Corp", "c-corp"), ("S corporation", "s-corp"), ("sole prop", "sole-proprietor"),
+    ("501(c)(3)", "nonprofit"), ("LLP", "partnership"),
+])
+def test_corp_type_aliases(table, spelling, label):
+    index = corp_type_index(table.corp_types)
+    assert table.corp_types[index.resolve(spelling)] == label
+
+
+@pytest.mark.parametrize("spelling, label", [
+    ("10 to 19", "10-19"), ("10-19 employees", "10-19"), ("15", "10-19"), ("1000", "1000+"),
+    ("1,000 or more", "1000+"), ("under 5", "1-4"),
+])
+def test_emp_size_spellings(table, spelling, label):
+    code = emp_size_index(table.emp_sizes).resolve(spelling)
+    assert (table.emp_sizes[code] if code is not None else None) == label
+
+
+def test_unknown_spellings_do_not_resolve(states):
+    assert states.resolve("Atlantis") is None
+    assert states.resolve("") is None
+
+
+@pytest.mark.parametrize("typo, label", [("Texs", "Texas"), ("Califronia", "California"), ("new yrok", "New York")])
+def test_typos_suggest_the_intended_state(states, typo, label):
+    assert states.resolve(typo) is None
+    assert states.suggest(typo)[0] == label
+
+
+def test_numeric_keys_are_not_fuzzy_matched(table):
+    assert "10-19" not in emp_size_index(table.emp_sizes).suggest("11111")
+
+
+def test_label_key_keeps_size_band_hyphens():
+    assert label_key("C-Corp") == "ccorp"
+    assert label_key("10 – 19") == "10-19"
+
+
+@pytest.mark.parametrize("a, b, d", [("texas", "texas", 0), ("texas", "txeas", 1), ("kitten", "sitting", 3)])
+def test_edit_distance(a, b, d):
+    assert edit_distance(a, b) == d
+
+
+def test_tables_with_the_same_labels_share_their_indexes(table):
+    from score_store import ScoreTable
+    from tests.conftest import CSV_PATH
+
+    reloaded = ScoreTable.from_csv(CSV_PATH)
+    assert reloaded.state_labels is table.state_labels
+    assert reloaded.size_labels is table.size_labels
+    assert state_index(table.states, lazy=True) is not table.state_labels
+
+
+def test_long_aliases_tolerate_one_edit(table):
+    corp_types = corp_type_index(table.corp_types)
+    assert corp_types.suggest("C-corporations and other corporate legal forms of organizaton")[0] == "c-corp"
+    assert state_index(table.states).suggest("Distrct of Colmbia")[0] == "District of Columbia"
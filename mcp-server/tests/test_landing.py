@@ -0,0 +1,35 @@
+import gc
+import weakref
+
+from tests.conftest import read_rows, write_rows
+
+
+def test_landing_page_etag_and_compression(client):
+    first = client.get("/", headers={"accept-encoding": "gzip"})
+    assert first.status_code == 200 and first.headers["content-encoding"] == "gzip"
+    assert "/mcp" in first.text
+    again = client.get("/", headers={"if-none-match": first.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_replaced_tables_are_freed(server, client, csv_copy, restore_table):
+    rows = read_rows(csv_copy)
+    old_tables = []
+    for i in range(5):
+        rows[0]["score"] = str(10 + i)
+        write_rows(csv_copy, rows)
+        old_tables.append(weakref.ref(server.TABLE))
+        assert server.reload_lookup_table(csv_copy)["reloaded"]
+        assert client.get("/").status_code == 200
+
+    gc.collect()
+    assert [ref() for ref in old_tables] == [None] * 5
+
+
+def test_forwarded_hosts_do_not_grow_the_page_cache(server, client):
+    client.get("/")
+    templates = len(server._LANDING_TEMPLATES)
+    for i in range(50):
+        page = client.get("/", headers={"x-forwarded-host": f"host{i}.example", "accept-encoding": "gzip"})
+        assert f"host{i}.example/mcp" in page.text
+    assert len(server._LANDING_TEMPLATES) == templates
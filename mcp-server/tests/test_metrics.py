@@ -0,0 +1,43 @@
+import threading
+
+from metrics import Registry
+
+
+def test_counters_sum_across_threads():
+    registry = Registry()
+    calls = registry.counter("calls_total", "Calls.", ("tool",))
+    child = calls.labels("top_states")
+    threads = [threading.Thread(target=lambda: [child.inc() for _ in range(1000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls.value("top_states") == 4000
+    assert 'calls_total{tool="top_states"} 4000' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("tool",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value, "x")
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{tool="x",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{tool="x",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{tool="x",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{tool="x"} 6.05' in lines
+    assert latency.count("x") == 4
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.gauge("g", "Gauge.", ("name",)).set(1, 'a"b\\c')
+    assert 'g{name="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_metrics_endpoint_reports_tool_calls(call_tool, client):
+    call_tool("list_emp_sizes")
+    body = client.get("/metrics").text
+    assert 'mcp_tool_calls_total{tool="list_emp_sizes"}' in body
+    assert 'mcp_tool_duration_seconds_count{tool="list_emp_sizes"}' in body
+    assert "score_response_cache_bytes" in body
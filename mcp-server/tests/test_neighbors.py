@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from neighbors import DISTANCES, KDTree, NeighborError, NeighborIndex, feature_matrix
+
+
+def _brute_force(points, point, k, p):
+    diff = np.abs(points - point)
+    d = diff.max(axis=1) if p == np.inf else (diff ** p).sum(axis=1) ** (1 / p)
+    order = np.lexsort((np.arange(len(points)), d))[:k]
+    return d[order], order
+
+
+@pytest.mark.parametrize("p", DISTANCES.values())
+@pytest.mark.parametrize("leaf_size", [1, 8, 128])
+def test_kdtree_matches_brute_force(p, leaf_size):
+    rng = np.random.default_rng(7)
+    points = rng.normal(size=(600, 4))
+    points[::200] = points[1]  # a few duplicates exercise tie ordering
+    tree = KDTree(points, leaf_size=leaf_size)
+    for point in (points[1], rng.normal(size=4), np.full(4, 5.0)):
+        d, i = tree.query(point, 9, p)
+        expected_d, expected_i = _brute_force(points, point, 9, p)
+        np.testing.assert_allclose(d, expected_d)
+        np.testing.assert_array_equal(i, expected_i)
+
+
+def test_kdtree_small_k_and_constant_points():
+    tree = KDTree(np.zeros((20, 3)), leaf_size=4)
+    d, i = tree.query(np.ones(3), 50)
+    assert len(i) == 20 and np.allclose(d, np.sqrt(3))
+    assert len(tree.query(np.ones(3), 0)[1]) == 0
+
+
+@pytest.mark.parametrize("scope", ["group", "all"])
+def test_neighbor_index_matches_brute_force_on_the_table(table, scope):
+    index = NeighborIndex(table)
+    row = table.find("Texas", "s-corp", "20-49")
+    result = index.query(row, 5, scope=scope, standardize="zscore")
+
+    rows = np.arange(len(table))
+    if scope == "group":
+        rows = rows[index.group == index.group[row]]
+    values = feature_matrix(table)[rows]
+    points = (values - values.mean(axis=0)) / np.where(values.std(axis=0) > 0, values.std(axis=0), 1.0)
+    d, order = _brute_force(points, points[rows == row][0], 6, 2.0)
+    keep = rows[order] != row
+    assert result.rows == rows[order][keep][:5].tolist()
+    np.testing.assert_allclose(result.distances, d[keep][:5])
+
+
+def test_neighbor_index_rejects_unknown_options(table):
+    index = NeighborIndex(table)
+    with pytest.raises(NeighborError, match="Unknown feature"):
+        index.query(0, 3, features=["altitude"])
+    with pytest.raises(NeighborError, match="Unknown distance"):
+        index.query(0, 3, distance="cosine")
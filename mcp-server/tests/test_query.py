@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from export import RowFilter
+from query import QueryError, parse_aggregate, run_query
+
+
+def test_grouped_mean_matches_numpy(table):
+    result = run_query(table, RowFilter(table), ["emp_size"], [parse_aggregate("mean(score)")], [], 50)
+    rows = result["results"]
+    assert len(rows) == len(table.emp_sizes)
+    for row in rows:
+        record = dict(zip(result["fields"], row))
+        code = table.emp_sizes.index(record["emp_size"])
+        expected = table.score[table.size_code == code].mean()
+        assert record["mean_score"] == pytest.approx(expected, abs=1e-3)
+
+
+def test_parse_aggregate_errors():
+    with pytest.raises(QueryError):
+        parse_aggregate("avg:score")
+    with pytest.raises(QueryError):
+        parse_aggregate("mean(salary)")
+    with pytest.raises(QueryError):
+        parse_aggregate("weighted_mean(score)")
+
+
+def test_filters_and_weighted_mean(call_tool, table):
+    response = call_tool(
+        "query_scores",
+        filters={"corp_type": "s-corp", "emp_size": ["20-49", "100-249"], "min_score": 40},
+        aggregates=["count", "weighted_mean(score, establishments)"],
+    )
+    mask = (
+        (table.corp_code == table.corp_types.index("s-corp"))
+        & np.isin(table.size_code, [table.emp_sizes.index("20-49"), table.emp_sizes.index("100-249")])
+        & (table.score >= 40)
+    )
+    record = dict(zip(response["fields"], response["results"][0]))
+    assert record["count"] == int(mask.sum())
+    expected = np.average(table.score[mask], weights=table.establishments[mask])
+    assert record["weighted_mean_score_by_establishments"] == pytest.approx(expected, abs=1e-3)
+
+
+@pytest.mark.parametrize("filters", [
+    {"state": 5.0},
+    {"min_score": "fifty"},
+    {"max_score": "NaN"},
+])
+def test_invalid_filter_values_are_errors(call_tool, filters):
+    response = call_tool("query_scores", filters=filters)
+    assert "error" in response
+
+
+def test_numeric_string_bound_is_coerced(call_tool):
+    response = call_tool("query_scores", filters={"min_score": "50"})
+    assert "error" not in response
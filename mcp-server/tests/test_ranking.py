@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+
+def test_ranked_groups_match_a_sort(table):
+    for corp_type in table.corp_types:
+        for emp_size in table.emp_sizes:
+            rows = table.ranked_group(corp_type, emp_size)
+            scores = table.score[rows]
+            assert (np.diff(scores) <= 0).all()
+            assert table.group_rank[rows].tolist() == list(range(1, len(rows) + 1))
+
+
+def test_score_range_is_inclusive(table):
+    rows = table.score_range("s-corp", "20-49", 40, 60)
+    group = table.ranked_group("s-corp", "20-49")
+    expected = [r for r in group.tolist() if 40 <= table.score[r] <= 60]
+    assert rows.tolist() == expected
+
+
+def test_top_states_ranks(call_tool):
+    response = call_tool("top_states", corp_type="s-corp", emp_size="20-49", n=5)
+    assert [s["rank"] for s in response["top_states"]] == [1, 2, 3, 4, 5]
+    scores = [s["score"] for s in response["top_states"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("bounds", [{"min_score": "NaN"}, {"max_score": "Infinity"}])
+def test_states_in_score_range_rejects_non_finite_bounds(call_tool, bounds):
+    response = call_tool("states_in_score_range", corp_type="s-corp", emp_size="20-49", **bounds)
+    assert "finite" in response["error"]
@@ -0,0 +1,45 @@
+import json
+import sys
+
+from recorder import TrafficRecorder, digest, read_log
+from tests.conftest import SERVER_DIR
+
+sys.path.insert(0, str(SERVER_DIR / "benchmarks"))
+
+
+def test_entries_round_trip_in_start_order(tmp_path):
+    path = tmp_path / "traffic.log"
+    recorder = TrafficRecorder(path)
+    recorder.record({"ts": 2.0, "tool": "top_states", "args": {"n": 3}, "ms": 1.5})
+    recorder.record({"ts": 1.0, "route": "/test", "method": "GET", "query": "tool=list_states", "ms": 0.4})
+    recorder.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"ts": 3.0, "tool": "torn')  # a write cut short
+
+    assert [entry["ts"] for entry in read_log(path)] == [1.0, 2.0]
+    assert json.loads(path.read_text().splitlines()[0])["log"] == "score-traffic"
+    assert recorder.stats()["recorded"] == 2
+
+
+def test_size_limit_drops_entries(tmp_path):
+    recorder = TrafficRecorder(tmp_path / "traffic.log", max_bytes=300)
+    for i in range(50):
+        recorder.record({"ts": float(i), "tool": "top_states", "args": {"n": i}, "ms": 1.0})
+    recorder.close()
+    stats = recorder.stats()
+    assert stats["full"] and stats["recorded"] + stats["dropped"] == 50
+    assert stats["bytes"] <= 300
+
+
+def test_digest_is_stable():
+    assert digest(b"{}") == digest(b"{}") != digest(b"[]")
+    assert len(digest(b"{}")) == 16
+
+
+def test_diff_paths_lists_changed_fields():
+    from replay import diff_paths
+
+    a = {"score": 50, "details": {"state": "Texas", "rank": 1}, "rows": [1, 2], "data_version": "a"}
+    b = {"score": 51, "details": {"state": "Texas", "rank": 1}, "rows": [1, 2, 3], "data_version": "b"}
+    assert diff_paths(a, b, {"data_version"}) == ["$.score", "$.rows.length"]
+    assert diff_paths(a, a, set()) == []
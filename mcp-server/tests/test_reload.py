@@ -0,0 +1,72 @@
+from tests.conftest import read_rows, write_rows
+
+
+def test_reload_swaps_in_new_data(server, csv_copy, call_tool, restore_table):
+    before = call_tool("get_opportunity_score", state="Texas", corp_type="s-corp", emp_size="20-49")
+    rows = read_rows(csv_copy)
+    for row in rows:
+        if (row["state"], row["corp_type"], row["emp_size"]) == ("Texas", "s-corp", "20-49"):
+            row["score"] = "99.9"
+    write_rows(csv_copy, rows)
+
+    result = server.reload_lookup_table(csv_copy)
+    assert result["reloaded"] and result["previous_version"] == before["data_version"]
+    after = call_tool("get_opportunity_score", state="Texas", corp_type="s-corp", emp_size="20-49")
+    assert after["score"] == 99.9
+    assert after["data_version"] == result["data_version"]
+
+
+def test_unchanged_data_is_not_swapped(server, restore_table):
+    table = server.TABLE
+    result = server.reload_lookup_table(server.DEFAULT_CSV_PATH)
+    assert not result["reloaded"] and result["note"] == "Data unchanged"
+    assert server.TABLE is table
+
+
+def test_invalid_table_is_rejected(server, csv_copy, restore_table):
+    table = server.TABLE
+    rows = read_rows(csv_copy)
+    rows[0]["score"] = "150"
+    rows.append(dict(rows[1]))
+    write_rows(csv_copy, rows)
+
+    result = server.reload_lookup_table(csv_copy)
+    assert not result["reloaded"]
+    assert "scores outside 0-100" in result["problems"]
+    assert "duplicate (state, corp_type, emp_size) rows" in result["problems"]
+    assert server.TABLE is table
+
+
+def test_methodology_follows_the_score_method(server, csv_copy, call_tool, client, restore_table):
+    args = {"state": "Texas", "corp_type": "s-corp", "emp_size": "20-49"}
+    assert "Random Forest" in call_tool("get_opportunity_score", **args)["methodology"]["model"]
+
+    write_rows(csv_copy, [{**row, "score_method": "formula"} for row in read_rows(csv_copy)])
+    assert server.reload_lookup_table(csv_copy)["reloaded"]
+    assert call_tool("get_opportunity_score", **args)["methodology"]["model"].startswith("Weighted formula")
+    page = client.get("/").text
+    assert "weighted formula" in page and "Random Forest" not in page
+
+
+def test_mixed_score_methods_are_rejected(server, csv_copy, restore_table):
+    rows = [{**row, "score_method": "formula"} for row in read_rows(csv_copy)]
+    rows[0]["score_method"] = "random_forest"
+    write_rows(csv_copy, rows)
+    result = server.reload_lookup_table(csv_copy)
+    assert not result["reloaded"] and "mixes score methods" in result["error"]
+
+
+def test_rejected_reload_keeps_partitions(server, csv_copy, monkeypatch, restore_table):
+    calls = []
+    monkeypatch.setattr(server.VINTAGES, "clear", lambda: calls.append("vintages"))
+    monkeypatch.setattr(server.COUNTIES, "reload_index", lambda: calls.append("counties"))
+    rows = read_rows(csv_copy)
+    rows[0]["score"] = "150"
+    write_rows(csv_copy, rows)
+
+    assert not server.reload_lookup_table(csv_copy)["reloaded"]
+    assert calls == []
+    rows[0]["score"] = "50"
+    write_rows(csv_copy, rows)
+    assert server.reload_lookup_table(csv_copy)["reloaded"]
+    assert calls == ["vintages", "counties"]
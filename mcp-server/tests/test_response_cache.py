@@ -0,0 +1,38 @@
+import json
+
+from response_cache import ResponseCache, encode_response
+
+
+def test_encoding_matches_json():
+    response = encode_response({"state": "Québec", "score": 1.5})
+    assert json.loads(response.body) == response.payload
+    assert "Québec".encode() in response.body
+
+
+def test_least_recently_used_entries_are_evicted():
+    entry = encode_response({"score": 1.0})
+    per_entry = ResponseCache(10 ** 6)
+    per_entry.put("probe", entry)
+    cache = ResponseCache(3 * per_entry.current_bytes)
+    for key in "abc":
+        cache.put(key, entry)
+    assert cache.get("a") is entry
+    cache.put("d", entry)
+    assert cache.get("b") is None and cache.get("a") is entry
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (3, 1)
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_oversized_responses_are_not_cached():
+    cache = ResponseCache(100)
+    cache.put("big", encode_response({"rows": list(range(1000))}))
+    assert cache.get("big") is None and cache.stats()["entries"] == 0
+
+
+def test_repeat_calls_are_served_from_the_cache(server, call_tool):
+    args = {"state": "Texas", "corp_type": "s-corp", "emp_size": "20-49"}
+    call_tool("state_rank", **args)
+    hits = server.RESPONSE_CACHE.stats()["hits"]
+    assert call_tool("state_rank", **args) == call_tool("state_rank", state="TX", corp_type="S Corp", emp_size="20-49")
+    assert server.RESPONSE_CACHE.stats()["hits"] == hits + 2
@@ -0,0 +1,35 @@
+import pytest
+
+
+def test_matrix_cells_match_single_lookups(call_tool):
+    result = call_tool("score_matrix", rows="state", columns="emp_size", corp_type="s-corp",
+                       row_labels=["TX", "ohio"], column_labels=["1-4", "1000+"])
+    assert result["row_labels"] == ["Texas", "Ohio"] and result["column_labels"] == ["1-4", "1000+"]
+    for i, state in enumerate(result["row_labels"]):
+        for j, size in enumerate(result["column_labels"]):
+            single = call_tool("get_opportunity_score", state=state, corp_type="s-corp", emp_size=size)
+            assert result["values"][i][j] == single.get("score")
+
+
+def test_transposed_axes_agree(call_tool):
+    by_size = call_tool("score_matrix", rows="corp_type", columns="emp_size", state="Texas")
+    by_corp = call_tool("score_matrix", rows="emp_size", columns="corp_type", state="Texas")
+    assert by_size["values"] == [list(column) for column in zip(*by_corp["values"])]
+    assert by_size["missing"] == by_corp["missing"]
+
+
+def test_other_values(table, call_tool):
+    result = call_tool("score_matrix", rows="state", columns="corp_type", emp_size="20-49",
+                       value="establishments", row_labels=["Texas"], column_labels=["s-corp"])
+    row = table.find("Texas", "s-corp", "20-49")
+    assert result["values"] == [[int(table.establishments[row])]]
+
+
+@pytest.mark.parametrize("args, message", [
+    ({"rows": "state", "columns": "state"}, "two different axes"),
+    ({"rows": "state", "columns": "emp_size"}, "Pass corp_type"),
+    ({"rows": "state", "columns": "emp_size", "corp_type": "s-corp", "value": "profit"}, "Unknown value"),
+    ({"rows": "state", "columns": "emp_size", "corp_type": "s-corpp"}, "Invalid labels"),
+])
+def test_invalid_slices(call_tool, args, message):
+    assert message in call_tool("score_matrix", **args)["error"]
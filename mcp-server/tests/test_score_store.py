@@ -0,0 +1,47 @@
+import numpy as np
+
+from tests.conftest import read_rows
+
+
+def test_every_csv_row_is_found(table):
+    rows = read_rows()
+    assert len(table) == len(rows)
+    for row in rows:
+        offset = table.find(row["state"], row["corp_type"], row["emp_size"])
+        record = table.record(offset)
+        assert record["score"] == float(row["score"])
+        assert record["confidence"] == row["confidence"]
+        assert record["establishments"] == int(float(row["establishments"]))
+
+
+def test_missing_combination(table):
+    assert table.find("Atlantis", "s-corp", "1-4") == -1
+    assert table.find("Texas", "s-corp", "7-8") == -1
+
+
+def test_columns_are_read_only(table):
+    for column in table.columns().values():
+        assert not column.flags.writeable
+
+
+def test_record_values_are_python_scalars(table):
+    record = table.record(0)
+    assert type(record["score"]) is float
+    assert type(record["establishments"]) is int
+
+
+def test_codes_map_back_to_labels(table):
+    row = table.find("Texas", "s-corp", "20-49")
+    assert table.states[table.state_code[row]] == "Texas"
+    assert table.corp_types[table.corp_code[row]] == "s-corp"
+    assert table.emp_sizes[table.size_code[row]] == "20-49"
+    assert np.isfinite(table.score).all()
+
+
+def test_find_is_stable_across_memoized_spellings(table):
+    row = table.find("Texas", "s-corp", "20-49")
+    assert table.find("tx", "S Corp", "20 to 49") == row
+    assert table.find("tx", "S Corp", "20 to 49") == row
+    # The second miss is answered from the memo, which remembers None
+    assert table.find("Texsa", "s-corp", "20-49") == -1
+    assert table.find("Texsa", "s-corp", "20-49") == -1
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from scoring import DEFAULT_WEIGHTS, ScoringError, WeightedScorer
+
+
+def test_default_weights_without_momentum(table):
+    scorer = WeightedScorer(table)
+    assert table.payroll_momentum is None
+    assert scorer.default_weights() == {**DEFAULT_WEIGHTS, "momentum": 0.0}
+    with pytest.raises(ScoringError):
+        scorer.rescore(DEFAULT_WEIGHTS)
+
+
+def test_rescore_normalizes_weights_and_ranks_groups(table):
+    scorer = WeightedScorer(table)
+    rescored = scorer.rescore({"salary": 2, "momentum": 0, "density": 2})
+    assert rescored.weights == (0.5, 0.0, 0.5)
+    assert scorer.rescore({"salary": 1, "momentum": 0, "density": 1}) is rescored
+
+    group = table.group_slice("s-corp", "20-49")
+    scores = rescored.score[rescored.ranked_rows[group]]
+    assert (np.diff(scores) <= 0).all()
+
+
+def test_score_with_weights_defaults_work_without_momentum(call_tool):
+    response = call_tool("score_with_weights", corp_type="s-corp", emp_size="20-49", n=3)
+    assert "error" not in response
+    assert response["query"]["weights"]["momentum"] == 0
+    assert len(response["top_states"]) == 3
+
+    response = call_tool("score_with_weights", corp_type="s-corp", emp_size="20-49", momentum_weight=0.5)
+    assert "payroll_momentum" in response["error"]
+
+
+def test_score_with_weights_negative_n(call_tool):
+    response = call_tool("score_with_weights", corp_type="s-corp", emp_size="20-49", n=-2)
+    assert response["top_states"] == []
+
+
+@pytest.mark.parametrize("fmt", ["verbose", "compact", "columnar"])
+def test_missing_momentum_warning_survives_every_format(call_tool, fmt):
+    response = call_tool("score_with_weights", corp_type="s-corp", emp_size="20-49", n=3, format=fmt)
+    assert any("momentum" in warning for warning in response["warnings"])
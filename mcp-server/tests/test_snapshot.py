@@ -0,0 +1,87 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from score_store import ScoreTable
+from snapshot import (
+    ALIGNMENT, FORMAT_VERSION, SnapshotError, build_snapshot, ensure_snapshot, load_snapshot, snapshot_path_for,
+)
+
+PREFIX = struct.Struct("<8sIII")
+
+
+def _rewrite_header(path, edit):
+    """Apply edit() to a snapshot's JSON header, keeping its length and fixing its checksum."""
+    data = bytearray(path.read_bytes())
+    magic, version, header_len, _ = PREFIX.unpack_from(data, 0)
+    header = json.loads(data[ALIGNMENT:ALIGNMENT + header_len])
+    edit(header)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode().ljust(header_len)
+    assert len(header_bytes) == header_len
+    PREFIX.pack_into(data, 0, magic, version, header_len, zlib.crc32(header_bytes))
+    data[ALIGNMENT:ALIGNMENT + header_len] = header_bytes
+    path.write_bytes(bytes(data))
+
+
+def test_round_trip(csv_copy):
+    path = build_snapshot(csv_copy)
+    mapped = load_snapshot(path, csv_copy)
+    parsed = ScoreTable.from_csv(csv_copy)
+    assert mapped.version == parsed.version
+    for name, column in parsed.columns().items():
+        np.testing.assert_array_equal(mapped.columns()[name], column)
+    assert mapped.find("Texas", "s-corp", "20-49") == parsed.find("Texas", "s-corp", "20-49")
+
+
+def test_payload_corruption_is_detected(csv_copy):
+    path = build_snapshot(csv_copy)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match="payload checksum"):
+        load_snapshot(path, csv_copy)
+
+
+def test_other_format_version_is_rejected(csv_copy):
+    path = build_snapshot(csv_copy)
+    data = bytearray(path.read_bytes())
+    magic, _, header_len, crc = PREFIX.unpack_from(data, 0)
+    PREFIX.pack_into(data, 0, magic, FORMAT_VERSION + 1, header_len, crc)
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match="format version"):
+        load_snapshot(path, csv_copy)
+
+
+def test_missing_index_is_a_snapshot_error(csv_copy):
+    path = build_snapshot(csv_copy)
+    _rewrite_header(path, lambda header: header["columns"].pop("row_index"))
+    with pytest.raises(SnapshotError, match="malformed header"):
+        load_snapshot(path, csv_copy, verify=False)
+
+
+def test_stale_snapshot_is_rebuilt(csv_copy):
+    build_snapshot(csv_copy)
+    with open(csv_copy, "a", encoding="utf-8") as f:
+        f.write("Atlantis,s-corp,1-4,50.0,low,3,9,40.0\n")
+    with pytest.raises(SnapshotError, match="stale"):
+        load_snapshot(snapshot_path_for(csv_copy), csv_copy)
+    path, rebuilt = ensure_snapshot(csv_copy)
+    assert rebuilt
+    assert load_snapshot(path, csv_copy).find("Atlantis", "s-corp", "1-4") >= 0
+
+
+def test_score_method_survives_a_snapshot(csv_copy):
+    from tests.conftest import read_rows, write_rows
+
+    write_rows(csv_copy, [{**row, "score_method": "formula"} for row in read_rows(csv_copy)])
+    assert load_snapshot(build_snapshot(csv_copy), csv_copy).score_method == "formula"
+
+
+def test_empty_snapshot_is_a_snapshot_error(csv_copy):
+    path = snapshot_path_for(csv_copy)
+    path.write_bytes(b"")
+    with pytest.raises(SnapshotError, match="truncated"):
+        load_snapshot(path, csv_copy)
@@ -0,0 +1,57 @@
+import shutil
+
+import pytest
+
+from tests.conftest import CSV_PATH, read_rows, write_rows
+
+GROUP = {"corp_type": "s-corp", "emp_size": "20-49"}
+
+
+@pytest.fixture
+def vintage_dir(server, tmp_path, monkeypatch):
+    """Serve other data years from a temporary directory."""
+    monkeypatch.setattr(server.VINTAGES, "directory", tmp_path)
+    server.VINTAGES.clear()
+    yield tmp_path
+    server.VINTAGES.clear()
+
+
+def _write_vintage(directory, year, shift):
+    rows = read_rows()
+    for row in rows:
+        row["score"] = str(max(0.0, float(row["score"]) - shift))
+    return write_rows(directory / f"score_lookup_{year}.csv", rows)
+
+
+def _trend(call_tool, state="Texas", **args):
+    result = call_tool("score_trend", states=[state], **GROUP, **args)
+    return result["trends"][0]
+
+
+def test_trend_compares_years(server, vintage_dir, call_tool):
+    _write_vintage(vintage_dir, 2021, 5)
+    trend = _trend(call_tool)
+    assert trend["scores"][1] - trend["scores"][0] == pytest.approx(5, abs=0.05)
+    assert trend["score_change"] == pytest.approx(5, abs=0.05)
+
+
+def test_rewritten_vintage_is_not_served_stale(server, vintage_dir, call_tool):
+    _write_vintage(vintage_dir, 2021, 5)
+    assert _trend(call_tool)["score_change"] == pytest.approx(5, abs=0.05)
+
+    _write_vintage(vintage_dir, 2021, 10)
+    assert server.reload_lookup_table(CSV_PATH)["note"] == "Data unchanged"
+    assert _trend(call_tool)["score_change"] == pytest.approx(10, abs=0.05)
+
+
+@pytest.mark.parametrize("n, expected", [(-2, 0), (0, 0), (3, 3)])
+def test_trend_bounds_n(vintage_dir, call_tool, n, expected):
+    shutil.copy(CSV_PATH, vintage_dir / "score_lookup_2021.csv")
+    result = call_tool("score_trend", n=n, **GROUP)
+    assert len(result["trends"]) == expected
+    assert result["total_available"] > 3
+
+
+def test_unknown_year_is_an_error(vintage_dir, call_tool):
+    _write_vintage(vintage_dir, 2021, 5)
+    assert "error" in call_tool("score_trend", years=[2019, 2022], **GROUP)
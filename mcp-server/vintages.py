@@ -0,0 +1,46 @@
+"""
+Score tables for other County Business Patterns years, loaded on demand.
+
+The current table (score_lookup.csv) is always resident. Other vintages
+live next to it as score_lookup_<year>.csv and/or score_lookup_<year>.snapshot,
+for example:
+
+    python ingest.py cbp21co.txt --year 2021 --out score_lookup_2021.csv --snapshot
+
+Nothing is read at startup, so adding history does not slow it down; years
+are loaded on first use and evicted under a memory budget (see
+partitions.py).
+"""
+
+import re
+from pathlib import Path
+from typing import Callable
+
+from partitions import PartitionStore
+from score_store import ScoreTable
+from snapshot import snapshot_path_for
+
+
+class VintageStore(PartitionStore):
+    """Score tables keyed by data year."""
+
+    def __init__(self, csv_path: Path, load: Callable[[Path], ScoreTable], max_bytes: int):
+        super().__init__(load, max_bytes)
+        self.directory = csv_path.parent
+        self.stem = csv_path.stem
+        self._pattern = re.compile(rf"{re.escape(self.stem)}_(\d{{4}})\.(?:csv|snapshot)")
+
+    def path_for(self, year: int) -> Path | None:
+        """Return the CSV path for a year (the snapshot sits next to it), or None if neither exists."""
+        csv_path = self.directory / f"{self.stem}_{year}.csv"
+        if csv_path.exists() or snapshot_path_for(csv_path).exists():
+            return csv_path
+        return None
+
+    def years(self) -> list[int]:
+        """Return the years that have a table on disk."""
+        try:
+            names = [p.name for p in self.directory.iterdir()]
+        except FileNotFoundError:
+            return []
+        return sorted({int(m.group(1)) for m in map(self._pattern.fullmatch, names) if m})